@@ -1,3 +1,35 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from erp.testing import QueryBudgetMixin
+from .models import CustomUser
 
-# Create your tests here.
+
+@override_settings(JOBS={'IN_PROCESS': False})
+class CustomUserAdminQueryTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(self.user)
+
+    def add_users(self, count):
+        start = CustomUser.objects.count()
+        CustomUser.objects.bulk_create([
+            CustomUser(username=f'user{start + i}', email=f'user{start + i}@example.com') for i in range(count)
+        ])
+
+    def test_changelist(self):
+        url = reverse('admin:accounts_customuser_changelist')
+        for _ in range(2):
+            self.add_users(30)
+            self.assertQueryBudget(url, 7)
+
+    def test_change_form(self):
+        url = reverse('admin:accounts_customuser_change', args=[self.user.pk])
+        for _ in range(2):
+            self.add_users(30)
+            self.assertQueryBudget(url, 9)
+
+    def test_add_form(self):
+        url = reverse('admin:accounts_customuser_add')
+        for _ in range(2):
+            self.add_users(30)
+            self.assertQueryBudget(url, 6)
@@ -0,0 +1,71 @@
+import hashlib
+from django.http import JsonResponse, HttpResponseBadRequest
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_GET
+from inventory.models import Stock
+from .cache import get_data_version, scope_for
+from .charts import GRANULARITIES, sales_series, purchases_series, category_series
+
+SERIES = ('sales', 'purchases', 'categories')
+
+
+def _chart_params(request):
+    """(series, granularity, periods) from the query string, or None if invalid."""
+    series = request.GET.get('series', 'sales')
+    granularity = request.GET.get('granularity', 'day')
+    if series not in SERIES or granularity not in GRANULARITIES:
+        return None
+    _, default_periods, max_periods = GRANULARITIES[granularity]
+    try:
+        periods = int(request.GET.get('periods', default_periods))
+    except ValueError:
+        return None
+    return series, granularity, max(1, min(periods, max_periods))
+
+
+def chart_etag(request):
+    """
+    Strong ETag built from the dashboard data version, so an unchanged chart
+    is answered with a 304 before any chart query runs.
+    """
+    params = _chart_params(request)
+    if params is None:
+        return None
+    key = ':'.join(str(part) for part in (
+        get_data_version(), scope_for(request.user), timezone.localdate(), *params,
+    ))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+@require_GET
+@condition(etag_func=chart_etag)
+def chart_data(request):
+    """
+    Chart series for the admin index.
+
+    ?series=sales&granularity=day|week|month&periods=N       verified sales per bucket
+    ?series=purchases&granularity=day|week|month&periods=N   purchase cost per bucket
+    ?series=categories                                       stock quantity/value per category
+    """
+    params = _chart_params(request)
+    if params is None:
+        return HttpResponseBadRequest("Invalid series, granularity or periods.")
+    series, granularity, periods = params
+
+    if series in ('sales', 'purchases'):
+        build = sales_series if series == 'sales' else purchases_series
+        data = {
+            'granularity': granularity,
+            'points': build(granularity, periods, timezone.localdate()),
+        }
+    else:
+        stock_base = Stock.objects.all()
+        if not request.user.is_superuser:
+            stock_base = stock_base.filter(user=request.user)
+        data = {'categories': category_series(stock_base)}
+
+    response = JsonResponse(data)
+    # Always revalidate; the ETag turns unchanged data into a 304
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,153 @@
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.query import QuerySet
+from django.utils import timezone
+from .models import DataVersion
+from .stats import DashboardStats
+
+SNAPSHOT_KEY = 'dashboard:snapshot:{scope}'
+
+DEFAULTS = {
+    'TIMEOUT': 300,                   # seconds a snapshot may live in the cache
+    'STALE_WHILE_REVALIDATE': True,   # serve the previous snapshot while a refresh runs
+    'LOCK_TIMEOUT': 30,               # seconds before an abandoned recompute lock expires
+    'LOCK_WAIT': 5,                   # seconds a request waits for another recompute
+}
+
+_local_locks = {}
+_local_locks_guard = threading.Lock()
+
+
+def cache_settings():
+    return {**DEFAULTS, **getattr(settings, 'DASHBOARD_CACHE', {})}
+
+
+# ==================== DATA VERSION ====================
+
+def get_data_version():
+    """The shared change counter (one primary key lookup)."""
+    version = DataVersion.objects.filter(pk=1).values_list('value', flat=True).first()
+    if version is None:
+        # Start from a timestamp so a reset counter never matches an old snapshot
+        version = DataVersion.objects.get_or_create(pk=1, defaults={'value': int(time.time() * 1000)})[0].value
+    return version
+
+
+def bump_data_version():
+    # Atomic in the database, so concurrent bumps from any process are never lost
+    if not DataVersion.objects.filter(pk=1).update(value=F('value') + 1):
+        get_data_version()
+
+
+def mark_dashboard_stale():
+    """Invalidate every dashboard snapshot once the current transaction commits."""
+    connection = transaction.get_connection()
+    # One bump per transaction, however many rows it saves or deletes. The pending
+    # callbacks are the flag: Django drops them on rollback, so nothing is lost.
+    if connection.in_atomic_block and any(entry[1] is bump_data_version for entry in connection.run_on_commit):
+        return
+    transaction.on_commit(bump_data_version)
+
+
+# ==================== SNAPSHOTS ====================
+
+def scope_for(user):
+    # Superusers see everything, partners only their own Stock rows
+    return 'all' if user.is_superuser else f'user-{user.pk}'
+
+
+def build_snapshot(user):
+    data = DashboardStats(user).as_dict()
+    for name, value in data.items():
+        if isinstance(value, QuerySet):
+            data[name] = list(value)
+    return data
+
+
+def _is_fresh(entry, version, today):
+    return entry is not None and entry['version'] == version and entry['today'] == today
+
+
+def _local_lock(key):
+    with _local_locks_guard:
+        return _local_locks.setdefault(key, threading.Lock())
+
+
+def _compute_and_store(user, key, version):
+    data = build_snapshot(user)
+    cache.set(key, {
+        'version': version,
+        'today': timezone.localdate(),
+        'data': data,
+    }, cache_settings()['TIMEOUT'])
+    return data
+
+
+def _refresh_in_background(user, key):
+    conf = cache_settings()
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, conf['LOCK_TIMEOUT']):
+        return  # a refresh is already running somewhere
+
+    def run():
+        try:
+            _compute_and_store(user, key, get_data_version())
+        finally:
+            cache.delete(lock_key)
+            connection.close()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def _recompute(user, key):
+    """Single-flight recompute: one computation per scope, everyone else waits for it."""
+    conf = cache_settings()
+    lock_key = f'{key}:lock'
+
+    # Requests in this process queue up here ...
+    with _local_lock(key):
+        version = get_data_version()
+        today = timezone.localdate()
+        entry = cache.get(key)
+        if _is_fresh(entry, version, today):
+            return entry['data']
+
+        # ... and other processes share the work through the cache lock
+        if not cache.add(lock_key, 1, conf['LOCK_TIMEOUT']):
+            deadline = time.monotonic() + conf['LOCK_WAIT']
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                entry = cache.get(key)
+                if _is_fresh(entry, get_data_version(), today):
+                    return entry['data']
+            # The other worker is too slow or died - compute it ourselves
+            return _compute_and_store(user, key, version)
+
+        try:
+            return _compute_and_store(user, key, version)
+        finally:
+            cache.delete(lock_key)
+
+
+def get_dashboard_snapshot(user):
+    """
+    The full dashboard dict for `user`, served from the cache while no Sales,
+    Purchase, Stock or PurchaseReturn change has been recorded since it was built.
+    """
+    key = SNAPSHOT_KEY.format(scope=scope_for(user))
+    version = get_data_version()
+    today = timezone.localdate()
+
+    entry = cache.get(key)
+    if _is_fresh(entry, version, today):
+        return entry['data']
+
+    if entry is not None and entry['today'] == today and cache_settings()['STALE_WHILE_REVALIDATE']:
+        _refresh_in_background(user, key)
+        return entry['data']
+
+    return _recompute(user, key)
@@ -0,0 +1,41 @@
+from django.db.models import Sum, F
+from sales.models import DailySalesRollup
+from .timeseries import build_series, last_buckets, purchase_time_series
+
+GRANULARITIES = {
+    # name: (label format, default periods, max periods)
+    'day': ('%b %d', 11, 366),
+    'week': ('%d %b', 8, 104),
+    'month': ('%b %y', 6, 60),
+}
+
+
+def _points(series, granularity, value='total'):
+    label_format = GRANULARITIES[granularity][0]
+    return [
+        {'label': point['bucket'].strftime(label_format), 'amount': float(point[value])}
+        for point in series
+    ]
+
+
+def sales_series(granularity, periods, today):
+    """Verified sales per calendar bucket, read from the daily rollup in one grouped query."""
+    start, end = last_buckets(granularity, periods, today)
+    series = build_series(
+        DailySalesRollup.objects.all(), 'date', granularity, start, end,
+        total=Sum('total_amount'),
+    )
+    return _points(series, granularity)
+
+
+def purchases_series(granularity, periods, today):
+    """Purchase cost per calendar bucket in one grouped query."""
+    start, end = last_buckets(granularity, periods, today)
+    return _points(purchase_time_series(granularity, start, end), granularity)
+
+
+def category_series(stock_base):
+    return list(stock_base.values('category__name').annotate(
+        total_quantity=Sum('quantity'),
+        total_value=Sum(F('quantity') * F('cost_price'))
+    ).order_by('-total_value'))
@@ -0,0 +1,58 @@
+from django.core.exceptions import PermissionDenied
+from django.db import connection
+from django.shortcuts import render
+from django.test.utils import CaptureQueriesContext
+from sales.models import DailySalesRollup
+from purchases.models import Purchase
+from inventory.models import Stock
+from purchase_returns.models import PurchaseReturn
+from .cache import build_snapshot
+from .metrics import registry, period_params
+
+# Base table of every metrics group, used to show its compiled SQL
+TABLE_QUERYSETS = {
+    'stock': lambda: Stock.objects.all(),
+    'sales_rollup': lambda: DailySalesRollup.objects.all(),
+    'purchases': lambda: Purchase.objects.all(),
+    'purchase_returns': lambda: PurchaseReturn.objects.all(),
+}
+
+# Pages whose metric queries are captured on every visit of the debug view
+PAGES = (
+    ('Admin index', lambda user: build_snapshot(user)),
+)
+
+
+def metrics_debug(request, site):
+    """Compiled SQL per metrics table and the queries each dashboard page runs."""
+    if not request.user.is_superuser:
+        raise PermissionDenied
+
+    params = period_params()
+    tables = []
+    for table in registry.tables():
+        with CaptureQueriesContext(connection) as captured:
+            registry.evaluate(table, TABLE_QUERYSETS[table](), params)
+        tables.append({
+            'name': table,
+            'metrics': [metric.name for metric in registry.metrics(table)],
+            'sql': captured.captured_queries[-1]['sql'] if captured.captured_queries else '',
+        })
+
+    pages = []
+    for title, evaluate in PAGES:
+        with CaptureQueriesContext(connection) as captured:
+            evaluate(request.user)
+        pages.append({
+            'title': title,
+            'query_count': len(captured.captured_queries),
+            'queries': captured.captured_queries,
+        })
+
+    context = {
+        **site.each_context(request),
+        'title': 'Dashboard Metrics',
+        'tables': tables,
+        'pages': pages,
+    }
+    return render(request, 'admin/dashboard_metrics.html', context)
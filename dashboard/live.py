@@ -0,0 +1,104 @@
+import json
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Sum
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from sales.models import Sales, DailySalesRollup
+from sales.rollups import local_day_bounds
+from .metrics import registry, period_params
+
+HEARTBEAT_SECONDS = 15
+
+# Latest delta, and a marker that some dashboard is listening, in the shared cache
+EVENT_KEY = 'dashboard:live:event'
+LISTENING_KEY = 'dashboard:live:listening'
+
+DEFAULTS = {
+    'POLL_SECONDS': 2,          # how often an open stream checks for a new delta
+    'MAX_STREAM_SECONDS': 300,  # a stream ends after this; the browser reconnects by itself
+}
+
+
+def live_settings():
+    return {**DEFAULTS, **getattr(settings, 'DASHBOARD_LIVE', {})}
+
+
+# ==================== PUBLISHING ====================
+# Deltas go through the shared cache, so a change made in any web worker or in
+# the `run_jobs` worker reaches the streams of every process. The writer builds
+# each delta once (a few queries); open streams only poll one cache key, so N
+# open dashboards cost the same as one. Only the latest delta is kept: a stream
+# that misses one gets the full current totals with the next.
+
+def sales_delta(kind):
+    """Today's totals and the newest verified sale, as pushed to the live dashboards."""
+    params = period_params()
+    today = registry.evaluate('sales_rollup', DailySalesRollup.objects.all(), params, names=[
+        'today_sales_total', 'today_sales_count',
+    ])
+    today_start, today_end = local_day_bounds(params['today'], params['today'])
+    unverified = Sales.objects.filter(
+        is_verified=False,
+        sold_on__gte=today_start,
+        sold_on__lt=today_end
+    ).aggregate(total=Sum('total_amount'))['total'] or 0
+
+    latest = Sales.objects.filter(is_verified=True).select_related('stock').first()
+    return {
+        'kind': kind,
+        'today_label': params['today'].strftime('%b %d'),
+        'today_sales_total': today['today_sales_total'],
+        'today_sales_count': today['today_sales_count'],
+        'unverified_sales': round(unverified, 2),
+        'latest_sale': {
+            'stock': latest.stock.name,
+            'quantity_sold': latest.quantity_sold,
+            'total_amount': latest.total_amount,
+            'sold_on': timezone.localtime(latest.sold_on).strftime('%d %b %I:%M %p'),
+        } if latest else None,
+    }
+
+
+def notify_sales_changed(kind):
+    """Publish a delta to the open dashboards once the current transaction commits."""
+    def send():
+        if cache.get(LISTENING_KEY):
+            cache.set(EVENT_KEY, {'id': uuid.uuid4().hex, 'event': sales_delta(kind)}, None)
+    transaction.on_commit(send)
+
+
+def sales_stream(request):
+    """
+    Server-sent events stream of sales deltas for the admin index.
+    Each open stream holds a server worker (thread) while it lasts, so streams
+    end after MAX_STREAM_SECONDS and the browser reconnects.
+    """
+    conf = live_settings()
+    entry = cache.get(EVENT_KEY)
+    opened_after = entry['id'] if entry else None  # only deltas published from now on
+
+    def events():
+        yield 'retry: 5000\n\n'
+        last_id = opened_after
+        started = last_beat = time.monotonic()
+        while time.monotonic() - started < conf['MAX_STREAM_SECONDS']:
+            cache.set(LISTENING_KEY, True, conf['POLL_SECONDS'] * 5)
+            entry = cache.get(EVENT_KEY)
+            if entry and entry['id'] != last_id:
+                last_id = entry['id']
+                last_beat = time.monotonic()
+                yield f'event: sales\ndata: {json.dumps(entry["event"], cls=DjangoJSONEncoder)}\n\n'
+            elif time.monotonic() - last_beat >= HEARTBEAT_SECONDS:
+                last_beat = time.monotonic()
+                yield ': keepalive\n\n'
+            time.sleep(conf['POLL_SECONDS'])
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the stream
+    return response
@@ -0,0 +1,116 @@
+from datetime import timedelta
+from django.db.models import Sum, Count, F, Q
+from django.utils import timezone
+
+
+class Metric:
+    """
+    One named number: an aggregate over a table, optionally restricted by a filter.
+    `when` is a callable taking the period params and returning a Q, so metrics that
+    share a table compile into a single query using Sum(..., filter=Q(...)).
+    """
+
+    def __init__(self, name, function, expression, when=None, default=0, digits=None):
+        self.name = name
+        self.function = function
+        self.expression = expression
+        self.when = when
+        self.default = default
+        self.digits = digits
+
+    def compile(self, params):
+        condition = self.when(params) if self.when else None
+        return self.function(self.expression, filter=condition)
+
+    def finalize(self, value):
+        if value is None:
+            value = self.default
+        if self.digits is not None:
+            value = round(value, self.digits)
+        return value
+
+
+class MetricRegistry:
+    """Metrics grouped by table; every group evaluates with one aggregate() call."""
+
+    def __init__(self):
+        self._tables = {}
+
+    def register(self, table, *metrics):
+        group = self._tables.setdefault(table, {})
+        for metric in metrics:
+            if metric.name in group:
+                raise ValueError(f"Metric '{metric.name}' is already registered for '{table}'")
+            group[metric.name] = metric
+
+    def tables(self):
+        return list(self._tables)
+
+    def metrics(self, table, names=None):
+        group = self._tables[table]
+        if names is None:
+            return list(group.values())
+        return [group[name] for name in names]
+
+    def compile(self, table, params, names=None):
+        """Keyword arguments for queryset.aggregate()."""
+        return {metric.name: metric.compile(params) for metric in self.metrics(table, names)}
+
+    def evaluate(self, table, queryset, params, names=None):
+        metrics = self.metrics(table, names)
+        result = queryset.aggregate(**{metric.name: metric.compile(params) for metric in metrics})
+        return {metric.name: metric.finalize(result[metric.name]) for metric in metrics}
+
+
+def period_params(today=None):
+    """Date boundaries shared by the dashboard pages."""
+    today = today or timezone.localdate()
+    return {
+        'today': today,
+        'week_ago': today - timedelta(days=7),
+        'month_ago': today - timedelta(days=30),
+    }
+
+
+registry = MetricRegistry()
+
+# ==================== STOCK (inventory.Stock) ====================
+
+registry.register(
+    'stock',
+    Metric('total_stock_value', Sum, F('quantity') * F('cost_price'), digits=2),
+    Metric('total_items', Sum, 'quantity'),
+)
+
+# ==================== VERIFIED SALES (sales.DailySalesRollup) ====================
+
+registry.register(
+    'sales_rollup',
+    Metric('today_sales_total', Sum, 'total_amount', when=lambda p: Q(date=p['today']), digits=2),
+    Metric('today_sales_count', Sum, 'sales_count', when=lambda p: Q(date=p['today'])),
+    Metric('week_sales_total', Sum, 'total_amount', when=lambda p: Q(date__gte=p['week_ago']), digits=2),
+    Metric('week_sales_profit', Sum, 'gross_profit', when=lambda p: Q(date__gte=p['week_ago']), digits=2),
+    Metric('month_sales_total', Sum, 'total_amount', when=lambda p: Q(date__gte=p['month_ago']), digits=2),
+    Metric('month_sales_profit', Sum, 'gross_profit', when=lambda p: Q(date__gte=p['month_ago']), digits=2),
+    Metric('month_sales_count', Sum, 'sales_count', when=lambda p: Q(date__gte=p['month_ago'])),
+    Metric('total_revenue', Sum, 'total_amount', digits=2),
+    Metric('total_profit', Sum, 'gross_profit', digits=2),
+    Metric('margin_total', Sum, 'margin_total'),
+    Metric('margin_count', Sum, 'margin_count'),
+)
+
+# ==================== PURCHASES (purchases.Purchase) ====================
+
+registry.register(
+    'purchases',
+    Metric('pending_purchases', Count, 'id', when=lambda p: Q(is_received=False)),
+    Metric('month_purchases_total', Sum, 'total_cost', when=lambda p: Q(purchase_date__gte=p['month_ago']), digits=2),
+    Metric('month_purchases_count', Count, 'id', when=lambda p: Q(purchase_date__gte=p['month_ago'])),
+)
+
+# ==================== PURCHASE RETURNS (purchase_returns.PurchaseReturn) ====================
+
+registry.register(
+    'purchase_returns',
+    Metric('total_purchase_return', Sum, F('quantity_returned') * F('stock_item__cost_price')),
+)
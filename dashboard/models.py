@@ -1,3 +1,12 @@
 from django.db import models
 
-# Create your models here.
+
+class DataVersion(models.Model):
+    """
+    Single-row counter of dashboard data changes (see dashboard/cache.py).
+    Kept in the database so every web worker and the job worker see the same value.
+    """
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return str(self.value)
@@ -0,0 +1,31 @@
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_save, post_delete
+from inventory.models import Stock
+from purchases.models import Purchase
+from sales.models import Sales
+from purchase_returns.models import PurchaseReturn
+from .cache import mark_dashboard_stale
+from .live import notify_sales_changed
+
+# Models the dashboard snapshot is built from
+TRACKED_MODELS = (Sales, Purchase, Stock, PurchaseReturn)
+
+
+def data_changed(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    # The dashboard reads the default database only (not e.g. a benchmark's scratch copy)
+    if using == DEFAULT_DB_ALIAS:
+        mark_dashboard_stale()
+
+
+for model in TRACKED_MODELS:
+    post_save.connect(data_changed, sender=model, dispatch_uid=f'dashboard_save_{model.__name__}')
+    post_delete.connect(data_changed, sender=model, dispatch_uid=f'dashboard_delete_{model.__name__}')
+
+
+def sale_created(sender, instance, created, using=DEFAULT_DB_ALIAS, **kwargs):
+    # Verification is announced once per action by verify_sale, not per row
+    if created and using == DEFAULT_DB_ALIAS:
+        notify_sales_changed('created')
+
+
+post_save.connect(sale_created, sender=Sales, dispatch_uid='dashboard_live_sale_created')
@@ -0,0 +1,232 @@
+from django.db.models import Sum
+from django.utils.functional import cached_property
+from inventory.models import Stock
+from inventory.alerts import low_stock_feed
+from purchases.models import Purchase
+from sales.models import Sales, DailySalesRollup
+from sales.rollups import local_day_bounds
+from purchase_returns.models import PurchaseReturn
+from .metrics import registry, period_params
+from .charts import sales_series, category_series
+
+
+class DashboardStats:
+    """
+    Lazily evaluated dashboard payload.
+
+    Every metric is a property; the query behind it only runs the first time a
+    template (or caller) reads it. Scalar metrics come from dashboard.metrics and
+    are evaluated one table at a time, so touching any stock number costs the one
+    stock query, any sales number the one rollup query, and so on.
+    Use as_dict() to evaluate everything at once.
+
+    The chart series (monthly_sales, category_distribution) are still available
+    as properties but are left out of as_dict(): the admin index fetches them
+    from the chart endpoint in dashboard/api.py after the page has rendered.
+    """
+
+    METRICS = (
+        'today', 'total_stock_value', 'total_items', 'total_purchase_return',
+        'low_stock_count', 'out_of_stock', 'today_sales_total', 'unverified_sales',
+        'today_sales_count', 'week_sales_total', 'week_sales_profit',
+        'month_sales_total', 'month_sales_profit', 'month_sales_count',
+        'total_revenue', 'total_profit', 'pending_purchases',
+        'month_purchases_total', 'month_purchases_count', 'top_products',
+        'daily_sales', 'recent_sales', 'stock_alerts', 'avg_profit_margin',
+    )
+
+    STOCK_ALERT_LIMIT = 10
+
+    def __init__(self, user):
+        self.user = user
+        self.params = period_params()
+        self.today = self.params['today']
+        self.week_ago = self.params['week_ago']
+        self.month_ago = self.params['month_ago']
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.METRICS}
+
+    # ==================== BASE QUERYSETS ====================
+
+    @cached_property
+    def stock_base(self):
+        # Apply user filter only if not superuser
+        # Note: Sales and Purchase have no user field, so only stock metrics are scoped
+        if self.user.is_superuser:
+            return Stock.objects.all()
+        return Stock.objects.filter(user=self.user)
+
+    @property
+    def rollup_base(self):
+        # Verified sales come from the daily rollup table (one row per day & stock)
+        return DailySalesRollup.objects.all()
+
+    # ==================== STOCK ====================
+
+    @cached_property
+    def _stock(self):
+        return registry.evaluate('stock', self.stock_base, self.params)
+
+    @property
+    def total_stock_value(self):
+        return self._stock['total_stock_value']
+
+    @property
+    def total_items(self):
+        return self._stock['total_items']
+
+    @cached_property
+    def _stock_alerts(self):
+        return low_stock_feed(self.stock_base, limit=self.STOCK_ALERT_LIMIT)
+
+    @property
+    def low_stock_count(self):
+        return self._stock_alerts['low_stock_count']
+
+    @property
+    def out_of_stock(self):
+        return self._stock_alerts['out_of_stock']
+
+    @cached_property
+    def total_purchase_return(self):
+        return registry.evaluate('purchase_returns', PurchaseReturn.objects.all(), self.params)['total_purchase_return']
+
+    @cached_property
+    def category_distribution(self):
+        return category_series(self.stock_base)
+
+    @property
+    def stock_alerts(self):
+        # Top-N most critical items only; the changelist link shows the rest
+        return self._stock_alerts['items']
+
+    # ==================== SALES ====================
+
+    @cached_property
+    def _sales(self):
+        return registry.evaluate('sales_rollup', self.rollup_base, self.params)
+
+    @property
+    def today_sales_total(self):
+        return self._sales['today_sales_total']
+
+    @property
+    def today_sales_count(self):
+        return self._sales['today_sales_count']
+
+    @cached_property
+    def unverified_sales(self):
+        # Not rolled up yet, read from the raw table via its index
+        today_start, today_end = local_day_bounds(self.today, self.today)
+        total = Sales.objects.filter(
+            is_verified=False,
+            sold_on__gte=today_start,
+            sold_on__lt=today_end
+        ).aggregate(total=Sum('total_amount'))['total']
+        return round(total or 0, 2)
+
+    @property
+    def week_sales_total(self):
+        return self._sales['week_sales_total']
+
+    @property
+    def week_sales_profit(self):
+        return self._sales['week_sales_profit']
+
+    @property
+    def month_sales_total(self):
+        return self._sales['month_sales_total']
+
+    @property
+    def month_sales_profit(self):
+        return self._sales['month_sales_profit']
+
+    @property
+    def month_sales_count(self):
+        return self._sales['month_sales_count']
+
+    @property
+    def total_revenue(self):
+        return self._sales['total_revenue']
+
+    @property
+    def total_profit(self):
+        return self._sales['total_profit']
+
+    @property
+    def avg_profit_margin(self):
+        # Average of per-sale margins
+        if not self._sales['margin_count']:
+            return 0
+        return round(self._sales['margin_total'] / self._sales['margin_count'], 2)
+
+    @cached_property
+    def top_products(self):
+        return list(self.rollup_base.filter(
+            date__gte=self.month_ago
+        ).values(
+            'stock__name',
+            'stock__category__name'
+        ).annotate(
+            total_sold=Sum('quantity_sold'),
+            revenue=Sum('total_amount')
+        ).order_by('-total_sold')[:5])
+
+    @cached_property
+    def recent_sales(self):
+        return Sales.objects.filter(is_verified=True).select_related('stock')[:10]
+
+    @cached_property
+    def daily_sales(self):
+        # Last 11 days
+        return [
+            {'date': point['label'], 'amount': point['amount']}
+            for point in sales_series('day', 11, self.today)
+        ]
+
+    @cached_property
+    def monthly_sales(self):
+        # Last 6 calendar months
+        return [
+            {'month': point['label'], 'amount': point['amount']}
+            for point in sales_series('month', 6, self.today)
+        ]
+
+    # ==================== PURCHASES ====================
+
+    @cached_property
+    def _purchases(self):
+        return registry.evaluate('purchases', Purchase.objects.all(), self.params, names=[
+            'pending_purchases', 'month_purchases_total', 'month_purchases_count',
+        ])
+
+    @property
+    def pending_purchases(self):
+        return self._purchases['pending_purchases']
+
+    @property
+    def month_purchases_total(self):
+        return self._purchases['month_purchases_total']
+
+    @property
+    def month_purchases_count(self):
+        return self._purchases['month_purchases_count']
+
+
+def dashboard_context(request):
+    """
+    {'dashboard': DashboardStats} for pages that opt in, e.g.
+    `extra_context.update(dashboard_context(request))` in a view or ModelAdmin.
+    """
+    if not request.user.is_authenticated:
+        return {}
+    return {'dashboard': DashboardStats(request.user)}
+
+
+class DashboardContextMixin:
+    """ModelAdmin mixin that exposes the lazy `dashboard` object on the changelist page."""
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {**dashboard_context(request), **(extra_context or {})}
+        return super().changelist_view(request, extra_context)
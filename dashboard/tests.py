@@ -1,3 +1,136 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from accounts.models import CustomUser
+from inventory.models import Category, Stock
+from inventory.posting import post_sales_verification
+from sales.models import Sales
+from .live import EVENT_KEY, LISTENING_KEY, notify_sales_changed
+from .cache import get_data_version, mark_dashboard_stale
+from .models import DataVersion
+from .stats import DashboardStats
 
-# Create your tests here.
+
+class DataVersionTests(TestCase):
+    def test_bump_is_shared_through_the_database(self):
+        version = get_data_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_dashboard_stale()
+        self.assertEqual(get_data_version(), version + 1)
+        # What another process reads
+        self.assertEqual(DataVersion.objects.get(pk=1).value, version + 1)
+
+    def test_one_bump_per_transaction(self):
+        user = CustomUser.objects.create(username='owner', email='owner@example.com')
+        category = Category.objects.create(name='Shoes')
+        stocks = Stock.objects.bulk_create([Stock(user=user, category=category, name=f'Item {i}') for i in range(3)])
+        version = get_data_version()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
+                        mark_dashboard_stale()
+                        raise ValueError  # rolled back with its callback
+                except ValueError:
+                    pass
+                for stock in stocks:
+                    stock.save()
+                stocks[0].delete()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(get_data_version(), version + 1)
+
+    def test_no_bump_before_commit(self):
+        version = get_data_version()
+        with self.captureOnCommitCallbacks(execute=False):
+            mark_dashboard_stale()
+        self.assertEqual(get_data_version(), version)
+
+
+@override_settings(DASHBOARD_LIVE={'POLL_SECONDS': 0, 'MAX_STREAM_SECONDS': 5}, JOBS={'IN_PROCESS': False})
+class LiveStreamTests(TestCase):
+    def setUp(self):
+        cache.delete_many([EVENT_KEY, LISTENING_KEY])
+        self.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(self.user)
+
+    def test_delta_published_elsewhere_reaches_the_stream(self):
+        events = iter(self.client.get(reverse('admin:dashboard_live')).streaming_content)
+        self.assertEqual(next(events), b'retry: 5000\n\n')
+        cache.set(LISTENING_KEY, True)  # what the stream's poll loop keeps setting
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_sales_changed('verified')  # as the job worker process would
+        self.assertTrue(next(events).startswith(b'event: sales\n'))
+
+    def test_nothing_is_built_without_listeners(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_sales_changed('verified')
+        self.assertIsNone(cache.get(EVENT_KEY))
+
+
+@override_settings(JOBS={'IN_PROCESS': False})
+class ChartEndpointTests(TransactionTestCase):
+    """Real commits, so every verification bumps the data version."""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(self.user)
+        self.stock = Stock.objects.create(
+            user=self.user, category=Category.objects.create(name='Shoes'), name='Sneaker', cost_price=100, quantity=50,
+        )
+        self.url = f"{reverse('admin:dashboard_charts')}?series=sales&granularity=day&periods=3"
+
+    def sell(self):
+        sale = Sales.objects.create(stock=self.stock, quantity_sold=1, selling_price=150)
+        post_sales_verification(Sales.objects.filter(pk=sale.pk))
+
+    def test_unchanged_data_is_a_304(self):
+        self.sell()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['points'][-1]['amount'], 150.0)
+        self.assertIn('no-cache', response['Cache-Control'])
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([query for query in queries.captured_queries if 'dailysalesrollup' in query['sql']])
+
+        self.sell()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['points'][-1]['amount'], 300.0)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_invalid_params(self):
+        for query in ('series=stocks', 'granularity=year', 'periods=many'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f"{reverse('admin:dashboard_charts')}?{query}").status_code, 400)
+
+
+@override_settings(JOBS={'IN_PROCESS': False})
+class LazyDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()  # no snapshot left over from another test
+        self.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        category = Category.objects.create(name='Shoes')
+        Stock.objects.bulk_create([
+            Stock(user=self.user, category=category, name=f'Item {i}', cost_price=100, quantity=i) for i in range(3)
+        ])
+
+    def test_metrics_run_when_read(self):
+        with self.assertNumQueries(0):
+            stats = DashboardStats(self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual((stats.total_items, stats.total_stock_value), (3, 300))
+        with self.assertNumQueries(1):  # alerts and both counts share one query
+            self.assertEqual((stats.low_stock_count, stats.out_of_stock, len(stats.stock_alerts)), (3, 1, 3))
+
+    def test_only_the_index_gets_the_dashboard(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('admin:index')).context['dashboard']['total_items'], 3)
+        for url in (reverse('admin:inventory_stock_changelist'), reverse('admin:sales_sales_add')):
+            with self.subTest(url=url):
+                self.assertNotIn('dashboard', self.client.get(url).context)
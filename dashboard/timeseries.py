@@ -0,0 +1,98 @@
+from datetime import datetime, time, timedelta
+from django.db.models import DateField, DateTimeField, Sum, Count
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from purchases.models import Purchase
+
+GRANULARITIES = ('day', 'week', 'month', 'year')
+
+
+def bucket_start(day, granularity):
+    """Calendar bucket containing `day` (weeks start on Monday, like TruncWeek)."""
+    if granularity == 'day':
+        return day
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+
+def next_bucket(start, granularity):
+    if granularity == 'day':
+        return start + timedelta(days=1)
+    if granularity == 'week':
+        return start + timedelta(weeks=1)
+    if granularity == 'month':
+        return (start + timedelta(days=32)).replace(day=1)
+    return start.replace(year=start.year + 1)
+
+
+def bucket_range(start, end, granularity):
+    """Start date of every bucket from the one holding `start` to the one holding `end`."""
+    buckets = []
+    current = bucket_start(start, granularity)
+    while current <= end:
+        buckets.append(current)
+        current = next_bucket(current, granularity)
+    return buckets
+
+
+def last_buckets(granularity, periods, today=None):
+    """(start, end) covering the last `periods` calendar buckets up to today."""
+    today = today or timezone.localdate()
+    start = bucket_start(today, granularity)
+    for i in range(periods - 1):
+        start = bucket_start(start - timedelta(days=1), granularity)
+    return start, today
+
+
+def build_series(queryset, date_field, granularity, start, end, **aggregates):
+    """
+    Aggregate `queryset` into calendar buckets between `start` and `end` (dates,
+    inclusive) with a single GROUP BY query, then zero-fill the empty buckets.
+
+    DateTimeFields are truncated in the current timezone (Asia/Kolkata) and
+    filtered with an index-friendly datetime range.
+
+        build_series(Sales.objects.all(), 'sold_on', 'month', start, end,
+                     total=Sum('total_amount'), count=Count('id'))
+        -> [{'bucket': date(2025, 1, 1), 'total': 1200.0, 'count': 4}, ...]
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity '{granularity}'")
+
+    field = queryset.model._meta.get_field(date_field)
+    if isinstance(field, DateTimeField):
+        tz = timezone.get_current_timezone()
+        lower = timezone.make_aware(datetime.combine(start, time.min), tz)
+        upper = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)
+        trunc = Trunc(date_field, granularity, output_field=DateField(), tzinfo=tz)
+        queryset = queryset.filter(**{f'{date_field}__gte': lower, f'{date_field}__lt': upper})
+    else:
+        trunc = Trunc(date_field, granularity, output_field=DateField())
+        queryset = queryset.filter(**{f'{date_field}__gte': start, f'{date_field}__lte': end})
+
+    rows = queryset.order_by().annotate(bucket=trunc).values('bucket').annotate(**aggregates)
+    per_bucket = {row['bucket']: row for row in rows}
+
+    series = []
+    for bucket in bucket_range(start, end, granularity):
+        row = per_bucket.get(bucket, {})
+        point = {'bucket': bucket}
+        for name in aggregates:
+            point[name] = row.get(name) or 0
+        series.append(point)
+    return series
+
+
+def purchase_time_series(granularity, start, end, queryset=None):
+    """Purchases per bucket by purchase_date."""
+    if queryset is None:
+        queryset = Purchase.objects.all()
+    return build_series(
+        queryset, 'purchase_date', granularity, start, end,
+        total=Sum('total_cost'),
+        quantity=Sum('quantity_purchased'),
+        count=Count('id'),
+    )
@@ -3,7 +3,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
 from django.db.models import Sum, F, Q, Count
-from django.core.paginator import Paginator
+from erp.pagination import KeysetPaginator
 import datetime
 from .models import *
 from expenses.models import Expense
@@ -72,9 +72,9 @@ def inventory(request):
     elif stock_level == 'out_of_stock':
         stock_list = stock_list.filter(quantity=0)
     
-    paginator = Paginator(stock_list, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination: every page costs the same however far back it is
+    paginator = KeysetPaginator(stock_list, 20)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     categories = Category.objects.all()
     
@@ -161,10 +161,9 @@ def purchases(request):
     if category_filter:
         purchase_list = purchase_list.filter(stock_item__category__id=category_filter)
     
-    # Pagination
-    paginator = Paginator(purchase_list, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination: every page costs the same however far back it is
+    paginator = KeysetPaginator(purchase_list, 20)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     # Get all categories and stock items for forms
     categories = Category.objects.all()
@@ -275,10 +274,9 @@ def sales(request):
     if category_filter:
         sales_list = sales_list.filter(stock__category__id=category_filter)
     
-    # Pagination
-    paginator = Paginator(sales_list, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination: every page costs the same however far back it is
+    paginator = KeysetPaginator(sales_list, 20)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     # Get all categories and stock items for forms
     categories = Category.objects.all()
@@ -357,9 +355,9 @@ def expenses(request):
     if expense_type_filter:
         expense_list = expense_list.filter(expense_type=expense_type_filter)
     
-    paginator = Paginator(expense_list, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination: every page costs the same however far back it is
+    paginator = KeysetPaginator(expense_list, 20)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     total_expenses = expense_list.aggregate(total=Sum('amount'))['total'] or 0
     
@@ -0,0 +1,35 @@
+from django.contrib import admin
+from django.urls import path
+from dashboard.cache import get_dashboard_snapshot
+from dashboard.debug import metrics_debug
+from dashboard.api import chart_data
+from dashboard.live import sales_stream
+from jobs.views import job_status, job_download
+from sales.api import post_sales
+
+
+class ERPAdminSite(admin.AdminSite):
+    """Default admin site; adds the cached `dashboard` snapshot to the index page only."""
+
+    def index(self, request, extra_context=None):
+        extra_context = dict(extra_context or {})
+        if request.user.is_authenticated:
+            extra_context.setdefault('dashboard', get_dashboard_snapshot(request.user))
+        return super().index(request, extra_context)
+
+    def metrics_debug_view(self, request):
+        return metrics_debug(request, self)
+
+    def job_status_view(self, request, job_id):
+        return job_status(request, self, job_id)
+
+    def get_urls(self):
+        urls = [
+            path('dashboard/metrics/', self.admin_view(self.metrics_debug_view), name='dashboard_metrics'),
+            path('dashboard/charts/', self.admin_view(chart_data, cacheable=True), name='dashboard_charts'),
+            path('dashboard/live/', self.admin_view(sales_stream), name='dashboard_live'),
+            path('pos/sales/', self.admin_view(post_sales), name='pos_sales'),
+            path('jobs/<int:job_id>/status/', self.admin_view(self.job_status_view), name='job_status'),
+            path('jobs/<int:job_id>/download/', self.admin_view(job_download), name='job_download'),
+        ]
+        return urls + super().get_urls()
@@ -0,0 +1,5 @@
+from django.contrib.admin.apps import AdminConfig
+
+
+class ERPAdminConfig(AdminConfig):
+    default_site = 'erp.admin.ERPAdminSite'
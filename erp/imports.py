@@ -0,0 +1,124 @@
+import csv
+from datetime import datetime, date, time
+from pathlib import Path
+from django.utils import timezone
+from openpyxl import load_workbook
+
+DATE_FORMATS = (
+    '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d',
+    '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y',
+    '%d-%m-%Y %H:%M:%S', '%d-%m-%Y %H:%M', '%d-%m-%Y',
+)
+
+
+class RowError(ValueError):
+    pass
+
+
+def _header(value):
+    return str(value or '').strip().lower().replace(' ', '_')
+
+
+def read_rows(path, sheet=None):
+    """
+    Stream a CSV or XLSX file as (line number, {header: value}) pairs.
+    Headers are lower-cased with spaces turned into underscores. XLSX files are
+    opened read-only, so neither format is ever loaded into memory as a whole.
+    """
+    path = Path(path)
+    if path.suffix.lower() in ('.xlsx', '.xlsm'):
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            worksheet = workbook[sheet] if sheet else workbook.active
+            rows = worksheet.iter_rows(values_only=True)
+            headers = [_header(value) for value in next(rows, ())]
+            for line, values in enumerate(rows, start=2):
+                if values is None or all(value in (None, '') for value in values):
+                    continue
+                yield line, dict(zip(headers, values))
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            headers = [_header(value) for value in next(reader, [])]
+            for line, values in enumerate(reader, start=2):
+                if not any(value.strip() for value in values):
+                    continue
+                yield line, dict(zip(headers, values))
+
+
+def pick(row, names, required=True):
+    """First non-empty value among the accepted column names."""
+    for name in names:
+        value = row.get(name)
+        if value not in (None, ''):
+            return value.strip() if isinstance(value, str) else value
+    if required:
+        raise RowError(f"Missing '{names[0]}'")
+    return None
+
+
+def to_int(value, name):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise RowError(f"Invalid {name}: {value!r}")
+    if not number.is_integer():
+        raise RowError(f"Invalid {name}: {value!r}")
+    return int(number)
+
+
+def to_float(value, name):
+    try:
+        return float(str(value).replace(',', ''))
+    except (TypeError, ValueError):
+        raise RowError(f"Invalid {name}: {value!r}")
+
+
+def to_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y', 'verified', 'received')
+
+
+def to_datetime(value, name='date'):
+    """Aware datetime (local timezone for naive values) from an Excel cell or a string."""
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, date):
+        parsed = datetime.combine(value, time.min)
+    else:
+        for date_format in DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(str(value).strip(), date_format)
+                break
+            except ValueError:
+                continue
+        else:
+            raise RowError(f"Invalid {name}: {value!r}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class ErrorReport:
+    """CSV of the rows that could not be imported (line, error, original values)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def add(self, line, error, row):
+        if self._writer is None:
+            self._file = open(self.path, 'w', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(['line', 'error', *row.keys()])
+        self._writer.writerow([line, error, *row.values()])
+        self.count += 1
+
+    def close(self):
+        if self._file:
+            self._file.close()
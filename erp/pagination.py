@@ -0,0 +1,242 @@
+import hashlib
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.paginator import Paginator, Page, EmptyPage, InvalidPage
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+DEFAULTS = {
+    'THRESHOLD': 10000,      # exact counts up to this many rows
+    'CACHE_SECONDS': 300,    # how long a large count is reused
+}
+
+
+def count_settings():
+    return {**DEFAULTS, **getattr(settings, 'ADMIN_COUNTS', {})}
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Paginator for large changelists.
+
+    Up to THRESHOLD rows the count is exact, and the check costs one bounded
+    COUNT over at most THRESHOLD + 1 rows. Bigger results are counted once and
+    the count is cached for CACHE_SECONDS per query, so it can fall a little
+    behind. Pages are sliced without checking them against the count, so pages
+    past a stale total still open.
+    """
+
+    # True when the count came from the cache and may be a little behind
+    approximate = False
+
+    def _cache_key(self):
+        sql, params = self.object_list.order_by().query.sql_with_params()
+        digest = hashlib.sha256(f'{self.object_list.db}:{sql}:{params!r}'.encode()).hexdigest()
+        return f'admin-count:{digest}'
+
+    @cached_property
+    def count(self):
+        threshold = count_settings()['THRESHOLD']
+        key = self._cache_key()
+        total = cache.get(key)
+        if total is not None:
+            self.approximate = True
+            return total
+
+        # COUNT(*) FROM (... LIMIT threshold + 1): never scans more than that
+        total = self.object_list.order_by().values('pk')[:threshold + 1].count()
+        if total > threshold:
+            total = self.object_list.count()
+            cache.set(key, total, count_settings()['CACHE_SECONDS'])
+        return total
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if not self.approximate:
+                raise
+            # The cached total may be behind, the page itself decides
+            return int(number)
+
+    def page(self, number):
+        number = self.validate_number(number)  # loads the count first
+        if not self.approximate:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        object_list = self.object_list[bottom:bottom + self.per_page]
+        if number > 1 and not object_list:
+            raise EmptyPage("That page contains no results")
+        return Page(object_list, number, self)
+
+
+class ApproximateCountMixin:
+    """
+    ModelAdmin mixin for big tables: approximate result count above the
+    threshold and no second COUNT(*) of the whole table.
+    """
+
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+
+
+# ==================== KEYSET PAGINATION ====================
+
+class KeysetPage:
+    """One page of a KeysetPaginator; iterate it like a Page, link with the tokens."""
+
+    def __init__(self, object_list, paginator, next_token=None, previous_token=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_token = next_token
+        self.previous_token = previous_token
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self)} rows>'
+
+    def has_next(self):
+        return self.next_token is not None
+
+    def has_previous(self):
+        return self.previous_token is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination that seeks on the ordering columns plus the primary key:
+    `WHERE (sold_on, id) < (last seen) ORDER BY ... LIMIT n`, so every page costs
+    the same however deep it is (OFFSET pages read and skip all earlier rows).
+
+    Pages are addressed by opaque, signed next/previous tokens instead of numbers:
+
+        paginator = KeysetPaginator(Sales.objects.order_by('-sold_on'), 20)
+        page = paginator.get_page(request.GET.get('cursor'))
+        page.next_token, page.previous_token  # None on the last / first page
+
+    The ordering comes from the queryset (or `ordering`); the ordering columns
+    must not be NULL.
+    """
+
+    salt = 'erp.pagination.keyset'
+
+    def __init__(self, object_list, per_page, ordering=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        ordering = list(ordering or object_list.query.order_by or object_list.model._meta.ordering)
+        # The primary key breaks ties, in the direction of the last column
+        pk_names = ('pk', object_list.model._meta.pk.name)
+        if not any(name.lstrip('-') in pk_names for name in ordering):
+            ordering.append('-pk' if ordering and ordering[-1].startswith('-') else 'pk')
+        self.ordering = ordering
+        self.columns = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+    # ----- tokens -----
+
+    def _token(self, row, direction):
+        values = [self._value(row, i) for i in range(len(self.columns))]
+        return signing.dumps(
+            {'o': self.ordering, 'd': direction, 'v': values},
+            salt=self.salt, compress=True, serializer=KeysetSerializer,
+        )
+
+    def _read_token(self, token):
+        try:
+            data = signing.loads(token, salt=self.salt, serializer=KeysetSerializer)
+        except signing.BadSignature:
+            raise InvalidPage("Invalid page token")
+        if data.get('o') != self.ordering or data.get('d') not in ('next', 'prev') \
+                or len(data.get('v', ())) != len(self.columns):
+            raise InvalidPage("Invalid page token")
+        return data['d'], data['v']
+
+    @staticmethod
+    def _value(row, i):
+        key = f'keyset_{i}'
+        return row[key] if isinstance(row, dict) else getattr(row, key)
+
+    # ----- queries -----
+
+    def _after(self, values, reverse):
+        """Rows strictly after `values` in the (optionally reversed) ordering."""
+        condition = Q()
+        for i, (name, descending) in enumerate(self.columns):
+            lookup = 'lt' if descending != reverse else 'gt'
+            seek = Q(**{f'{name}__{lookup}': values[i]})
+            for j, (earlier, _) in enumerate(self.columns[:i]):
+                seek &= Q(**{earlier: values[j]})
+            condition |= seek
+        # Redundant bound on the first column, so the database can seek its index
+        name, descending = self.columns[0]
+        return Q(**{f"{name}__{'lte' if descending != reverse else 'gte'}": values[0]}) & condition
+
+    def _ordered(self, reverse=False):
+        annotated = self.object_list.annotate(
+            **{f'keyset_{i}': F(name) for i, (name, _) in enumerate(self.columns)}
+        )
+        return annotated.order_by(*(
+            f'-{name}' if descending != reverse else name for name, descending in self.columns
+        ))
+
+    def page(self, token=None):
+        """The page a token points at (the first page without one); bad tokens raise InvalidPage."""
+        if not token:
+            rows = list(self._ordered()[:self.per_page + 1])
+            has_more, rows = len(rows) > self.per_page, rows[:self.per_page]
+            return self._build(rows, has_next=has_more, has_previous=False)
+
+        direction, values = self._read_token(token)
+        reverse = direction == 'prev'
+        rows = list(self._ordered(reverse).filter(self._after(values, reverse))[:self.per_page + 1])
+        has_more, rows = len(rows) > self.per_page, rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+            return self._build(rows, has_next=True, has_previous=has_more)
+        return self._build(rows, has_next=has_more, has_previous=True)
+
+    def get_page(self, token=None):
+        """Like page(), but falls back to the first page on a bad or tampered token."""
+        try:
+            return self.page(token)
+        except InvalidPage:
+            return self.page()
+
+    def _build(self, rows, has_next, has_previous):
+        return KeysetPage(
+            rows, self,
+            next_token=self._token(rows[-1], 'next') if has_next and rows else None,
+            previous_token=self._token(rows[0], 'prev') if has_previous and rows else None,
+        )
+
+
+class KeysetSerializer:
+    """
+    JSON for tokens. Datetimes keep their microseconds (DjangoJSONEncoder drops
+    them), otherwise the seek could skip or repeat rows sold in the same second.
+    """
+
+    @staticmethod
+    def _default(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        raise TypeError(f"Can't put {type(value).__name__} in a page token")
+
+    def dumps(self, obj):
+        return json.dumps(obj, default=self._default, separators=(',', ':')).encode('latin-1')
+
+    def loads(self, data):
+        return json.loads(data.decode('latin-1'))
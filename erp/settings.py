@@ -21,7 +21,7 @@ ALLOWED_HOSTS = ['*']
 
 INSTALLED_APPS = [
     'paper_admin',
-    'django.contrib.admin',
+    'erp.apps.ERPAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
     'dashboard',
     'purchase_returns',
     'utility',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -60,7 +61,6 @@ TEMPLATES = [
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
-                'dashboard.context_processors.dashboard_stats',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
@@ -131,6 +131,72 @@ MEDIA_ROOT = '/var/www/mrtt/static/media/'
 
 
 
+# Shared by every web worker and the `run_jobs` worker: dashboard snapshots and
+# their recompute locks, cached changelist counts. The dashboard change counter
+# itself lives in the database (dashboard.DataVersion). On more than one host use
+# a networked backend instead, e.g. django.core.cache.backends.redis.RedisCache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'django_cache',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+
+# Dashboard snapshot cache (see dashboard/cache.py)
+DASHBOARD_CACHE = {
+    'TIMEOUT': 300,
+    'STALE_WHILE_REVALIDATE': True,
+}
+
+# Live sales ticker on the admin index (see dashboard/live.py). Deltas travel
+# through the shared cache, so changes made by the `run_jobs` worker show up too.
+# Every open stream holds one server worker (thread) until it ends after
+# MAX_STREAM_SECONDS, so size the worker pool for the dashboards kept open.
+DASHBOARD_LIVE = {
+    'POLL_SECONDS': 2,
+    'MAX_STREAM_SECONDS': 300,
+}
+
+# Generated sales report PDFs (see sales/report_cache.py)
+SALES_REPORT_CACHE = {
+    'DIR': BASE_DIR / 'report_cache',
+    'MAX_BYTES': 200 * 1024 * 1024,
+    'MAX_FILES': 500,
+}
+
+# Verified sales older than AFTER_DAYS move to the archive table
+# with `manage.py archive_sales` (run it from cron); totals stay in the daily rollups.
+SALES_ARCHIVE = {
+    'AFTER_DAYS': 365,
+    'BATCH_SIZE': 5000,
+}
+
+# Big admin changelists (see erp/pagination.py): exact row counts up to THRESHOLD,
+# above it the count is cached for CACHE_SECONDS instead of re-counted on every page.
+ADMIN_COUNTS = {
+    'THRESHOLD': 10000,
+    'CACHE_SECONDS': 300,
+}
+
+# How stock going out is costed: 'average' (weighted-average Stock.cost_price) or
+# 'fifo' (oldest purchase cost layers first, exact cost per sale). Run
+# `manage.py open_cost_layers` once when switching to 'fifo'.
+INVENTORY_VALUATION = 'average'
+
+# Background jobs for heavy admin actions (see jobs/runner.py).
+# With IN_PROCESS the web process runs the worker, started by its first request,
+# and re-queues jobs a restart left behind. Set it to False when a separate
+# `manage.py run_jobs` worker is running (required with several web processes).
+JOBS = {
+    'IN_PROCESS': True,
+    'WORKERS': 2,
+    'RESULT_DIR': BASE_DIR / 'job_results',
+    'KEEP_RESULTS_DAYS': 7,
+}
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,20 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    assertQueryBudget for TestCases of admin pages. Measure a page, add rows,
+    measure again: the same budget must hold, so no query runs per row.
+    """
+
+    def assertQueryBudget(self, url, budget):
+        self.client.get(url)  # warm the per-process caches (content types, ...)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(
+            len(queries), budget,
+            f"{url} ran {len(queries)} queries (budget {budget}):\n"
+            + "\n".join(query['sql'] for query in queries.captured_queries),
+        )
@@ -1,6 +1,48 @@
+from django import forms
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Category, Stock
+from erp.exports import ExportMixin, export_as_csv, export_as_xlsx
+from erp.pagination import ApproximateCountMixin
+from .models import Category, Stock, StockMovement, LOW_STOCK_THRESHOLD
+from .posting import post_stock_adjustment
+
+
+class StockLevelFilter(admin.SimpleListFilter):
+    title = "Stock level"
+    parameter_name = 'stock_level'
+
+    def lookups(self, request, model_admin):
+        return (
+            ('low', f"Low (below {LOW_STOCK_THRESHOLD})"),
+            ('out', "Out of stock"),
+        )
+
+    def queryset(self, request, queryset):
+        if self.value() == 'low':
+            return queryset.filter(quantity__lt=LOW_STOCK_THRESHOLD)
+        if self.value() == 'out':
+            return queryset.filter(quantity=0)
+        return queryset
+
+
+class StockListFilter(admin.RelatedFieldListFilter):
+    """Stock filter choices loaded with their category (Stock.__str__ shows it) in one query."""
+
+    def field_choices(self, field, request, model_admin):
+        stocks = Stock.objects.select_related('category')
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        if ordering:
+            stocks = stocks.order_by(*ordering)
+        return [(stock.pk, str(stock)) for stock in stocks]
+
+
+class StockChoicesMixin:
+    """ModelAdmin mixin: Stock select boxes load each stock's category in the same query."""
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.related_model is Stock and 'queryset' not in kwargs:
+            kwargs['queryset'] = Stock.objects.select_related('category')
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
 @admin.register(Category)
@@ -18,13 +60,24 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Stock)
-class StockAdmin(admin.ModelAdmin):
+class StockAdmin(ApproximateCountMixin, ExportMixin, admin.ModelAdmin):
     list_display = ('name', 'quantity', 'selling_price', 'category_name', 'cost_price', 'user', 'last_updated')
-    list_filter = ('category__name', 'user', 'last_updated', 'last_updated')
+    list_filter = (StockLevelFilter, 'category__name', 'user', 'last_updated')
+    list_select_related = ('category', 'user')
     search_fields = ('category__name','name')
     readonly_fields = ('cost_price', 'selling_price', 'quantity', 'user','last_updated',)
     date_hierarchy = 'last_updated'
     ordering = ('-last_updated',)
+    actions = [export_as_csv, export_as_xlsx]
+    export_fields = (
+        ('Name', 'name'),
+        ('Category', 'category__name'),
+        ('Quantity', 'quantity'),
+        ('Cost Price', 'cost_price'),
+        ('Minimum Selling Price', 'selling_price'),
+        ('Owner', 'user__username'),
+        ('Last Updated', 'last_updated'),
+    )
 
     fieldsets = (
         ("Stock Details", {
@@ -44,6 +97,51 @@ class StockAdmin(admin.ModelAdmin):
 
 
 
+class StockAdjustmentForm(forms.ModelForm):
+    class Meta:
+        model = StockMovement
+        fields = ('stock', 'quantity', 'note')
+        help_texts = {'quantity': "Added to the stock; use a negative number to remove stock."}
+
+    def clean(self):
+        cleaned_data = super().clean()
+        stock, quantity = cleaned_data.get('stock'), cleaned_data.get('quantity')
+        if quantity == 0:
+            raise forms.ValidationError("An adjustment must change the quantity.")
+        if stock and quantity and stock.quantity + quantity < 0:
+            raise forms.ValidationError(
+                f"Insufficient stock for {stock.name}. Available: {stock.quantity}, Adjustment: {quantity}"
+            )
+        return cleaned_data
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(ApproximateCountMixin, StockChoicesMixin, admin.ModelAdmin):
+    """The stock ledger is read-only; adding a row posts a stock adjustment."""
+    form = StockAdjustmentForm
+    list_display = ('stock', 'kind', 'quantity', 'cost_price', 'reference_id', 'user', 'occurred_at')
+    list_filter = ('kind', 'occurred_at', ('stock', StockListFilter))
+    list_select_related = ('stock__category', 'user')
+    search_fields = ('stock__name', 'note')
+    date_hierarchy = 'occurred_at'
+
+    def get_fields(self, request, obj=None):
+        if obj is None:
+            return ('stock', 'quantity', 'note')
+        return ('stock', 'kind', 'quantity', 'cost_price', 'reference_id', 'note', 'user', 'occurred_at')
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def save_model(self, request, obj, form, change):
+        # Posted like every other stock change: Stock row locked, quantity and ledger in one transaction
+        movement = post_stock_adjustment(obj.stock_id, obj.quantity, obj.note, user=request.user)
+        obj.pk = movement.pk
+
+
 # Optional: Customize Admin Site Branding
 admin.site.site_header = "ERP"
 admin.site.site_title = "ERP Dashboard"
@@ -0,0 +1,29 @@
+from django.db.models import Count, Q, Window
+from .models import Stock, LOW_STOCK_THRESHOLD
+
+
+def low_stock_feed(queryset=None, limit=10):
+    """
+    The `limit` most critical low-stock items plus exact low / out-of-stock counts,
+    in one query served by the partial quantity indexes on Stock.
+
+    The counts are window aggregates over the whole low-stock set, so they are
+    exact even though only `limit` rows come back.
+    """
+    if queryset is None:
+        queryset = Stock.objects.all()
+
+    rows = list(
+        queryset.filter(quantity__lt=LOW_STOCK_THRESHOLD)
+        .select_related('category')
+        .annotate(
+            low_total=Window(Count('id')),
+            out_total=Window(Count('id', filter=Q(quantity=0))),
+        )
+        .order_by('quantity', 'name')[:limit]
+    )
+    return {
+        'items': rows,
+        'low_stock_count': rows[0].low_total if rows else 0,
+        'out_of_stock': rows[0].out_total if rows else 0,
+    }
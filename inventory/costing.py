@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.db.models import Case, F, IntegerField, Sum, Value, When, Window
+from .ledger import BEGINNING
+from .models import CostLayer
+
+# Ids per UPDATE statement when writing back consumed layers
+BATCH_SIZE = 500
+
+
+def fifo_enabled():
+    """True when stock is valued FIFO by cost layers instead of one weighted average."""
+    return getattr(settings, 'INVENTORY_VALUATION', 'average') == 'fifo'
+
+
+def add_layers(layers):
+    """Open cost layers: [(stock_id, quantity, unit_cost, received_at, reference_id)]."""
+    return CostLayer.objects.bulk_create([
+        CostLayer(stock_id=stock_id, quantity=quantity, remaining=quantity, unit_cost=unit_cost,
+                  received_at=received_at, reference_id=reference_id)
+        for stock_id, quantity, unit_cost, received_at, reference_id in layers if quantity > 0
+    ], batch_size=BATCH_SIZE)
+
+
+def consume_layers(demands, fallback_costs):
+    """
+    Take `demands` [(key, stock_id, quantity)] out of the oldest open layers, in
+    the given order, and return the FIFO cost of each: {key: cost}.
+
+    The caller must hold the Stock row locks. Costs two statements whatever the
+    batch size: one read of just the open layers the batch reaches into (a window
+    sum over the partial index, no consumed history), and one bulk update.
+    Quantity no layer covers (stock from before FIFO was switched on) is costed
+    at `fallback_costs[stock_id]`.
+    """
+    needed = {}
+    for _, stock_id, quantity in demands:
+        needed[stock_id] = needed.get(stock_id, 0) + quantity
+    if not needed:
+        return {}
+
+    # Remaining quantity in the earlier open layers of the same stock
+    before = Window(
+        Sum('remaining'), partition_by=[F('stock_id')], order_by=[F('received_at').asc(), F('id').asc()],
+    ) - F('remaining')
+    need = Case(
+        *[When(stock_id=stock_id, then=Value(quantity)) for stock_id, quantity in needed.items()],
+        output_field=IntegerField(),
+    )
+    layers = CostLayer.objects.filter(stock_id__in=needed, remaining__gt=0).annotate(
+        before=before, need=need,
+    ).filter(before__lt=F('need')).order_by('stock_id', 'received_at', 'id').only(
+        'id', 'stock_id', 'remaining', 'unit_cost',
+    )
+
+    queues = {}
+    for layer in layers:
+        queues.setdefault(layer.stock_id, []).append(layer)
+
+    costs, touched = {}, {}
+    for key, stock_id, quantity in demands:
+        queue = queues.get(stock_id, [])
+        cost = 0
+        while quantity and queue:
+            layer = queue[0]
+            taken = min(quantity, layer.remaining)
+            cost += taken * layer.unit_cost
+            layer.remaining -= taken
+            quantity -= taken
+            touched[layer.id] = layer
+            if not layer.remaining:
+                queue.pop(0)
+        cost += quantity * fallback_costs[stock_id]
+        costs[key] = cost
+
+    CostLayer.objects.bulk_update(list(touched.values()), ['remaining'], batch_size=BATCH_SIZE)
+    return costs
+
+
+def open_layers_for_current_stock():
+    """
+    Opening layers so every stock's on-hand quantity is covered when FIFO is
+    switched on: the uncovered quantity at the current average cost, older than
+    any received layer. Returns the number of layers opened.
+    """
+    from .models import Stock
+    covered = dict(
+        CostLayer.objects.filter(remaining__gt=0).order_by().values('stock_id').annotate(
+            total=Sum('remaining'),
+        ).values_list('stock_id', 'total')
+    )
+    return len(add_layers([
+        (stock_id, quantity - covered.get(stock_id, 0), cost_price, BEGINNING, None)
+        for stock_id, quantity, cost_price in Stock.objects.values_list('id', 'quantity', 'cost_price')
+        if quantity > covered.get(stock_id, 0)
+    ]))
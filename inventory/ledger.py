@@ -0,0 +1,101 @@
+from datetime import datetime, timezone as dt_timezone
+from django.db.models import Count, DateTimeField, IntegerField, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import Stock, StockMovement, StockCheckpoint
+
+# Lower bound for stocks that have no checkpoint yet (their whole ledger is the tail)
+BEGINNING = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def record_movements(movements):
+    """
+    Append StockMovement rows (one INSERT per 500). Call inside the transaction
+    that changes Stock.quantity, so the ledger and the quantity never disagree.
+    """
+    if not movements:
+        return []
+    return StockMovement.objects.bulk_create(movements, batch_size=500)
+
+
+def balances(when=None, stocks=None):
+    """
+    On-hand quantity, cost price and value per stock as of `when` (default: now),
+    in one query: the latest checkpoint at or before `when` plus the sum of the
+    movements after it. Only the tail since the checkpoint is read, never the
+    whole history.
+
+    Returns {stock_id: {'quantity', 'cost_price', 'value', 'tail'}}, where `tail`
+    is the number of movements read after the checkpoint.
+    """
+    when = when or timezone.now()
+    stocks = Stock.objects.all() if stocks is None else stocks
+
+    checkpoint = StockCheckpoint.objects.filter(stock=OuterRef('pk'), as_of__lte=when).order_by('-as_of')
+    # Same checkpoint, correlated to the movement's stock inside the tail subqueries
+    tail_start = StockCheckpoint.objects.filter(stock=OuterRef('stock_id'), as_of__lte=when).order_by('-as_of')
+    tail = StockMovement.objects.filter(
+        stock=OuterRef('pk'),
+        occurred_at__lte=when,
+        occurred_at__gt=Coalesce(
+            Subquery(tail_start.values('as_of')[:1]), Value(BEGINNING, output_field=DateTimeField()),
+        ),
+    )
+    rows = stocks.order_by().annotate(
+        checkpoint_quantity=Subquery(checkpoint.values('quantity')[:1]),
+        checkpoint_cost=Subquery(checkpoint.values('cost_price')[:1]),
+        tail_quantity=Subquery(
+            tail.order_by().values('stock').annotate(total=Sum('quantity')).values('total'),
+            output_field=IntegerField(),
+        ),
+        tail_count=Subquery(
+            tail.order_by().values('stock').annotate(n=Count('id')).values('n'),
+            output_field=IntegerField(),
+        ),
+        tail_cost=Subquery(tail.order_by('-occurred_at', '-id').values('cost_price')[:1], output_field=FloatField()),
+    ).values_list('id', 'checkpoint_quantity', 'checkpoint_cost', 'tail_quantity', 'tail_count', 'tail_cost')
+
+    result = {}
+    for stock_id, cp_quantity, cp_cost, tail_quantity, tail_count, tail_cost in rows:
+        quantity = (cp_quantity or 0) + (tail_quantity or 0)
+        cost_price = tail_cost if tail_cost is not None else (cp_cost or 0)
+        result[stock_id] = {
+            'quantity': quantity,
+            'cost_price': cost_price,
+            'value': round(quantity * cost_price, 2),
+            'tail': tail_count or 0,
+        }
+    return result
+
+
+def on_hand(stock_id, when=None):
+    """Quantity, cost price and value of one stock as of `when`."""
+    return balances(when, Stock.objects.filter(pk=stock_id))[stock_id]
+
+
+def write_checkpoints(as_of=None, batch_size=500):
+    """
+    Checkpoint every stock that moved since its last checkpoint, as of `as_of`
+    (default: now). Running it twice for the same moment writes nothing new.
+    Returns the number of checkpoints written.
+    """
+    as_of = as_of or timezone.now()
+    if as_of > timezone.now():
+        raise ValueError("Checkpoints can't be written for the future.")
+    checkpoints = [
+        StockCheckpoint(stock_id=stock_id, as_of=as_of, quantity=row['quantity'], cost_price=row['cost_price'])
+        for stock_id, row in balances(as_of).items()
+        if row['tail']
+    ]
+    StockCheckpoint.objects.bulk_create(checkpoints, batch_size=batch_size)
+    return len(checkpoints)
+
+
+def mismatches():
+    """Stocks whose ledger balance disagrees with Stock.quantity: {stock_id: (ledger, actual)}."""
+    actual = dict(Stock.objects.values_list('id', 'quantity'))
+    return {
+        stock_id: (row['quantity'], actual[stock_id])
+        for stock_id, row in balances().items()
+        if row['quantity'] != actual[stock_id]
+    }
@@ -0,0 +1,41 @@
+import time as timer
+from datetime import datetime, time
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from inventory.ledger import write_checkpoints, mismatches
+
+
+class Command(BaseCommand):
+    help = (
+        "Write stock ledger checkpoints (on-hand quantity and cost per stock) so point-in-time "
+        "balances only replay the movements since the last checkpoint. Run it nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', help="Checkpoint at the end of this day (YYYY-MM-DD). Default: now.")
+        parser.add_argument('--check', action='store_true',
+                            help="Also compare the ledger with Stock.quantity and list the differences.")
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options['as_of']:
+            try:
+                day = datetime.strptime(options['as_of'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError("Invalid date format. Please use YYYY-MM-DD.")
+            as_of = timezone.make_aware(datetime.combine(day, time.max))
+            if as_of > timezone.now():
+                raise CommandError("That day hasn't ended yet.")
+
+        started = timer.monotonic()
+        written = write_checkpoints(as_of)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Wrote {written} stock checkpoints in {timer.monotonic() - started:.1f}s."
+        ))
+
+        if options['check']:
+            differences = mismatches()
+            for stock_id, (ledger, actual) in differences.items():
+                self.stdout.write(self.style.WARNING(f"⚠️ Stock {stock_id}: ledger {ledger}, quantity {actual}"))
+            if not differences:
+                self.stdout.write(self.style.SUCCESS("✅ Ledger matches every stock quantity."))
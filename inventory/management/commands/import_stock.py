@@ -1,10 +1,29 @@
-import pandas as pd
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.utils import timezone
-from inventory.models import Category, Stock
+from accounts.models import CustomUser
+from dashboard.cache import mark_dashboard_stale
+from erp.imports import read_rows, pick, to_int, to_float, RowError, ErrorReport
+from inventory.costing import fifo_enabled, add_layers
+from inventory.ledger import record_movements
+from inventory.models import Category, CostLayer, Stock, StockMovement
+
+# Accepted header names per field
+STOCK = ('stock', 'name', 'product', 'item', 'stock_name')
+COST = ('price', 'cost_price', 'cost', 'unit_cost')
+QUANTITY = ('qty', 'quantity', 'stock_qty')
+CATEGORY = ('category', 'group')
+SELLING_PRICE = ('selling_price', 'mrp', 'sale_price')
+
+# Fields an import may change on an existing stock (category and selling price
+# only when the file has those columns)
+UPDATED_FIELDS = ('category_id', 'cost_price', 'quantity', 'selling_price')
 
-df = pd.read_excel("stock_data.xlsx")
 
 def extract_category(stock_name: str):
+    """Category guessed from the stock name, for sheets without a category column."""
     name = stock_name.lower().strip()
     if "kid" in name:
         if "shoe" in name:
@@ -45,24 +64,163 @@ def extract_category(stock_name: str):
     else:
         return "Miscellaneous"
 
-for index, row in df.iterrows():
-    stock_name = str(row['Stock']).strip().title()
-    cost_price = float(row['Price'])
-    qty = int(row['Qty'])
 
-    category_name = extract_category(stock_name)
-    category, _ = Category.objects.get_or_create(
-        name=category_name,
-        defaults={'icon_image': 'category_icons/default.png', 'sizes_covered': ''}
+class Command(BaseCommand):
+    help = (
+        "Import or update the stock catalog from a CSV/XLSX file (columns: stock, price, qty "
+        "[, category, selling_price]). Stocks are matched by name, so re-running the same file changes nothing."
     )
 
-    Stock.objects.create(
-        category=category,
-        name=stock_name,
-        cost_price=cost_price,
-        sizes="",
-        quantity=qty,
-        last_updated=timezone.now()
-    )
+    def add_arguments(self, parser):
+        parser.add_argument('file', nargs='?', default='stock_data.xlsx', help="Path to the .xlsx or .csv file")
+        parser.add_argument('--user', required=True, help="Username new stocks are created under")
+        parser.add_argument('--sheet', help="Worksheet name (XLSX only, default: the active sheet)")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help="Validate every row without saving anything")
+        parser.add_argument('--errors', help="Where to write the rejected rows (default: <file>.errors.csv)")
+
+    def handle(self, *args, **options):
+        path = Path(options['file'])
+        if not path.exists():
+            raise CommandError(f"File not found: {path}")
+        try:
+            self.user = CustomUser.objects.get(username=options['user'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"Unknown user '{options['user']}'")
+
+        # lower name -> id, loaded once; new categories and stocks are added as they show up
+        self.categories = {name.lower(): pk for pk, name in Category.objects.values_list('id', 'name')}
+        self.stocks = {name.lower(): pk for pk, name in Stock.objects.values_list('id', 'name').iterator()}
+        # Dry runs save nothing: what a real run would have written so far, by lower name
+        self.pending = {}
+        self.dry_run = options['dry_run']
+        self.counts = {'rows': 0, 'created': 0, 'updated': 0, 'unchanged': 0}
+        self.fifo = fifo_enabled()
+
+        errors = ErrorReport(options['errors'] or path.with_name(f"{path.name}.errors.csv"))
+        started = time.monotonic()
+        batch = {}
+
+        try:
+            with transaction.atomic():
+                for line, row in read_rows(path, options['sheet']):
+                    try:
+                        item = self.parse(row)
+                    except RowError as e:
+                        errors.add(line, str(e), row)
+                        continue
+                    batch[item['name'].lower()] = item  # a name repeated in the sheet: the last row wins
+                    if len(batch) >= options['batch_size']:
+                        self.flush(batch, started)
+                        batch = {}
+                self.flush(batch, started)
+
+                if self.counts['created'] + self.counts['updated'] and not self.dry_run:
+                    mark_dashboard_stale()
+                if self.dry_run:
+                    transaction.set_rollback(True)  # drops the categories a dry run created
+        finally:
+            errors.close()
+
+        elapsed = time.monotonic() - started
+        counts = self.counts
+        verb = "Validated" if self.dry_run else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {verb} {counts['rows']:,} stocks in {elapsed:.1f}s ({counts['rows'] / max(elapsed, 0.001):,.0f} rows/s): "
+            f"{counts['created']:,} new, {counts['updated']:,} updated, {counts['unchanged']:,} unchanged"
+        ))
+        if errors.count:
+            self.stdout.write(self.style.WARNING(f"⚠️ {errors.count:,} rows rejected, see {errors.path}"))
+
+    def parse(self, row):
+        name = str(pick(row, STOCK)).strip().title()
+        if not name or len(name) > Stock._meta.get_field('name').max_length:
+            raise RowError(f"Invalid stock name: {name!r}")
+        cost = to_float(pick(row, COST), 'price')
+        quantity = to_int(pick(row, QUANTITY), 'qty')
+        if cost < 0 or quantity < 0:
+            raise RowError("Price and qty can't be negative")
+        selling_price = pick(row, SELLING_PRICE, required=False)
+        category = pick(row, CATEGORY, required=False)
+        return {
+            'name': name,
+            'cost_price': cost,
+            'quantity': quantity,
+            'selling_price': to_float(selling_price, 'selling_price') if selling_price is not None else None,
+            # None leaves an existing stock's category alone; new stocks get a guessed one
+            'category_id': self.category_id(str(category).strip()) if category else None,
+        }
+
+    def category_id(self, name):
+        key = name.lower()
+        if key not in self.categories:
+            self.categories[key] = Category.objects.create(name=name).pk
+        return self.categories[key]
+
+    def flush(self, batch, started):
+        """Insert the new stocks and update the changed ones of one batch."""
+        if not batch:
+            return
+        # Matched case-insensitively through the name index, then one locked read by id
+        ids = [self.stocks[key] for key in batch if self.stocks.get(key)]
+        locked = {
+            stock.id: stock
+            for stock in Stock.objects.select_for_update().filter(id__in=ids).order_by('id').only('id', 'name', *UPDATED_FIELDS)
+        }
+
+        new, changed = [], []
+        now = timezone.now()
+        for key, item in batch.items():
+            stock = self.pending.get(key) or locked.get(self.stocks.get(key))
+            if stock is None:
+                new.append(Stock(user=self.user, name=item['name'],
+                                 category_id=item['category_id'] or self.category_id(extract_category(item['name'])),
+                                 cost_price=item['cost_price'], quantity=item['quantity'],
+                                 selling_price=item['selling_price'] or 0))
+                continue
+            values = {field: item[field] for field in UPDATED_FIELDS if item[field] is not None}
+            if all(getattr(stock, field) == value for field, value in values.items()):
+                self.counts['unchanged'] += 1
+                continue
+            old_quantity, old_cost = stock.quantity, stock.cost_price
+            for field, value in values.items():
+                setattr(stock, field, value)
+            stock.last_updated = now  # bulk_update skips auto_now
+            changed.append((stock, stock.quantity - old_quantity, stock.cost_price != old_cost))
+
+        if self.dry_run:
+            self.pending.update({stock.name.lower(): stock for stock in new})
+            self.pending.update({stock.name.lower(): stock for stock, _, _ in changed})
+        else:
+            Stock.objects.bulk_create(new, batch_size=1000)
+            self.stocks.update({stock.name.lower(): stock.pk for stock in new})
+            Stock.objects.bulk_update([stock for stock, _, _ in changed], [*UPDATED_FIELDS, 'last_updated'],
+                                      batch_size=1000)
+            self.record(new, changed, now)
+
+        self.counts['created'] += len(new)
+        self.counts['updated'] += len(changed)
+        self.counts['rows'] += len(batch)
+        elapsed = time.monotonic() - started
+        self.stderr.write(f"  {self.counts['rows']:,} rows ({self.counts['rows'] / max(elapsed, 0.001):,.0f} rows/s)")
+
+    def record(self, new, changed, now):
+        """Ledger movements (and FIFO layers) for the quantities the import set."""
+        record_movements([
+            StockMovement(stock_id=stock.pk, kind=StockMovement.OPENING, quantity=stock.quantity,
+                          cost_price=stock.cost_price, note="import_stock", user=self.user, occurred_at=now)
+            for stock in new if stock.quantity
+        ] + [
+            StockMovement(stock_id=stock.pk, kind=StockMovement.ADJUSTMENT, quantity=difference,
+                          cost_price=stock.cost_price, note="import_stock", user=self.user, occurred_at=now)
+            for stock, difference, _ in changed if difference
+        ])
 
-print("✅ Stock data imported with smart categories!")
+        if self.fifo:
+            # The file states what is on hand and at what cost: a changed stock's open
+            # layers are replaced by one layer of that quantity at that cost
+            revalued = [stock for stock, difference, cost_changed in changed if difference or cost_changed]
+            CostLayer.objects.filter(stock__in=revalued, remaining__gt=0).update(remaining=0)
+            add_layers([
+                (stock.pk, stock.quantity, stock.cost_price, now, None) for stock in [*new, *revalued]
+            ])
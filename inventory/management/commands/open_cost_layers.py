@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from inventory.costing import fifo_enabled, open_layers_for_current_stock
+
+
+class Command(BaseCommand):
+    help = (
+        "Open FIFO cost layers for on-hand stock no layer covers yet, at the current cost price. "
+        "Run it once when switching INVENTORY_VALUATION to 'fifo'; running it again opens nothing new."
+    )
+
+    def handle(self, *args, **options):
+        if not fifo_enabled():
+            self.stdout.write(self.style.WARNING(
+                "⚠️ INVENTORY_VALUATION is not 'fifo', the layers won't be used until it is."
+            ))
+        with transaction.atomic():
+            opened = open_layers_for_current_stock()
+        self.stdout.write(self.style.SUCCESS(f"✅ Opened {opened} cost layers."))
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.9 on 2026-10-17 00:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_alter_stock_selling_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(condition=models.Q(('quantity__lt', 4)), fields=['quantity'], name='stock_low_qty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(condition=models.Q(('quantity__lt', 4)), fields=['user', 'quantity'], name='stock_user_low_qty_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.9 on 2026-10-17 01:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('inventory', '0008_stock_low_quantity_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateTimeField()),
+                ('quantity', models.IntegerField()),
+                ('cost_price', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='inventory.stock')),
+            ],
+            options={
+                'verbose_name': 'Stock Checkpoint',
+                'verbose_name_plural': 'Stock Checkpoints',
+                'ordering': ['-as_of'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('opening', 'Opening balance'), ('receipt', 'Purchase receipt'), ('sale', 'Sale verification'), ('return', 'Purchase return'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('quantity', models.IntegerField(help_text='Signed change: positive in, negative out')),
+                ('cost_price', models.FloatField(default=0)),
+                ('reference_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('note', models.CharField(blank=True, default='', max_length=255)),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='inventory.stock')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Stock Movement',
+                'verbose_name_plural': 'Stock Movements',
+                'ordering': ['-occurred_at', '-id'],
+                'indexes': [models.Index(fields=['stock', 'occurred_at'], name='movement_stock_occurred_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stockcheckpoint',
+            constraint=models.UniqueConstraint(fields=('stock', 'as_of'), name='unique_checkpoint_stock_as_of'),
+        ),
+    ]
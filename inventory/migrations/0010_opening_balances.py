@@ -0,0 +1,35 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def opening_balances(apps, schema_editor):
+    """One opening movement per stock, so the ledger adds up to the current quantities."""
+    Stock = apps.get_model('inventory', 'Stock')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+    db_alias = schema_editor.connection.alias
+    now = timezone.now()
+    StockMovement.objects.using(db_alias).bulk_create([
+        StockMovement(
+            stock_id=stock_id, kind='opening', quantity=quantity, cost_price=cost_price,
+            note="Opening balance", occurred_at=now,
+        )
+        for stock_id, quantity, cost_price in Stock.objects.using(db_alias).filter(quantity__gt=0).values_list(
+            'id', 'quantity', 'cost_price'
+        ).iterator()
+    ], batch_size=500)
+
+
+def remove_opening_balances(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    apps.get_model('inventory', 'StockMovement').objects.using(db_alias).filter(kind='opening').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(opening_balances, remove_opening_balances),
+    ]
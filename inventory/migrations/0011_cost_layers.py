@@ -0,0 +1,33 @@
+# Generated by Django 4.2.9 on 2026-10-17 01:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_opening_balances'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CostLayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('received_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('quantity', models.PositiveIntegerField()),
+                ('remaining', models.PositiveIntegerField()),
+                ('unit_cost', models.FloatField()),
+                ('reference_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='inventory.stock')),
+            ],
+            options={
+                'verbose_name': 'Cost Layer',
+                'verbose_name_plural': 'Cost Layers',
+                'ordering': ['stock', 'received_at', 'id'],
+                'indexes': [models.Index(condition=models.Q(('remaining__gt', 0)), fields=['stock', 'received_at', 'id'], name='cost_layer_open_idx')],
+            },
+        ),
+    ]
@@ -1,6 +1,10 @@
 from django.db import models
+from django.utils import timezone
 from accounts.models import CustomUser
 
+# Stock below this quantity shows up in the dashboard stock alerts
+LOW_STOCK_THRESHOLD = 4
+
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
 
@@ -24,8 +28,126 @@ class Stock(models.Model):
 
     class Meta:
         ordering = ['-last_updated']
+        indexes = [
+            # Partial indexes: only the (few) low-stock rows are indexed
+            models.Index(
+                fields=['quantity'],
+                condition=models.Q(quantity__lt=LOW_STOCK_THRESHOLD),
+                name='stock_low_qty_idx',
+            ),
+            models.Index(
+                fields=['user', 'quantity'],
+                condition=models.Q(quantity__lt=LOW_STOCK_THRESHOLD),
+                name='stock_user_low_qty_idx',
+            ),
+        ]
 
     def save_model(self, request, obj, form, change):
         if not change or not obj.user:   # If creating new object
             obj.user = request.user
         super().save_model(request, obj, form, change)
+
+
+class StockMovement(models.Model):
+    """
+    Append-only ledger of every Stock.quantity change, written by inventory/posting.py
+    in the same transaction as the change itself. The quantities of a stock's
+    movements add up to its on-hand quantity.
+    """
+    OPENING = 'opening'
+    RECEIPT = 'receipt'
+    SALE = 'sale'
+    RETURN = 'return'
+    ADJUSTMENT = 'adjustment'
+    KIND_CHOICES = [
+        (OPENING, 'Opening balance'),
+        (RECEIPT, 'Purchase receipt'),
+        (SALE, 'Sale verification'),
+        (RETURN, 'Purchase return'),
+        (ADJUSTMENT, 'Adjustment'),
+    ]
+
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name='movements')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    quantity = models.IntegerField(help_text="Signed change: positive in, negative out")
+    # Weighted-average Stock.cost_price right after the movement, for valuation
+    cost_price = models.FloatField(default=0)
+    # Purchase / Sales / PurchaseReturn id the movement came from
+    reference_id = models.PositiveIntegerField(blank=True, null=True)
+    note = models.CharField(max_length=255, blank=True, default='')
+    user = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, blank=True, null=True, related_name='stock_movements')
+    occurred_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.quantity:+d} ({self.occurred_at:%d %b %Y})"
+
+    def save(self, *args, **kwargs):
+        if self.pk:
+            raise ValueError("Stock movements are append-only, post an adjustment instead.")
+        super().save(*args, **kwargs)
+
+    class Meta:
+        verbose_name = "Stock Movement"
+        verbose_name_plural = "Stock Movements"
+        ordering = ['-occurred_at', '-id']
+        indexes = [
+            models.Index(fields=['stock', 'occurred_at'], name='movement_stock_occurred_idx'),
+        ]
+
+
+class StockCheckpoint(models.Model):
+    """
+    On-hand quantity and cost of a stock as of a moment, written periodically by
+    `manage.py checkpoint_stock`. A point-in-time balance is the latest checkpoint
+    plus the movements after it (see inventory/ledger.py).
+    """
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name='checkpoints')
+    as_of = models.DateTimeField()
+    quantity = models.IntegerField()
+    cost_price = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def value(self):
+        return self.quantity * self.cost_price
+
+    def __str__(self):
+        return f"{self.stock_id} @ {self.as_of:%d %b %Y %H:%M}: {self.quantity}"
+
+    class Meta:
+        verbose_name = "Stock Checkpoint"
+        verbose_name_plural = "Stock Checkpoints"
+        ordering = ['-as_of']
+        constraints = [
+            models.UniqueConstraint(fields=['stock', 'as_of'], name='unique_checkpoint_stock_as_of'),
+        ]
+
+
+class CostLayer(models.Model):
+    """
+    FIFO cost layer: a received quantity at its unit cost (INVENTORY_VALUATION = 'fifo').
+    Stock going out consumes the oldest open layers first, see inventory/costing.py.
+    """
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name='cost_layers')
+    received_at = models.DateTimeField(default=timezone.now)
+    quantity = models.PositiveIntegerField()
+    remaining = models.PositiveIntegerField()
+    unit_cost = models.FloatField()
+    # Purchase the layer was received from (empty for opening and adjustment layers)
+    reference_id = models.PositiveIntegerField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.remaining}/{self.quantity} @ {self.unit_cost}"
+
+    class Meta:
+        verbose_name = "Cost Layer"
+        verbose_name_plural = "Cost Layers"
+        ordering = ['stock', 'received_at', 'id']
+        indexes = [
+            # Only open layers are ever read, consumed history stays out of the index
+            models.Index(
+                fields=['stock', 'received_at', 'id'],
+                condition=models.Q(remaining__gt=0),
+                name='cost_layer_open_idx',
+            ),
+        ]
@@ -0,0 +1,256 @@
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+from dashboard.cache import mark_dashboard_stale
+from sales.models import Sales
+from sales.rollups import apply_verified_sales
+from purchases.models import Purchase
+from purchase_returns.models import PurchaseReturn
+from .models import Stock, StockMovement
+from .ledger import record_movements
+from .costing import fifo_enabled, add_layers, consume_layers
+
+# Ids per UPDATE ... WHERE id IN (...) statement
+BATCH_SIZE = 500
+
+
+class PostingError(Exception):
+    pass
+
+
+def lock_stocks(stock_ids, using=DEFAULT_DB_ALIAS):
+    """
+    Lock every affected Stock row with one SELECT ... FOR UPDATE.
+    Rows are always locked in id order, so concurrent postings cannot deadlock.
+    """
+    return {
+        stock.id: stock
+        for stock in Stock.objects.using(using).select_for_update().filter(id__in=set(stock_ids)).order_by('id')
+    }
+
+
+def _mark(model, ids, **values):
+    ids = list(ids)
+    for i in range(0, len(ids), BATCH_SIZE):
+        model.objects.filter(id__in=ids[i:i + BATCH_SIZE]).update(**values)
+
+
+def _save_stocks(stocks, fields):
+    now = timezone.now()
+    for stock in stocks:
+        stock.last_updated = now  # bulk_update skips auto_now
+    Stock.objects.bulk_update(stocks, [*fields, 'last_updated'], batch_size=BATCH_SIZE)
+
+
+def _take_fifo(stocks, demands):
+    """
+    FIFO mode: consume cost layers for `demands` [(key, stock_id, quantity)] and
+    revalue what's left of each stock at its remaining layers. Call before the
+    quantities are deducted. Returns the cost of each demand: {key: cost}.
+    """
+    costs = consume_layers(demands, {stock_id: stock.cost_price for stock_id, stock in stocks.items()})
+    taken = {}
+    for key, stock_id, quantity in demands:
+        quantity_taken, cost_taken = taken.get(stock_id, (0, 0))
+        taken[stock_id] = (quantity_taken + quantity, cost_taken + costs[key])
+    for stock_id, (quantity, cost) in taken.items():
+        stock = stocks[stock_id]
+        left = stock.quantity - quantity
+        if left > 0:
+            stock.cost_price = round(max(stock.quantity * stock.cost_price - cost, 0) / left, 2)
+    return costs
+
+
+def post_sales_verification(queryset, user=None):
+    """
+    Verify the unverified sales in `queryset` and deduct their stock.
+    Sales of a product whose stock can't cover all of them are left pending.
+    In FIFO mode each sale's gross profit is costed from the layers it consumes.
+    Returns the verified Sales instances.
+    """
+    with transaction.atomic():
+        sales = list(queryset.filter(is_verified=False).order_by().only(
+            'id', 'stock_id', 'quantity_sold', 'selling_price', 'total_amount', 'gross_profit', 'sold_on',
+        ))
+        if not sales:
+            return []
+
+        grouped = {}
+        for sale in sales:
+            grouped.setdefault(sale.stock_id, []).append(sale)
+        stocks = lock_stocks(grouped)
+
+        verified, changed = [], []
+        for stock_id, stock_sales in grouped.items():
+            stock = stocks[stock_id]
+            total_required = sum(s.quantity_sold for s in stock_sales)
+            # If not enough stock, skip all sales of this product
+            if stock.quantity < total_required:
+                continue
+            changed.append(stock)
+            for sale in sorted(stock_sales, key=lambda s: (s.sold_on, s.id)):
+                sale.stock = stock
+                sale.is_verified = True
+                sale.gross_profit = (sale.selling_price - stock.cost_price) * sale.quantity_sold
+                verified.append(sale)
+
+        if not verified:
+            return []
+
+        if fifo_enabled():
+            # Exact cost of goods sold per sale, oldest sales take the oldest layers
+            cogs = _take_fifo(stocks, [(sale.id, sale.stock_id, sale.quantity_sold) for sale in verified])
+            for sale in verified:
+                sale.gross_profit = round(sale.selling_price * sale.quantity_sold - cogs[sale.id], 2)
+        for stock in changed:
+            stock.quantity -= sum(sale.quantity_sold for sale in grouped[stock.id])
+
+        _save_stocks(changed, ['quantity', 'cost_price'])
+        if fifo_enabled():
+            Sales.objects.bulk_update(verified, ['is_verified', 'gross_profit'], batch_size=BATCH_SIZE)
+        else:
+            # gross_profit is refreshed against the current cost, as Sales.save() did
+            cost = Stock.objects.filter(pk=OuterRef('stock_id')).values('cost_price')[:1]
+            _mark(
+                Sales, [sale.id for sale in verified],
+                is_verified=True,
+                gross_profit=(F('selling_price') - Subquery(cost)) * F('quantity_sold'),
+            )
+        apply_verified_sales(verified)
+        now = timezone.now()
+        record_movements([
+            StockMovement(
+                stock_id=sale.stock_id, kind=StockMovement.SALE, quantity=-sale.quantity_sold,
+                cost_price=sale.stock.cost_price, reference_id=sale.id, user=user, occurred_at=now,
+            )
+            for sale in verified
+        ])
+        mark_dashboard_stale()
+        return verified
+
+
+def post_purchase_receipts(queryset, user=None):
+    """
+    Receive the pending purchases in `queryset`: add their quantity to stock and
+    fold their cost into the weighted-average Stock.cost_price. In FIFO mode
+    each purchase also opens a cost layer.
+    Returns the number of purchases received.
+    """
+    with transaction.atomic():
+        purchases = list(queryset.filter(is_received=False).only(
+            'id', 'stock_item_id', 'quantity_purchased', 'cost_price_per_unit', 'selling_price',
+        ))
+        if not purchases:
+            return 0
+
+        grouped = {}
+        for p in purchases:
+            grouped.setdefault(p.stock_item_id, []).append(p)
+        stocks = lock_stocks(grouped)
+
+        for stock_id, stock_purchases in grouped.items():
+            stock = stocks[stock_id]
+            old_qty = stock.quantity
+            old_cost = stock.cost_price
+
+            total_new_qty = sum(p.quantity_purchased for p in stock_purchases)
+            total_new_cost = sum(p.quantity_purchased * p.cost_price_per_unit for p in stock_purchases)
+
+            stock.quantity = old_qty + total_new_qty
+
+            # Weighted average cost
+            if stock.quantity > 0:
+                stock.cost_price = round(((old_qty * old_cost) + total_new_cost) / stock.quantity, 2)
+
+            # Update selling price if provided in any purchase
+            for p in stock_purchases:
+                if p.selling_price:
+                    stock.selling_price = p.selling_price
+
+        _save_stocks(list(stocks.values()), ['quantity', 'cost_price', 'selling_price'])
+        now = timezone.now()
+        _mark(Purchase, [p.id for p in purchases], is_received=True, last_updated=now)
+        if fifo_enabled():
+            add_layers([
+                (p.stock_item_id, p.quantity_purchased, p.cost_price_per_unit, now, p.id) for p in purchases
+            ])
+        record_movements([
+            StockMovement(
+                stock_id=p.stock_item_id, kind=StockMovement.RECEIPT, quantity=p.quantity_purchased,
+                cost_price=stocks[p.stock_item_id].cost_price, reference_id=p.id, user=user, occurred_at=now,
+            )
+            for p in purchases
+        ])
+        mark_dashboard_stale()
+        return len(purchases)
+
+
+def post_purchase_returns(queryset, user=None):
+    """
+    Process the pending returns in `queryset` and deduct them from stock.
+    All or nothing: raises PostingError if any product lacks the stock to return.
+    Returns the number of returns processed.
+    """
+    with transaction.atomic():
+        returns = list(queryset.filter(is_processed=False).only('id', 'stock_item_id', 'quantity_returned'))
+        if not returns:
+            return 0
+
+        required = {}
+        for ret in returns:
+            required[ret.stock_item_id] = required.get(ret.stock_item_id, 0) + ret.quantity_returned
+        stocks = lock_stocks(required)
+
+        for stock_id, quantity in required.items():
+            stock = stocks[stock_id]
+            if stock.quantity < quantity:
+                raise PostingError(
+                    f"Insufficient stock for {stock.name}. Available: {stock.quantity}, Return Amount: {quantity}"
+                )
+        if fifo_enabled():
+            _take_fifo(stocks, [(ret.id, ret.stock_item_id, ret.quantity_returned) for ret in returns])
+        for stock_id, quantity in required.items():
+            stocks[stock_id].quantity -= quantity
+
+        _save_stocks(list(stocks.values()), ['quantity', 'cost_price'])
+        now = timezone.now()
+        _mark(PurchaseReturn, [ret.id for ret in returns], is_processed=True, last_updated=now)
+        record_movements([
+            StockMovement(
+                stock_id=ret.stock_item_id, kind=StockMovement.RETURN, quantity=-ret.quantity_returned,
+                cost_price=stocks[ret.stock_item_id].cost_price, reference_id=ret.id, user=user, occurred_at=now,
+            )
+            for ret in returns
+        ])
+        mark_dashboard_stale()
+        return len(returns)
+
+
+def post_stock_adjustment(stock_id, quantity, note='', user=None):
+    """
+    Correct a stock's quantity by hand (count differences, damage, ...):
+    `quantity` is added, or removed when negative. Raises PostingError if the
+    result would go below zero. Returns the StockMovement.
+    """
+    with transaction.atomic():
+        stock = lock_stocks([stock_id]).get(stock_id)
+        if stock is None:
+            raise PostingError(f"Stock {stock_id} does not exist.")
+        if stock.quantity + quantity < 0:
+            raise PostingError(
+                f"Insufficient stock for {stock.name}. Available: {stock.quantity}, Adjustment: {quantity}"
+            )
+        if fifo_enabled():
+            if quantity < 0:
+                _take_fifo({stock.id: stock}, [(stock.id, stock.id, -quantity)])
+            else:
+                # Found stock is valued at the current cost, as the newest layer
+                add_layers([(stock.id, quantity, stock.cost_price, timezone.now(), None)])
+        stock.quantity += quantity
+        _save_stocks([stock], ['quantity', 'cost_price'])
+        [movement] = record_movements([StockMovement(
+            stock_id=stock.id, kind=StockMovement.ADJUSTMENT, quantity=quantity,
+            cost_price=stock.cost_price, note=note, user=user, occurred_at=stock.last_updated,
+        )])
+        mark_dashboard_stale()
+        return movement
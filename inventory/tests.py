@@ -1,3 +1,259 @@
-from django.test import TestCase
+import io
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from erp.testing import QueryBudgetMixin
+from accounts.models import CustomUser
+from purchases.models import Purchase
+from purchase_returns.models import PurchaseReturn
+from sales.models import Sales
+from .alerts import low_stock_feed
+from .costing import open_layers_for_current_stock
+from .ledger import balances, on_hand, write_checkpoints, mismatches
+from .models import Category, Stock, StockMovement
+from .posting import post_purchase_receipts, post_purchase_returns, post_sales_verification, post_stock_adjustment
 
-# Create your tests here.
+
+def create_stocks(user, count):
+    """`count` stocks of 50 at 100 in a new category."""
+    category = Category.objects.create(name=f'Category {Category.objects.count()}')
+    start = Stock.objects.count()
+    return Stock.objects.bulk_create([
+        Stock(user=user, category=category, name=f'Item {start + i}', cost_price=100, selling_price=120, quantity=50)
+        for i in range(count)
+    ])
+
+
+@override_settings(JOBS={'IN_PROCESS': False})
+class StockAdminQueryTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(self.user)
+
+    def add_stocks(self, count):
+        # A new owner and category each time, so the related columns and filters grow too
+        n = CustomUser.objects.count()
+        return create_stocks(CustomUser.objects.create(username=f'owner{n}', email=f'owner{n}@example.com'), count)
+
+    def test_changelist(self):
+        url = reverse('admin:inventory_stock_changelist')
+        for _ in range(2):
+            self.add_stocks(30)
+            self.assertQueryBudget(url, 9)
+
+    def test_change_form(self):
+        url = reverse('admin:inventory_stock_change', args=[self.add_stocks(1)[0].pk])
+        for _ in range(2):
+            self.add_stocks(30)
+            self.assertQueryBudget(url, 8)
+
+
+@override_settings(JOBS={'IN_PROCESS': False})
+class CategoryAdminQueryTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+
+    def add_categories(self, count):
+        start = Category.objects.count()
+        Category.objects.bulk_create([Category(name=f'Category {start + i}') for i in range(count)])
+
+    def test_changelist(self):
+        url = reverse('admin:inventory_category_changelist')
+        for _ in range(2):
+            self.add_categories(30)
+            self.assertQueryBudget(url, 5)
+
+    def test_add_form(self):
+        url = reverse('admin:inventory_category_add')
+        for _ in range(2):
+            self.add_categories(30)
+            self.assertQueryBudget(url, 4)
+
+
+@override_settings(JOBS={'IN_PROCESS': False})
+class StockMovementAdminQueryTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(self.user)
+
+    def add_movements(self, count):
+        StockMovement.objects.bulk_create([
+            StockMovement(stock=stock, kind=StockMovement.OPENING, quantity=stock.quantity, user=self.user)
+            for stock in create_stocks(self.user, count)
+        ])
+
+    def test_changelist(self):
+        url = reverse('admin:inventory_stockmovement_changelist')
+        for _ in range(2):
+            self.add_movements(30)
+            self.assertQueryBudget(url, 9)
+
+    def test_add_form(self):
+        url = reverse('admin:inventory_stockmovement_add')
+        for _ in range(2):
+            self.add_movements(30)
+            self.assertQueryBudget(url, 5)
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(username='owner', email='owner@example.com')
+        self.stock = create_stocks(self.user, 1)[0]
+        StockMovement.objects.create(stock=self.stock, kind=StockMovement.OPENING, quantity=50, cost_price=100)
+
+    def test_postings_write_movements(self):
+        Purchase.objects.create(stock_item=self.stock, quantity_purchased=50, cost_price_per_unit=120)
+        post_purchase_receipts(Purchase.objects.all())
+        post_stock_adjustment(self.stock.pk, -5, "Damaged")
+
+        kinds = list(self.stock.movements.order_by('id').values_list('kind', 'quantity'))
+        self.assertEqual(kinds, [('opening', 50), ('receipt', 50), ('adjustment', -5)])
+        self.assertEqual(mismatches(), {})
+        self.assertEqual(on_hand(self.stock.pk)['cost_price'], 110)
+
+    def test_point_in_time_from_checkpoint(self):
+        before = timezone.now()
+        post_stock_adjustment(self.stock.pk, 10)
+        write_checkpoints()
+        post_stock_adjustment(self.stock.pk, -4)
+
+        self.assertEqual(on_hand(self.stock.pk, before)['quantity'], 50)
+        now = balances()[self.stock.pk]
+        self.assertEqual((now['quantity'], now['tail']), (56, 1))  # checkpoint + one movement
+        self.assertEqual(on_hand(self.stock.pk, before - timedelta(days=1))['quantity'], 0)
+
+
+@override_settings(JOBS={'IN_PROCESS': False})
+class LowStockFeedTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create(username='owner', email='owner@example.com')
+        self.partner = CustomUser.objects.create(username='partner', email='partner@example.com')
+        stocks = create_stocks(self.owner, 6) + create_stocks(self.partner, 2)
+        for stock, quantity in zip(stocks, [3, 0, 50, 1, 0, 2, 0, 9]):
+            stock.quantity = quantity
+        Stock.objects.bulk_update(stocks, ['quantity'])
+        self.stocks = stocks
+
+    def test_top_items_and_exact_counts(self):
+        with self.assertNumQueries(1):
+            feed = low_stock_feed(limit=3)
+        self.assertEqual([stock.quantity for stock in feed['items']], [0, 0, 0])
+        self.assertEqual((feed['low_stock_count'], feed['out_of_stock']), (6, 3))
+
+        feed = low_stock_feed(Stock.objects.filter(user=self.owner), limit=10)
+        self.assertEqual([stock.pk for stock in feed['items']], [self.stocks[i].pk for i in (1, 4, 3, 5, 0)])
+        self.assertEqual((feed['low_stock_count'], feed['out_of_stock']), (5, 2))
+        self.assertEqual(low_stock_feed(Stock.objects.filter(quantity__gt=5)), {
+            'items': [], 'low_stock_count': 0, 'out_of_stock': 0,
+        })
+
+    def test_view_all_filter(self):
+        self.client.force_login(CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+        url = reverse('admin:inventory_stock_changelist')
+        for level, count in (('low', 6), ('out', 3)):
+            with self.subTest(level=level):
+                response = self.client.get(url, {'stock_level': level})
+                self.assertEqual(response.context['cl'].result_count, count)
+
+
+class PostingEngineTests(TestCase):
+    """One mixed batch through the set-based postings: stock, ledger and checkpoints agree."""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create(username='owner', email='owner@example.com')
+        self.shoes, self.bags = create_stocks(self.user, 2)  # 50 on hand at 100 each
+        StockMovement.objects.bulk_create([
+            StockMovement(stock=stock, kind=StockMovement.OPENING, quantity=50, cost_price=100)
+            for stock in (self.shoes, self.bags)
+        ])
+
+    def test_mixed_batch(self):
+        for quantity in (10, 10):
+            Purchase.objects.create(stock_item=self.shoes, quantity_purchased=quantity, cost_price_per_unit=135)
+        Purchase.objects.create(stock_item=self.bags, quantity_purchased=10, cost_price_per_unit=100)
+        shoe_sales = [Sales.objects.create(stock=self.shoes, quantity_sold=q, selling_price=150) for q in (10, 20)]
+        too_many = Sales.objects.create(stock=self.bags, quantity_sold=100, selling_price=150)
+        PurchaseReturn.objects.create(stock_item=self.shoes, quantity_returned=5)
+
+        self.assertEqual(post_purchase_receipts(Purchase.objects.all(), user=self.user), 3)
+        verified = post_sales_verification(Sales.objects.all(), user=self.user)
+        self.assertEqual(sorted(sale.pk for sale in verified), sorted(sale.pk for sale in shoe_sales))
+        self.assertEqual(post_purchase_returns(PurchaseReturn.objects.all(), user=self.user), 1)
+
+        self.shoes.refresh_from_db()
+        self.bags.refresh_from_db()
+        self.assertEqual((self.shoes.quantity, self.shoes.cost_price), (50 + 20 - 30 - 5, 110))
+        self.assertEqual(self.bags.quantity, 60)  # the bag sale couldn't be covered and stays pending
+        too_many.refresh_from_db()
+        self.assertFalse(too_many.is_verified)
+
+        movements = list(self.shoes.movements.order_by('id').values_list('kind', 'quantity', 'reference_id'))
+        self.assertEqual([kind for kind, _, _ in movements], ['opening', 'receipt', 'receipt', 'sale', 'sale', 'return'])
+        self.assertEqual(sum(quantity for _, quantity, _ in movements), 35)
+        self.assertEqual({ref for kind, _, ref in movements if kind == 'sale'}, {sale.pk for sale in shoe_sales})
+        self.assertEqual(mismatches(), {})
+
+        self.assertEqual(write_checkpoints(), 2)
+        self.assertEqual(write_checkpoints(), 0)  # nothing moved since
+        checkpoint = self.shoes.checkpoints.get()
+        self.assertEqual((checkpoint.quantity, checkpoint.cost_price), (35, 110))
+        now = balances()[self.shoes.pk]
+        self.assertEqual((now['quantity'], now['tail']), (35, 0))
+
+
+@override_settings(INVENTORY_VALUATION='fifo')
+class FifoCostingTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(username='owner', email='owner@example.com')
+        self.stock = create_stocks(self.user, 1)[0]  # 50 on hand at 100
+        open_layers_for_current_stock()
+        Purchase.objects.create(stock_item=self.stock, quantity_purchased=50, cost_price_per_unit=140)
+        post_purchase_receipts(Purchase.objects.all())
+
+    def sell(self, quantity, minutes_ago):
+        return Sales.objects.create(stock=self.stock, quantity_sold=quantity, selling_price=150,
+                                    sold_on=timezone.now() - timedelta(minutes=minutes_ago))
+
+    def test_sales_consume_oldest_layers(self):
+        first, second = self.sell(40, 10), self.sell(20, 5)
+        post_sales_verification(Sales.objects.all())
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.gross_profit, 40 * 150 - 40 * 100)
+        self.assertEqual(second.gross_profit, 20 * 150 - (10 * 100 + 10 * 140))
+        self.stock.refresh_from_db()
+        self.assertEqual((self.stock.quantity, self.stock.cost_price), (40, 140))
+        self.assertEqual(list(self.stock.cost_layers.values_list('remaining', flat=True)), [0, 40])
+
+    def test_opening_layers_are_idempotent(self):
+        self.assertEqual(open_layers_for_current_stock(), 0)
+        post_stock_adjustment(self.stock.pk, -60)
+        self.stock.refresh_from_db()
+        self.assertEqual((self.stock.quantity, self.stock.cost_price), (40, 140))
+
+
+class ImportStockTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(username='owner', email='owner@example.com')
+        self.stock = create_stocks(self.user, 1)[0]
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.path = Path(folder.name) / 'stock.csv'
+        self.path.write_text(f"Stock,Price,Qty\n{self.stock.name.upper()},90,60\nMen Shoe,10,5\n")
+
+    def run_import(self):
+        call_command('import_stock', str(self.path), user='owner', stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_updates_by_name_case_insensitively(self):
+        self.run_import()
+        self.run_import()  # a re-run changes nothing
+        self.stock.refresh_from_db()
+        self.assertEqual((self.stock.quantity, self.stock.cost_price), (60, 90))
+        self.assertEqual(self.stock.category.name, 'Category 0')  # the file has no category column
+        self.assertEqual(self.stock.movements.get().quantity, 10)
+        self.assertEqual(Stock.objects.get(name='Men Shoe').category.name, "Men's Shoes")
@@ -0,0 +1,30 @@
+from django.contrib import admin
+from django.urls import reverse
+from django.utils.html import format_html
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'user', 'status', 'progress', 'message', 'created_at', 'finished_at', 'status_link')
+    list_filter = ('status', 'kind', 'created_at')
+    readonly_fields = [f.name for f in Job._meta.fields]
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request).select_related('user')
+        if not request.user.is_superuser:
+            qs = qs.filter(user=request.user)
+        return qs
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Details")
+    def status_link(self, obj):
+        url = reverse('admin:job_status', args=[obj.pk])
+        if obj.status == Job.DONE and obj.result_file:
+            return format_html('<a href="{}">📥 Download</a>', reverse('admin:job_download', args=[obj.pk]))
+        return format_html('<a href="{}">View</a>', url)
@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
+
+    def ready(self):
+        # Job handlers live in each app's tasks.py
+        autodiscover_modules('tasks')
+
+        from django.core.signals import request_started
+        from .runner import start_with_first_request
+        request_started.connect(start_with_first_request, dispatch_uid='jobs_start_worker')
@@ -0,0 +1,34 @@
+import time
+from django.core.management.base import BaseCommand
+from jobs.runner import Worker, requeue_stale, purge_results, job_settings
+
+
+class Command(BaseCommand):
+    help = "Run the background job worker (use with JOBS = {'IN_PROCESS': False} in production)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help="Worker threads (default JOBS['WORKERS'])")
+        parser.add_argument('--once', action='store_true', help="Drain the queue and exit")
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Re-queued {requeued} stale jobs"))
+
+        if options['once']:
+            worker = Worker(workers=1)
+            done = 0
+            while worker.run_once():
+                done += 1
+            purge_results()
+            self.stdout.write(self.style.SUCCESS(f"✅ Ran {done} jobs"))
+            return
+
+        worker = Worker(workers=options['workers']).start()
+        self.stdout.write(self.style.SUCCESS(f"Job worker running with {worker.workers} threads (Ctrl+C to stop)"))
+        try:
+            while True:
+                time.sleep(job_settings()['POLL_INTERVAL'])
+        except KeyboardInterrupt:
+            worker.stop()
+            worker.join()
@@ -0,0 +1,75 @@
+from pathlib import Path
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """A queued admin action, run by the background worker (see jobs/runner.py)."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs'
+    )
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)
+    message = models.CharField(max_length=255, blank=True)
+    result_file = models.CharField(max_length=500, blank=True)
+    result_name = models.CharField(max_length=255, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The worker polls for the oldest queued job
+            models.Index(fields=['status', 'created_at'], name='job_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+    def set_progress(self, progress, message=''):
+        """Report progress (0-100) from inside a handler without touching other fields."""
+        self.progress = progress
+        self.message = message[:255]
+        Job.objects.filter(pk=self.pk).update(progress=self.progress, message=self.message)
+
+    def save_result(self, filename, data):
+        """Store the downloadable result of a handler."""
+        from .runner import job_settings
+        folder = Path(job_settings()['RESULT_DIR']) / str(self.pk)
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / filename
+        path.write_bytes(data)
+        self.result_file = str(path)
+        self.result_name = filename
+        Job.objects.filter(pk=self.pk).update(result_file=self.result_file, result_name=self.result_name)
+
+    def mark_finished(self, status, message=''):
+        self.status = status
+        self.message = message[:255]
+        self.finished_at = timezone.now()
+        fields = {'status': status, 'message': self.message, 'finished_at': self.finished_at}
+        if status == self.DONE:
+            self.progress = fields['progress'] = 100
+        Job.objects.filter(pk=self.pk).update(**fields)
@@ -0,0 +1,241 @@
+import logging
+import shutil
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'IN_PROCESS': True,      # run a worker inside the web process, started by its first request
+    'WORKERS': 2,            # worker threads
+    'POLL_INTERVAL': 2,      # seconds an idle worker waits before checking the queue again
+    'STALE_AFTER': 3600,     # seconds before a running job of a dead worker is queued again
+    'RESULT_DIR': Path(settings.BASE_DIR) / 'job_results',
+    'KEEP_RESULTS_DAYS': 7,  # result files of finished jobs are deleted after this
+}
+
+# Seconds between two clean-ups (stale jobs, old results) of one worker
+PURGE_INTERVAL = 3600
+
+# Uploaded files waiting for a job (RESULT_DIR/uploads) are deleted after this many seconds
+UPLOAD_MAX_AGE = 24 * 3600
+
+_handlers = {}
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def job_settings():
+    return {**DEFAULTS, **getattr(settings, 'JOBS', {})}
+
+
+# ==================== HANDLERS ====================
+
+def task(kind):
+    """
+    Register a job handler: `handler(job, **params)`.
+    It may call job.set_progress() / job.save_result() and returns a short message.
+    """
+    def register(handler):
+        if kind in _handlers:
+            raise ValueError(f"Job handler '{kind}' is already registered")
+        _handlers[kind] = handler
+        return handler
+    return register
+
+
+# ==================== QUEUE ====================
+
+def enqueue(kind, user=None, **params):
+    """Queue a job; the worker picks it up once the current transaction commits."""
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job '{kind}'")
+    job = Job.objects.create(kind=kind, user=user, params=params)
+    if job_settings()['IN_PROCESS']:
+        transaction.on_commit(lambda: ensure_worker().wake())
+    return job
+
+
+def claim_next():
+    """
+    Atomically move the oldest queued job to running and return it (or None).
+    The conditional UPDATE makes sure two workers never claim the same job.
+    """
+    candidates = Job.objects.filter(status=Job.QUEUED).order_by('created_at', 'id').values_list('id', flat=True)
+    for job_id in candidates[:10]:
+        claimed = Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING, started_at=timezone.now()
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def run_job(job):
+    handler = _handlers.get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f"Unknown job '{job.kind}'")
+        message = handler(job, **job.params) or ''
+    except Exception as e:
+        logger.exception("Job %s failed", job.pk)
+        job.mark_finished(Job.FAILED, str(e))
+    else:
+        job.mark_finished(Job.DONE, message)
+
+
+def requeue_stale():
+    """Queue running jobs again whose worker died (started longer than STALE_AFTER ago)."""
+    cutoff = timezone.now() - timedelta(seconds=job_settings()['STALE_AFTER'])
+    return Job.objects.filter(status=Job.RUNNING, started_at__lt=cutoff).update(
+        status=Job.QUEUED, started_at=None, progress=0
+    )
+
+
+def upload_dir():
+    """Where uploads wait for the job that reads them (see purge_results)."""
+    return Path(job_settings()['RESULT_DIR']) / 'uploads'
+
+
+def purge_uploads():
+    """Delete uploads older than UPLOAD_MAX_AGE (abandoned or never consumed)."""
+    folder = upload_dir()
+    if not folder.exists():
+        return 0
+    cutoff = time.time() - UPLOAD_MAX_AGE
+    removed = 0
+    for path in folder.iterdir():
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+def purge_results(now=None):
+    """
+    Delete the result files of jobs that finished more than KEEP_RESULTS_DAYS ago,
+    and of jobs that no longer exist, plus stale uploads. The Job rows stay.
+    Returns the number of result folders removed.
+    """
+    purge_uploads()
+    config = job_settings()
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=config['KEEP_RESULTS_DAYS'])
+    root = Path(config['RESULT_DIR'])
+    if not root.exists():
+        return 0
+
+    folders = {int(path.name): path for path in root.iterdir() if path.is_dir() and path.name.isdigit()}
+    if not folders:
+        return 0
+    kept = set(Job.objects.filter(pk__in=folders).exclude(finished_at__lt=cutoff).values_list('pk', flat=True))
+    expired = [pk for pk in folders if pk not in kept]
+    for pk in expired:
+        shutil.rmtree(folders[pk], ignore_errors=True)
+    Job.objects.filter(pk__in=expired).update(result_file='', result_name='')
+    return len(expired)
+
+
+# ==================== WORKER ====================
+
+class Worker:
+    """Pool of threads draining the job queue; idle threads sleep until woken or polled."""
+
+    def __init__(self, workers=None, poll_interval=None):
+        config = job_settings()
+        self.workers = workers or config['WORKERS']
+        self.poll_interval = poll_interval or config['POLL_INTERVAL']
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._purged_at = None
+        self._tidy_lock = threading.Lock()
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self.run, name=f'job-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def run_once(self):
+        """Run one queued job; returns False if the queue was empty."""
+        close_old_connections()
+        try:
+            job = claim_next()
+            if job is None:
+                return False
+            run_job(job)
+            return True
+        finally:
+            close_old_connections()
+
+    def tidy_if_due(self):
+        """
+        Re-queue the jobs of dead workers and clean up expired results: when the
+        worker starts, then at most once per PURGE_INTERVAL.
+        """
+        if self._purged_at is not None and time.monotonic() - self._purged_at < PURGE_INTERVAL:
+            return
+        if not self._tidy_lock.acquire(blocking=False):
+            return  # another thread of this worker is on it
+        try:
+            self._purged_at = time.monotonic()
+            close_old_connections()
+            requeued = requeue_stale()
+            if requeued:
+                logger.warning("Re-queued %s stale jobs", requeued)
+            purge_results()
+        finally:
+            close_old_connections()
+            self._tidy_lock.release()
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.tidy_if_due()
+                if self.run_once():
+                    continue
+            except Exception:
+                logger.exception("Job worker error")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+
+def ensure_worker():
+    """The in-process worker, started on first use."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = Worker().start()
+    return _worker
+
+
+def start_with_first_request(**kwargs):
+    """
+    request_started handler (see JobsConfig.ready): start the in-process worker
+    with the first request, so jobs a restart left queued or running are picked
+    up without waiting for the next enqueue. Management commands never start it.
+    """
+    if _worker is None and job_settings()['IN_PROCESS']:
+        ensure_worker()
@@ -0,0 +1,116 @@
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import CustomUser
+from .models import Job
+from .runner import task, enqueue, claim_next, run_job, purge_results, upload_dir, UPLOAD_MAX_AGE, Worker
+
+
+@task('test_report')
+def build_test_report(job, rows):
+    job.set_progress(50, "Halfway")
+    job.save_result('report.csv', b'n\n' + str(rows).encode())
+    return f"{rows} rows"
+
+
+@task('test_broken')
+def broken_job(job):
+    raise ValueError("Nothing to do")
+
+
+class JobRunnerTests(TestCase):
+    def setUp(self):
+        self.results = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.results, ignore_errors=True)
+        settings = override_settings(JOBS={'IN_PROCESS': False, 'RESULT_DIR': self.results})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = CustomUser.objects.create_user('clerk', 'clerk@example.com', 'secret', is_staff=True)
+
+    def run_next(self):
+        job = claim_next()
+        run_job(job)
+        job.refresh_from_db()
+        return job
+
+    def test_enqueue_run_and_download(self):
+        queued = enqueue('test_report', user=self.user, rows=3)
+        self.assertEqual(queued.status, Job.QUEUED)
+        job = self.run_next()
+        self.assertEqual((job.pk, job.status, job.progress, job.message), (queued.pk, Job.DONE, 100, "3 rows"))
+        self.assertIsNone(claim_next())
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('admin:job_download', args=[job.pk]))
+        self.assertEqual(b''.join(response.streaming_content), b'n\n3')
+
+    def test_failed_job(self):
+        enqueue('test_broken', user=self.user)
+        with self.assertLogs('jobs.runner', 'ERROR'):
+            job = self.run_next()
+        self.assertEqual((job.status, job.message), (Job.FAILED, "Nothing to do"))
+
+    def test_status_view(self):
+        job = enqueue('test_report', user=self.user, rows=1)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('admin:job_status', args=[job.pk]))
+        self.assertContains(response, 'http-equiv="refresh"')  # reloads until finished
+
+        self.run_next()
+        response = self.client.get(reverse('admin:job_status', args=[job.pk]))
+        self.assertContains(response, "Download report.csv")
+        self.assertNotContains(response, 'http-equiv="refresh"')
+
+        # Other users' jobs are not visible
+        other = CustomUser.objects.create_user('other', 'other@example.com', 'secret', is_staff=True)
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse('admin:job_status', args=[job.pk])).status_code, 404)
+
+    def test_purge_expired_results(self):
+        enqueue('test_report', user=self.user, rows=1)
+        old = self.run_next()
+        enqueue('test_report', user=self.user, rows=2)
+        recent = self.run_next()
+        Job.objects.filter(pk=old.pk).update(finished_at=timezone.now() - timedelta(days=8))
+
+        self.assertEqual(purge_results(), 1)
+        self.assertFalse(Path(self.results, str(old.pk)).exists())
+        self.assertTrue(Path(recent.result_file).exists())
+        old.refresh_from_db()
+        self.assertEqual(old.result_file, '')
+
+    def test_purge_stale_uploads(self):
+        upload_dir().mkdir(parents=True)
+        stale, fresh = upload_dir() / 'stale.csv', upload_dir() / 'fresh.csv'
+        stale.write_text('a')
+        fresh.write_text('b')
+        old = time.time() - UPLOAD_MAX_AGE - 60
+        os.utime(stale, (old, old))
+
+        purge_results()
+        self.assertFalse(stale.exists())
+        self.assertTrue(fresh.exists())
+
+    def test_worker_start_requeues_stale_jobs(self):
+        job = Job.objects.create(kind='test_report', params={'rows': 1}, status=Job.RUNNING,
+                                 started_at=timezone.now() - timedelta(hours=2))
+        with mock.patch('jobs.runner.close_old_connections'), self.assertLogs('jobs.runner', 'WARNING'):
+            Worker(workers=1).tidy_if_due()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(claim_next(), job)
+
+    def test_first_request_starts_the_in_process_worker(self):
+        with mock.patch('jobs.runner.ensure_worker') as ensure_worker:
+            self.client.get(reverse('admin:login'))
+            ensure_worker.assert_not_called()  # IN_PROCESS is off in these tests
+            with override_settings(JOBS={'IN_PROCESS': True}):
+                self.client.get(reverse('admin:login'))
+            ensure_worker.assert_called_once()
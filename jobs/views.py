@@ -0,0 +1,38 @@
+from pathlib import Path
+from django.contrib import messages
+from django.http import FileResponse, Http404, HttpResponseRedirect
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+from .models import Job
+
+
+def _get_job(request, job_id):
+    jobs = Job.objects.all()
+    if not request.user.is_superuser:
+        jobs = jobs.filter(user=request.user)
+    return get_object_or_404(jobs, pk=job_id)
+
+
+def job_status(request, site, job_id):
+    """Progress of one job; reloads itself until the job has finished."""
+    job = _get_job(request, job_id)
+    context = {
+        **site.each_context(request),
+        'title': f"Job #{job.pk}",
+        'job': job,
+    }
+    return render(request, 'admin/job_status.html', context)
+
+
+def job_download(request, job_id):
+    job = _get_job(request, job_id)
+    path = Path(job.result_file) if job.result_file else None
+    if job.status != Job.DONE or path is None or not path.exists():
+        raise Http404("This job has no result to download.")
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=job.result_name)
+
+
+def redirect_to_job(request, job, message):
+    """Response for an admin action that queued `job`."""
+    messages.info(request, f"⏳ {message} Job #{job.pk} is queued.")
+    return HttpResponseRedirect(reverse('admin:job_status', args=[job.pk]))
@@ -1,9 +1,11 @@
 from django.contrib import admin
 from django import forms
 from .models import PurchaseReturn
-from django.db import transaction
 from django.contrib import messages
 from inventory.models import Stock
+from inventory.posting import post_purchase_returns
+from erp.exports import ExportMixin, export_as_csv, export_as_xlsx
+from erp.pagination import ApproximateCountMixin
 
 class StockChoiceField(forms.ModelChoiceField):
     def label_from_instance(self, obj):
@@ -18,27 +20,9 @@ class PurchaseReturnForm(forms.ModelForm):
 
 @admin.action(description="Process Return and Deduct Inventory")
 def process_return(modeladmin, request, queryset):
-    processed_count = 0
     try:
-        with transaction.atomic():
-            for ret in queryset:
-                if ret.is_processed:
-                    continue
+        processed_count = post_purchase_returns(queryset, user=request.user)
 
-                stock = ret.stock_item
-                # Lock stock row for safety
-                stock = Stock.objects.select_for_update().get(id=stock.id)
-
-                if stock.quantity < ret.quantity_returned:
-                    raise Exception(f"Insufficient stock for {stock.name}. Available: {stock.quantity}, Return Amount: {ret.quantity_returned}")
-
-                stock.quantity -= ret.quantity_returned
-                stock.save()
-
-                ret.is_processed = True
-                ret.save()
-                processed_count += 1
-        
         if processed_count > 0:
             messages.success(request, f"Successfully processed {processed_count} returns.")
         else:
@@ -48,10 +32,11 @@ def process_return(modeladmin, request, queryset):
         messages.error(request, f"Error processing returns: {e}")
 
 @admin.register(PurchaseReturn)
-class PurchaseReturnAdmin(admin.ModelAdmin):
+class PurchaseReturnAdmin(ApproximateCountMixin, ExportMixin, admin.ModelAdmin):
     form = PurchaseReturnForm
     list_display = ('stock_item', 'quantity_returned', 'is_processed', 'created_at')
     list_filter = ('is_processed', 'created_at')
+    list_select_related = ('stock_item__category',)
     search_fields = ('stock_item__name',)
 
     fieldsets = (
@@ -61,4 +46,10 @@ class PurchaseReturnAdmin(admin.ModelAdmin):
         }),
     )
 
-    actions = [process_return]
\ No newline at end of file
+    actions = [process_return, export_as_csv, export_as_xlsx]
+    export_fields = (
+        ('Product', 'stock_item__name'),
+        ('Quantity Returned', 'quantity_returned'),
+        ('Processed', 'is_processed'),
+        ('Created At', 'created_at'),
+    )
\ No newline at end of file
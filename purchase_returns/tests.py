@@ -1,3 +1,40 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from accounts.models import CustomUser
+from erp.testing import QueryBudgetMixin
+from inventory.models import Category, Stock
+from .models import PurchaseReturn
 
-# Create your tests here.
+
+@override_settings(JOBS={'IN_PROCESS': False})
+class PurchaseReturnAdminQueryTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(self.user)
+
+    def add_returns(self, count):
+        category = Category.objects.create(name=f'Category {Category.objects.count()}')
+        start = Stock.objects.count()
+        stocks = Stock.objects.bulk_create([
+            Stock(user=self.user, category=category, name=f'Item {start + i}', cost_price=100, quantity=50)
+            for i in range(count)
+        ])
+        return PurchaseReturn.objects.bulk_create([PurchaseReturn(stock_item=stock, quantity_returned=1) for stock in stocks])
+
+    def test_changelist(self):
+        url = reverse('admin:purchase_returns_purchasereturn_changelist')
+        for _ in range(2):
+            self.add_returns(30)
+            self.assertQueryBudget(url, 5)
+
+    def test_change_form(self):
+        url = reverse('admin:purchase_returns_purchasereturn_change', args=[self.add_returns(1)[0].pk])
+        for _ in range(2):
+            self.add_returns(30)
+            self.assertQueryBudget(url, 7)
+
+    def test_add_form(self):
+        url = reverse('admin:purchase_returns_purchasereturn_add')
+        for _ in range(2):
+            self.add_returns(30)
+            self.assertQueryBudget(url, 5)
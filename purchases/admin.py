@@ -1,9 +1,21 @@
+from pathlib import Path
+from uuid import uuid4
+from django import forms
 from django.contrib import admin
 from .models import Purchase
 from django.utils.html import format_html
 from django.contrib import messages
-from django.db import transaction
-from inventory.models import Stock
+from django.core import signing
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseRedirect
+from django.shortcuts import render
+from django.urls import path, reverse
+from jobs.runner import enqueue, upload_dir
+from jobs.views import redirect_to_job
+from erp.exports import ExportMixin, export_as_csv, export_as_xlsx
+from erp.pagination import ApproximateCountMixin
+from inventory.admin import StockListFilter, StockChoicesMixin
+from .imports import InvoiceImport
 
 @admin.action(description="Mark selected purchases as Received and Update Stock")
 def mark_as_received(modeladmin, request, queryset):
@@ -11,58 +23,50 @@ def mark_as_received(modeladmin, request, queryset):
         messages.error(request, "You don't have the permission to receive Purchases.")
         return
 
-    # Group purchases by Stock
-    purchase_groups = {}
-    for p in queryset:
-        if not p.is_received:
-            purchase_groups.setdefault(p.stock_item_id, []).append(p)
-
-    try:
-        with transaction.atomic():  # Lock everything safely
-            for stock_id, purchases in purchase_groups.items():
-
-                # Lock stock row
-                stock = Stock.objects.select_for_update().get(id=stock_id)
-
-                old_qty = stock.quantity
-                old_cost = stock.cost_price
-
-                total_new_qty = sum(p.quantity_purchased for p in purchases)
-                total_new_cost = sum(p.quantity_purchased * p.cost_price_per_unit for p in purchases)
-
-                # Update quantity
-                stock.quantity = old_qty + total_new_qty
+    ids = list(queryset.filter(is_received=False).values_list('pk', flat=True))
+    if not ids:
+        messages.warning(request, "No pending purchases were selected.")
+        return
 
-                # Weighted average cost
-                if stock.quantity > 0:
-                    new_avg_cost = ((old_qty * old_cost) + total_new_cost) / stock.quantity
-                    stock.cost_price = round(new_avg_cost, 2)
+    # Stock is updated by the background job worker
+    job = enqueue('receive_purchases', user=request.user, ids=ids)
+    return redirect_to_job(request, job, f"Receiving {len(ids)} purchases.")
 
-                # Update selling price if provided in any purchase
-                for p in purchases:
-                    if p.selling_price:
-                        stock.selling_price = p.selling_price
 
-                stock.save()
 
-                # Mark all purchases as received
-                for p in purchases:
-                    p.is_received = True
-                    p.save()
+class InvoiceUploadForm(forms.Form):
+    file = forms.FileField(help_text="CSV or XLSX with the columns stock, quantity, cost_price "
+                                     "(optional: purchase_date, category).")
+    create_stock = forms.BooleanField(required=False, label="Create stocks that don't exist yet")
+    category = forms.CharField(required=False, max_length=100,
+                               help_text="Category for new stocks when the file has no category column.")
+    receive = forms.BooleanField(required=False, label="Receive the purchases into stock")
+    skip_invalid = forms.BooleanField(required=False, label="Import the valid lines even if some are invalid")
 
-    except Exception as e:
-        messages.error(request, f"Error updating stock: {e}")
-        return
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if Path(upload.name).suffix.lower() not in ('.csv', '.xlsx', '.xlsm'):
+            raise forms.ValidationError("Upload a .csv or .xlsx file.")
+        return upload
 
-    messages.success(request, "Selected purchases marked as received and stock updated successfully.")
 
+def save_upload(upload):
+    """Keep an uploaded invoice until the import job has read it (stale ones are purged)."""
+    folder = upload_dir()
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / f"{uuid4().hex}{Path(upload.name).suffix.lower()}"
+    with open(path, 'wb') as f:
+        for chunk in upload.chunks():
+            f.write(chunk)
+    return path
 
 
 @admin.register(Purchase)
-class PurchaseAdmin(admin.ModelAdmin):
+class PurchaseAdmin(ApproximateCountMixin, StockChoicesMixin, ExportMixin, admin.ModelAdmin):
     list_display = ("stock_item", "quantity_purchased", 'selling_price', "cost_price_per_unit", 'total_cost',
                     "is_received", "purchase_date")
-    list_filter = ("is_received", "purchase_date", 'stock_item')
+    list_filter = ("is_received", "purchase_date", ('stock_item', StockListFilter))
+    list_select_related = ('stock_item__category',)
     readonly_fields = ('total_cost', 'selling_price', 'created_at', 'last_updated')
 
     fieldsets = (
@@ -80,7 +84,74 @@ class PurchaseAdmin(admin.ModelAdmin):
         }),
     )
     search_fields = ('stock_item__name',)
-    actions = [mark_as_received]
+    actions = [mark_as_received, export_as_csv, export_as_xlsx]
+    export_fields = (
+        ('Product', 'stock_item__name'),
+        ('Category', 'stock_item__category__name'),
+        ('Quantity', 'quantity_purchased'),
+        ('Cost Price / Unit', 'cost_price_per_unit'),
+        ('Minimum Selling Price', 'selling_price'),
+        ('Total Cost', 'total_cost'),
+        ('Received', 'is_received'),
+        ('Purchase Date', 'purchase_date'),
+    )
+    change_list_template = 'admin/purchases/purchase_change_list.html'
+
+    # Signs the confirmation of a validated upload
+    import_salt = 'purchases.invoice-import'
+
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='purchases_purchase_import'),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        """
+        Upload an invoice, see the validation report, then confirm: the import
+        itself runs as a background job.
+        """
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        form, report, token = InvoiceUploadForm(), None, None
+
+        if request.method == 'POST' and request.POST.get('token'):
+            try:
+                params = signing.loads(request.POST['token'], salt=self.import_salt, max_age=3600)
+            except signing.BadSignature:
+                messages.error(request, "This upload has expired, please upload the file again.")
+            else:
+                if 'cancel' in request.POST:
+                    Path(params['path']).unlink(missing_ok=True)
+                    messages.info(request, "Import cancelled.")
+                    return HttpResponseRedirect(reverse('admin:purchases_purchase_changelist'))
+                job = enqueue('import_purchases', user=request.user, **params)
+                return redirect_to_job(request, job, "Importing the invoice.")
+
+        elif request.method == 'POST':
+            form = InvoiceUploadForm(request.POST, request.FILES)
+            if form.is_valid():
+                options = {k: v for k, v in form.cleaned_data.items() if k != 'file'}
+                if options['receive'] and not request.user.is_superuser:
+                    messages.error(request, "You don't have the permission to receive Purchases.")
+                else:
+                    path = save_upload(form.cleaned_data['file'])
+                    report = InvoiceImport(
+                        path, request.user, create_stock=options['create_stock'], category=options['category'],
+                    ).validate()
+                    if report['valid'] and (options['skip_invalid'] or not report['error_count']):
+                        token = signing.dumps({'path': str(path), **options}, salt=self.import_salt)
+                    else:
+                        path.unlink(missing_ok=True)
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': "Import Supplier Invoice",
+            'opts': self.model._meta,
+            'form': form,
+            'report': report,
+            'token': token,
+        }
+        return render(request, 'admin/purchases/import_invoice.html', context)
 
 
 
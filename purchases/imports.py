@@ -0,0 +1,161 @@
+from django.db import transaction
+from django.utils import timezone
+from dashboard.cache import mark_dashboard_stale
+from erp.imports import read_rows, pick, to_int, to_float, to_datetime, RowError
+from inventory.models import Category, Stock
+from inventory.posting import post_purchase_receipts
+from .models import Purchase
+
+# Accepted header names per field
+STOCK = ('stock', 'product', 'item', 'name', 'stock_name', 'description')
+QUANTITY = ('quantity', 'qty', 'quantity_purchased')
+COST = ('cost_price', 'cost', 'unit_cost', 'rate', 'price', 'cost_price_per_unit')
+DATE = ('purchase_date', 'date', 'invoice_date')
+CATEGORY = ('category', 'group')
+
+# Rows listed in a validation report (the error CSV has all of them)
+REPORT_ERRORS = 50
+
+
+def minimum_selling_price(cost_price_per_unit):
+    """Same rule as Purchase.save(), which bulk_create skips."""
+    return round(cost_price_per_unit / 0.8, 2)
+
+
+class InvoiceImport:
+    """
+    Supplier invoice (CSV/XLSX, one line per product) to Purchase rows.
+
+    `validate()` reads the whole file without writing anything and returns a
+    report; `run()` validates, then saves in one transaction. Stocks are matched
+    by name (case-insensitive) against an index loaded once; unknown names are
+    errors unless `create_stock` is set, then they are created (quantity 0) in
+    the row's category or `category`.
+    """
+
+    def __init__(self, path, user, sheet=None, create_stock=False, category=None, batch_size=1000):
+        self.path = path
+        self.user = user
+        self.sheet = sheet
+        self.create_stock = create_stock
+        self.default_category = category
+        self.batch_size = batch_size
+
+        self.stocks = {name.lower(): pk for pk, name in Stock.objects.values_list('id', 'name')}
+        self.new_stocks = {}  # lower name -> (name, category name)
+
+    # ----- reading -----
+
+    def build(self, row):
+        name = str(pick(row, STOCK))
+        stock_id = self.stocks.get(name.lower())
+        if stock_id is None:
+            if not self.create_stock:
+                raise RowError(f"Unknown stock '{name}'")
+            category = pick(row, CATEGORY, required=False) or self.default_category
+            if not category:
+                raise RowError(f"New stock '{name}' needs a category")
+            self.new_stocks.setdefault(name.lower(), (name, str(category).strip()))
+
+        quantity = to_int(pick(row, QUANTITY), 'quantity')
+        cost = to_float(pick(row, COST), 'cost_price')
+        if quantity < 1 or cost < 0:
+            raise RowError("Quantity must be at least 1 and cost can't be negative")
+        purchase_date = pick(row, DATE, required=False)
+
+        return Purchase(
+            stock_item_id=stock_id,
+            quantity_purchased=quantity,
+            cost_price_per_unit=cost,
+            selling_price=minimum_selling_price(cost),
+            total_cost=quantity * cost,
+            purchase_date=(
+                timezone.localtime(to_datetime(purchase_date, 'purchase_date')).date()
+                if purchase_date is not None else timezone.localdate()
+            ),
+        ), name
+
+    def rows(self, errors=None):
+        """Stream (purchase, stock name) per valid line; invalid lines go to `errors(line, error, row)`."""
+        for line, row in read_rows(self.path, self.sheet):
+            try:
+                yield self.build(row)
+            except RowError as e:
+                if errors:
+                    errors(line, str(e), row)
+
+    def validate(self, error_report=None):
+        """
+        Read the whole file, save nothing. Returns {'lines', 'valid', 'quantity',
+        'total_cost', 'new_stocks', 'error_count', 'errors'}; `errors` lists the
+        first REPORT_ERRORS as (line, error).
+        """
+        report = {'lines': 0, 'valid': 0, 'quantity': 0, 'total_cost': 0, 'error_count': 0, 'errors': []}
+
+        def error(line, message, row):
+            report['error_count'] += 1
+            if len(report['errors']) < REPORT_ERRORS:
+                report['errors'].append((line, message))
+            if error_report:
+                error_report.add(line, message, row)
+
+        for purchase, _ in self.rows(error):
+            report['valid'] += 1
+            report['quantity'] += purchase.quantity_purchased
+            report['total_cost'] += purchase.total_cost
+        report['lines'] = report['valid'] + report['error_count']
+        report['total_cost'] = round(report['total_cost'], 2)
+        report['new_stocks'] = sorted(name for name, _ in self.new_stocks.values())
+        return report
+
+    # ----- saving -----
+
+    def _create_stocks(self):
+        """Create the new categories and stocks in bulk and add them to the index."""
+        if not self.new_stocks:
+            return
+        names = {category.lower(): category for _, category in self.new_stocks.values()}
+        categories = {c.name.lower(): c.pk for c in Category.objects.all()}
+        Category.objects.bulk_create([
+            Category(name=name) for key, name in names.items() if key not in categories
+        ], ignore_conflicts=True)
+        categories = {c.name.lower(): c.pk for c in Category.objects.all()}
+
+        Stock.objects.bulk_create([
+            Stock(user=self.user, category_id=categories[category.lower()], name=name)
+            for name, category in self.new_stocks.values()
+        ])
+        self.stocks.update({
+            name.lower(): pk
+            for pk, name in Stock.objects.filter(name__in=[n for n, _ in self.new_stocks.values()]).values_list('id', 'name')
+        })
+
+    def run(self, receive=False, skip_invalid=False, progress=None, error_report=None):
+        """
+        Validate, then import in one transaction: create the missing stocks,
+        bulk_create the purchases and, with `receive`, receive them all through one
+        batched stock posting. Nothing is saved while the file has invalid lines,
+        unless `skip_invalid`. Returns (report, number of purchases created).
+        """
+        report = self.validate(error_report)
+        if report['error_count'] and not skip_invalid:
+            return report, 0
+
+        created = []
+        with transaction.atomic():
+            self._create_stocks()
+            batch = []
+            for purchase, name in self.rows():
+                purchase.stock_item_id = self.stocks[name.lower()]
+                batch.append(purchase)
+                if len(batch) >= self.batch_size:
+                    created += Purchase.objects.bulk_create(batch)
+                    batch = []
+                    if progress:
+                        progress(len(created), report['valid'])
+            created += Purchase.objects.bulk_create(batch)
+
+            if receive and created:
+                post_purchase_receipts(Purchase.objects.filter(pk__in=[p.pk for p in created]), user=self.user)
+            mark_dashboard_stale()
+        return report, len(created)
@@ -0,0 +1,77 @@
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from accounts.models import CustomUser
+from erp.imports import ErrorReport
+from purchases.imports import InvoiceImport
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a supplier invoice from a CSV/XLSX file as purchases "
+        "(columns: stock, quantity, cost_price [, purchase_date, category])."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help="Path to the .csv or .xlsx file")
+        parser.add_argument('--user', required=True, help="Username the purchases and new stocks are booked under")
+        parser.add_argument('--sheet', help="Worksheet name (XLSX only, default: the active sheet)")
+        parser.add_argument('--receive', action='store_true', help="Also receive the purchases into stock")
+        parser.add_argument('--create-stock', action='store_true', help="Create stocks that don't exist yet")
+        parser.add_argument('--category', help="Category for new stocks when the file has no category column")
+        parser.add_argument('--skip-invalid', action='store_true',
+                            help="Import the valid lines even if some are invalid (default: import nothing)")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Only print the validation report")
+        parser.add_argument('--errors', help="Where to write the rejected rows (default: <file>.errors.csv)")
+
+    def handle(self, *args, **options):
+        path = Path(options['file'])
+        if not path.exists():
+            raise CommandError(f"File not found: {path}")
+        try:
+            user = CustomUser.objects.get(username=options['user'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"Unknown user '{options['user']}'")
+
+        invoice = InvoiceImport(
+            path, user, sheet=options['sheet'], create_stock=options['create_stock'],
+            category=options['category'], batch_size=options['batch_size'],
+        )
+        errors = ErrorReport(options['errors'] or path.with_name(f"{path.name}.errors.csv"))
+        started = time.monotonic()
+        try:
+            if options['dry_run']:
+                report, created = invoice.validate(errors), 0
+            else:
+                report, created = invoice.run(
+                    receive=options['receive'], skip_invalid=options['skip_invalid'], error_report=errors,
+                    progress=lambda done, total: self.stderr.write(f"  {done:,} / {total:,} purchases"),
+                )
+        finally:
+            errors.close()
+
+        self.print_report(report)
+        elapsed = time.monotonic() - started
+        if errors.count:
+            self.stdout.write(self.style.WARNING(f"⚠️ {errors.count:,} rows rejected, see {errors.path}"))
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"✅ Validated {report['lines']:,} lines in {elapsed:.1f}s, nothing saved."))
+        elif not created and report['error_count']:
+            raise CommandError("Nothing imported: fix the rejected rows or use --skip-invalid.")
+        else:
+            verb = "Imported and received" if options['receive'] else "Imported"
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {verb} {created:,} purchases in {elapsed:.1f}s ({created / max(elapsed, 0.001):,.0f} rows/s)"
+            ))
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"{report['lines']:,} lines: {report['valid']:,} valid, {report['error_count']:,} invalid, "
+            f"{report['quantity']:,} units, total cost {report['total_cost']:,.2f}"
+        )
+        if report['new_stocks']:
+            self.stdout.write(f"New stocks ({len(report['new_stocks'])}): {', '.join(report['new_stocks'][:20])}"
+                              + (" ..." if len(report['new_stocks']) > 20 else ""))
+        for line, error in report['errors'][:10]:
+            self.stdout.write(f"  line {line}: {error}")
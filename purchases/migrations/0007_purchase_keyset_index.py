@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-17 01:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchases', '0006_alter_purchase_selling_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(fields=['purchase_date', 'created_at', 'id'], name='purchase_date_created_id_idx'),
+        ),
+    ]
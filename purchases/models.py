@@ -20,6 +20,10 @@ class Purchase(models.Model):
         ordering = ['-purchase_date']
         verbose_name = "Add Purchase"
         verbose_name_plural = "Add Purchases"
+        indexes = [
+            # Keyset pages of the purchases list (ORDER BY purchase_date, created_at, id)
+            models.Index(fields=['purchase_date', 'created_at', 'id'], name='purchase_date_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.stock_item.category.name} - {self.quantity_purchased} pcs"
@@ -0,0 +1,29 @@
+from pathlib import Path
+from jobs.runner import task
+from inventory.posting import post_purchase_receipts
+from .imports import InvoiceImport
+from .models import Purchase
+
+
+@task('receive_purchases')
+def receive_purchases(job, ids):
+    job.set_progress(10, f"Receiving {len(ids)} purchases")
+    received = post_purchase_receipts(Purchase.objects.filter(pk__in=ids), user=job.user)
+    return f"{received} purchases marked as received and stock updated successfully."
+
+
+@task('import_purchases')
+def import_purchases(job, path, create_stock=False, category=None, receive=False, skip_invalid=False):
+    path = Path(path)
+    job.set_progress(10, "Validating the invoice")
+    try:
+        report, created = InvoiceImport(path, job.user, create_stock=create_stock, category=category).run(
+            receive=receive, skip_invalid=skip_invalid,
+            progress=lambda done, total: job.set_progress(10 + 80 * done // max(total, 1), f"{done} of {total} lines"),
+        )
+    finally:
+        path.unlink(missing_ok=True)
+    if not created:
+        raise ValueError(f"Nothing imported: {report['error_count']} invalid lines.")
+    received = " and received" if receive else ""
+    return f"{created} purchases imported{received}, total cost {report['total_cost']:,.2f}."
@@ -1,3 +1,96 @@
-from django.test import TestCase
+import tempfile
+from pathlib import Path
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from accounts.models import CustomUser
+from erp.testing import QueryBudgetMixin
+from inventory.models import Category, Stock
+from jobs.models import Job
+from jobs.runner import upload_dir
+from .imports import InvoiceImport
+from .models import Purchase
 
-# Create your tests here.
+
+@override_settings(JOBS={'IN_PROCESS': False})
+class PurchaseAdminQueryTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(self.user)
+
+    def add_purchases(self, count):
+        category = Category.objects.create(name=f'Category {Category.objects.count()}')
+        start = Stock.objects.count()
+        stocks = Stock.objects.bulk_create([
+            Stock(user=self.user, category=category, name=f'Item {start + i}', cost_price=100, quantity=50)
+            for i in range(count)
+        ])
+        return Purchase.objects.bulk_create([
+            Purchase(stock_item=stock, quantity_purchased=10, cost_price_per_unit=100, selling_price=125, total_cost=1000)
+            for stock in stocks
+        ])
+
+    def test_changelist(self):
+        url = reverse('admin:purchases_purchase_changelist')
+        for _ in range(2):
+            self.add_purchases(30)
+            self.assertQueryBudget(url, 6)
+
+    def test_change_form(self):
+        url = reverse('admin:purchases_purchase_change', args=[self.add_purchases(1)[0].pk])
+        for _ in range(2):
+            self.add_purchases(30)
+            self.assertQueryBudget(url, 8)
+
+    def test_add_form(self):
+        url = reverse('admin:purchases_purchase_add')
+        for _ in range(2):
+            self.add_purchases(30)
+            self.assertQueryBudget(url, 5)
+
+
+class InvoiceImportTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(username='owner', email='owner@example.com')
+        self.stock = Stock.objects.create(user=self.user, category=Category.objects.create(name='Shoes'),
+                                          name='Item 0', cost_price=100, quantity=50)
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.path = Path(folder.name) / 'invoice.csv'
+        self.path.write_text(
+            "Product,Qty,Rate,Category\n"
+            f"{self.stock.name.upper()},50,120,\n"
+            "New Item,10,40,Gadgets\n"
+            "Broken,x,40,\n"
+        )
+
+    def test_invalid_lines_block_the_import(self):
+        report, created = InvoiceImport(self.path, self.user, create_stock=True).run()
+        self.assertEqual((report['valid'], report['error_count'], created), (2, 1, 0))
+        self.assertFalse(Purchase.objects.exists())
+
+    def test_import_and_receive(self):
+        report, created = InvoiceImport(self.path, self.user, create_stock=True).run(receive=True, skip_invalid=True)
+        self.assertEqual(created, 2)
+        self.assertEqual(report['new_stocks'], ['New Item'])
+        purchase = Purchase.objects.get(stock_item=self.stock)
+        self.assertEqual((purchase.total_cost, purchase.selling_price, purchase.is_received), (6000, 150, True))
+        self.stock.refresh_from_db()
+        self.assertEqual((self.stock.quantity, self.stock.cost_price), (100, 110))
+
+    def test_cancelled_upload_is_deleted(self):
+        admin = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(admin)
+        url = reverse('admin:purchases_purchase_import')
+        with override_settings(JOBS={'IN_PROCESS': False, 'RESULT_DIR': self.path.parent}):
+            response = self.client.post(url, {
+                'file': SimpleUploadedFile('invoice.csv', self.path.read_bytes()),
+                'create_stock': 'on', 'skip_invalid': 'on',
+            })
+            token = response.context['token']
+            self.assertEqual(len(list(upload_dir().iterdir())), 1)
+
+            response = self.client.post(url, {'token': token, 'cancel': '1'})
+            self.assertRedirects(response, reverse('admin:purchases_purchase_changelist'))
+            self.assertEqual(list(upload_dir().iterdir()), [])
+            self.assertFalse(Job.objects.exists())
@@ -1,13 +1,19 @@
 from django.contrib import admin
-from .models import Sales
+from .models import Sales, ArchivedSale
 from django.utils.html import format_html
 from django.contrib import messages
-from django.http import HttpResponse
-from .reports import generate_sales_report
+from django.http import FileResponse
+from . import report_cache
 from datetime import datetime
 from django.utils import timezone
-from django.db import transaction
-from inventory.models import Stock
+from django.db.models import Min, Max
+from jobs.runner import enqueue
+from jobs.views import redirect_to_job
+from erp.exports import ExportMixin, export_as_csv, export_as_xlsx
+from erp.pagination import ApproximateCountMixin
+from inventory.admin import StockListFilter, StockChoicesMixin
+from django.urls import reverse
+from .archive import archived_sales, archived_through, requested_start
 
 def get_local_date(dt):
     """Convert datetime to Asia/Kolkata local date."""
@@ -20,47 +26,14 @@ def verify_sale(modeladmin, request, queryset):
         messages.error(request, "You don't have permission to verify Sales.")
         return
 
-    verified_count = 0
-
-    # Group sales by product stock
-    sales_grouped = {}
-    for sale in queryset:
-        if not sale.is_verified:
-            sales_grouped.setdefault(sale.stock_id, []).append(sale)
-
-    try:
-        with transaction.atomic():  # Lock the whole process
-            for stock_id, sales_list in sales_grouped.items():
-
-                # Lock the stock row
-                stock = Stock.objects.select_for_update().get(id=stock_id)
-
-                # Calculate total qty required
-                total_required = sum(s.quantity_sold for s in sales_list)
-
-                # If not enough stock, skip all sales of this product
-                if stock.quantity < total_required:
-                    continue
-
-                # Deduct stock
-                stock.quantity -= total_required
-                stock.save()
-
-                # Mark all sales as verified
-                for sale in sales_list:
-                    sale.is_verified = True
-                    sale.save()
-
-                verified_count += len(sales_list)
-
-    except Exception as e:
-        messages.error(request, f"Error verifying sales: {e}")
+    ids = list(queryset.filter(is_verified=False).values_list('pk', flat=True))
+    if not ids:
+        messages.warning(request, "No sales were verified.")
         return
 
-    if verified_count > 0:
-        messages.success(request, f"Successfully verified {verified_count} sales.")
-    else:
-        messages.warning(request, "No sales were verified.")
+    # Verification runs in the background job worker
+    job = enqueue('verify_sales', user=request.user, ids=ids)
+    return redirect_to_job(request, job, f"Verifying {len(ids)} sales.")
 
 
 @admin.action(description="📊 Download Sales Report")
@@ -75,8 +48,8 @@ def download_sales_report(modeladmin, request, queryset):
     def local_date(dt):
         return timezone.localtime(dt).date()
 
-    # Get current filtered queryset (ignore selected checkboxes)
-    filtered_qs = modeladmin.get_queryset(request)
+    # Rows matching the changelist filters and search (ignore selected checkboxes)
+    filtered_qs = report_cache.report_queryset(request.GET)
 
     # Get filter dates from URL params
     start_date_str = request.GET.get('sold_on__date__gte')
@@ -96,33 +69,41 @@ def download_sales_report(modeladmin, request, queryset):
 
     # --- Case 2: If filters missing OR parsing failed → determine dates from queryset ---
     if not start_date or not end_date:
-        if filtered_qs.exists():
-            start_date = local_date(filtered_qs.earliest('sold_on').sold_on)
-            end_date = local_date(filtered_qs.latest('sold_on').sold_on)
+        # Archived days count too, so an unbounded report covers the whole history
+        sources = [filtered_qs, archived_sales(params=request.GET)]
+        bounds = [
+            source.aggregate(first=Min('sold_on'), last=Max('sold_on'))
+            for source in sources if source is not None
+        ]
+        firsts = [b['first'] for b in bounds if b['first']]
+        if firsts:
+            start_date = local_date(min(firsts))
+            end_date = local_date(max(b['last'] for b in bounds if b['last']))
         else:
             today = local_date(timezone.now())
             start_date = today
             end_date = today
 
-    # --- Generate the PDF ---
-    try:
-        buffer = generate_sales_report(start_date, end_date, filtered_qs)
-
-        response = HttpResponse(buffer, content_type='application/pdf')
+    # --- Serve unchanged periods straight from the report cache ---
+    report_qs = report_cache.report_queryset(request.GET, start_date, end_date)
+    path = report_cache.get(report_cache.report_key(start_date, end_date, request.GET, report_qs))
+    if path is not None:
         filename = f"Sales_Report_{start_date}_to_{end_date}.pdf"
-        response['Content-Disposition'] = f'attachment; filename=\"{filename}\"'
-
         messages.success(request, f"📈 Sales report generated for {start_date} → {end_date}")
-        return response
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=filename,
+                            content_type='application/pdf')
 
-    except Exception as e:
-        messages.error(request, f"❌ Error generating report: {str(e)}")
-        return
+    # --- Otherwise build the PDF in the background ---
+    job = enqueue(
+        'sales_report', user=request.user,
+        start_date=start_date.isoformat(), end_date=end_date.isoformat(), filters=request.GET.urlencode(),
+    )
+    return redirect_to_job(request, job, f"Building the sales report for {start_date} → {end_date}.")
 
 
 
 @admin.register(Sales)
-class SalesAdmin(admin.ModelAdmin):
+class SalesAdmin(ApproximateCountMixin, StockChoicesMixin, ExportMixin, admin.ModelAdmin):
     list_display = (
         'stock',
         'quantity_sold',
@@ -132,13 +113,37 @@ class SalesAdmin(admin.ModelAdmin):
         'sold_on',
         'is_verified_display'
     )
-    list_filter = ('sold_on', 'stock__category', 'is_verified', 'stock')
+    list_filter = ('sold_on', 'stock__category', 'is_verified', ('stock', StockListFilter))
+    list_select_related = ('stock__category',)
     search_fields = ('stock__name',)
     readonly_fields = ('total_amount', 'gross_profit', 'sold_on')
-    actions = [verify_sale, download_sales_report]
+    actions = [verify_sale, download_sales_report, export_as_csv, export_as_xlsx]
+    export_fields = (
+        ('Product', 'stock__name'),
+        ('Category', 'stock__category__name'),
+        ('Quantity', 'quantity_sold'),
+        ('Selling Price', 'selling_price'),
+        ('Total Amount', 'total_amount'),
+        ('Gross Profit', 'gross_profit'),
+        ('Sold On', 'sold_on'),
+        ('Verified', 'is_verified'),
+    )
     
     # Add date hierarchy for better date filtering
     date_hierarchy = 'sold_on'
+    change_list_template = 'admin/sales/sales_change_list.html'
+
+    def changelist_view(self, request, extra_context=None):
+        # Link to the archive (same filters) only when the requested period reaches into it
+        last_archived = archived_through()
+        start = requested_start(request.GET)
+        if last_archived and (start is None or start <= last_archived):
+            extra_context = {
+                **(extra_context or {}),
+                'archived_through': last_archived,
+                'archive_url': f"{reverse('admin:sales_archivedsale_changelist')}?{request.GET.urlencode()}",
+            }
+        return super().changelist_view(request, extra_context)
 
     def is_verified_display(self, obj):
         if obj.is_verified:
@@ -171,4 +176,26 @@ class SalesAdmin(admin.ModelAdmin):
             obj.gross_profit = (obj.selling_price - obj.stock.cost_price) * obj.quantity_sold
         else:
             obj.gross_profit = 0
-        super().save_model(request, obj, form, change)
\ No newline at end of file
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(ArchivedSale)
+class ArchivedSaleAdmin(ApproximateCountMixin, ExportMixin, admin.ModelAdmin):
+    """Read-only view of the sales moved out by `manage.py archive_sales`."""
+    list_display = ('stock', 'quantity_sold', 'selling_price', 'total_amount', 'gross_profit', 'sold_on', 'archived_at')
+    list_filter = ('sold_on', 'stock__category', ('stock', StockListFilter))
+    list_select_related = ('stock__category',)
+    search_fields = ('stock__name',)
+    date_hierarchy = 'sold_on'
+    actions = [export_as_csv, export_as_xlsx]
+    export_fields = SalesAdmin.export_fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        # Deleting archived rows would leave the rollups out of step with the raw data
+        return False
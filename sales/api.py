@@ -0,0 +1,175 @@
+import hashlib
+import json
+from django.db import IntegrityError, transaction
+from django.db.models import Sum, Q
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse
+from django.middleware.csrf import get_token
+from django.views.decorators.http import require_http_methods
+from inventory.models import Stock
+from dashboard.cache import mark_dashboard_stale
+from dashboard.live import notify_sales_changed
+from .models import Sales, SaleBatch
+
+MAX_CART_ITEMS = 100
+
+
+class CartError(Exception):
+    def __init__(self, errors):
+        super().__init__("Invalid cart")
+        self.errors = errors
+
+
+def _parse_items(items):
+    """[(stock_id, quantity, price)] from the posted items, or CartError."""
+    if not isinstance(items, list) or not items:
+        raise CartError(["'items' must be a non-empty list."])
+    if len(items) > MAX_CART_ITEMS:
+        raise CartError([f"A cart can have at most {MAX_CART_ITEMS} items."])
+
+    lines, errors = [], []
+    for i, item in enumerate(items):
+        try:
+            stock_id = int(item['stock'])
+            quantity = int(item['quantity'])
+            price = float(item['price'])
+        except (KeyError, TypeError, ValueError):
+            errors.append(f"Item {i}: 'stock', 'quantity' and 'price' are required numbers.")
+            continue
+        if quantity < 1 or price < 0:
+            errors.append(f"Item {i}: quantity must be at least 1 and price can't be negative.")
+            continue
+        lines.append((stock_id, quantity, price))
+    if errors:
+        raise CartError(errors)
+    return lines
+
+
+def _post_cart(lines, user):
+    """
+    Validate availability and bulk_create the sales. Returns the response payload.
+
+    Must run inside a transaction: the cart's Stock rows are locked first, so two
+    concurrent carts for the same stock check availability one after the other
+    and cannot oversell it. Partners can only sell their own stock.
+    """
+    stock_ids = {stock_id for stock_id, _, _ in lines}
+    allowed = Stock.objects.all() if user.is_superuser else Stock.objects.filter(user=user)
+    # Locked in id order like inventory.posting.lock_stocks, so concurrent carts cannot
+    # deadlock. A separate statement: FOR UPDATE is not allowed with the aggregate below.
+    list(allowed.select_for_update().filter(id__in=stock_ids).order_by('id').values_list('id', flat=True))
+
+    # On-hand quantity minus sales still waiting for verification
+    stocks = {
+        stock.id: stock
+        for stock in allowed.filter(id__in=stock_ids).annotate(
+            pending=Coalesce(Sum('sales__quantity_sold', filter=Q(sales__is_verified=False)), 0)
+        ).only('id', 'name', 'quantity', 'cost_price')
+    }
+
+    wanted = {}
+    for stock_id, quantity, _ in lines:
+        wanted[stock_id] = wanted.get(stock_id, 0) + quantity
+
+    errors = []
+    for stock_id, quantity in wanted.items():
+        stock = stocks.get(stock_id)
+        if stock is None:
+            errors.append(f"Stock {stock_id} does not exist.")
+        elif stock.quantity - stock.pending < quantity:
+            errors.append(
+                f"Insufficient stock for {stock.name}. Available: {stock.quantity - stock.pending}, Requested: {quantity}"
+            )
+    if errors:
+        raise CartError(errors)
+
+    # Cost price is snapshotted here, as Sales.save() would do per row
+    sales = []
+    for stock_id, quantity, price in lines:
+        stock = stocks[stock_id]
+        sales.append(Sales(
+            stock=stock,
+            quantity_sold=quantity,
+            selling_price=price,
+            total_amount=quantity * price,
+            gross_profit=(price - stock.cost_price) * quantity,
+        ))
+    Sales.objects.bulk_create(sales)
+
+    # bulk_create sends no post_save signals
+    mark_dashboard_stale()
+    notify_sales_changed('created')
+
+    return {
+        'sales': [sale.pk for sale in sales],
+        'items': len(sales),
+        'total_amount': round(sum(sale.total_amount for sale in sales), 2),
+        'gross_profit': round(sum(sale.gross_profit for sale in sales), 2),
+    }
+
+
+def _replay(batch, request_hash):
+    if batch.request_hash != request_hash:
+        return JsonResponse(
+            {'errors': ["This idempotency key was already used for a different cart."]}, status=409
+        )
+    response = JsonResponse(batch.response, status=200)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+@require_http_methods(['GET', 'POST'])
+def post_sales(request):
+    """
+    Point-of-sale cart: creates all lines as (unverified) sales in one transaction.
+
+    POST {"idempotency_key": "...", "items": [{"stock": 1, "quantity": 2, "price": 99.5}, ...]}
+    The key may also be sent as an Idempotency-Key header. Retrying with the same
+    key and cart returns the original response instead of creating the sales again.
+
+    Clients use the admin session, so POSTs need Django's CSRF token: log in at
+    the admin login page, GET this URL for {"csrf_token": ...} (it also sets the
+    csrftoken cookie) and send it back in an X-CSRFToken header.
+    """
+    if not request.user.has_perm('sales.add_sales'):
+        return JsonResponse({'errors': ["You don't have permission to add Sales."]}, status=403)
+    if request.method == 'GET':
+        return JsonResponse({'csrf_token': get_token(request)})
+
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'errors': ["Request body must be JSON."]}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'errors': ["Request body must be a JSON object."]}, status=400)
+
+    key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+    if not key or not isinstance(key, str) or len(key) > 100:
+        return JsonResponse({'errors': ["An idempotency key (max 100 characters) is required."]}, status=400)
+
+    try:
+        lines = _parse_items(data.get('items'))
+    except CartError as e:
+        return JsonResponse({'errors': e.errors}, status=400)
+    request_hash = hashlib.sha256(json.dumps(lines).encode()).hexdigest()
+
+    batch = SaleBatch.objects.filter(user=request.user, idempotency_key=key).first()
+    if batch is not None:
+        return _replay(batch, request_hash)
+
+    try:
+        with transaction.atomic():
+            # The unique (user, key) row makes a concurrent retry wait here, then fail
+            batch = SaleBatch.objects.create(user=request.user, idempotency_key=key, request_hash=request_hash)
+            payload = {'idempotency_key': key, **_post_cart(lines, request.user)}
+            batch.response = payload
+            batch.save(update_fields=['response'])
+    except CartError as e:
+        return JsonResponse({'errors': e.errors}, status=400)
+    except IntegrityError:
+        batch = SaleBatch.objects.filter(user=request.user, idempotency_key=key).first()
+        if batch is None:
+            raise
+        return _replay(batch, request_hash)
+
+    return JsonResponse(payload, status=201)
@@ -0,0 +1,127 @@
+from datetime import date, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min, Max
+from django.http import QueryDict
+from django.utils import timezone
+from . import report_cache
+from .models import Sales, ArchivedSale
+from .rollups import local_day_bounds, rebuild_rollups, rollups_unchanged
+
+DEFAULTS = {
+    'AFTER_DAYS': 365,     # verified sales older than this are archived
+    'BATCH_SIZE': 5000,    # rows moved per transaction
+}
+
+# Columns copied from Sales to ArchivedSale (besides the id)
+COPIED_FIELDS = ('stock_id', 'quantity_sold', 'selling_price', 'total_amount', 'gross_profit', 'sold_on')
+
+# Sales fields a changelist filter may use on ArchivedSale too (its id is not the sale's)
+SHARED_FIELDS = {'stock', 'quantity_sold', 'selling_price', 'total_amount', 'gross_profit', 'sold_on', 'is_verified'}
+
+
+def archive_settings():
+    return {**DEFAULTS, **getattr(settings, 'SALES_ARCHIVE', {})}
+
+
+def archive_horizon(today=None):
+    """First local day that stays in the hot Sales table."""
+    today = today or timezone.localdate()
+    return today - timedelta(days=archive_settings()['AFTER_DAYS'])
+
+
+# ==================== MOVING ROWS ====================
+
+def archivable_sales(before):
+    """Verified sales sold before the local day `before`."""
+    return Sales.objects.filter(is_verified=True, sold_on__lt=local_day_bounds(before, before)[0])
+
+
+def archive_sales(before=None, batch_size=None, progress=None):
+    """
+    Move verified sales sold before `before` (default: the horizon) into ArchivedSale.
+
+    The daily rollups of those days are rebuilt first, so the per-day, per-stock
+    totals stay behind in DailySalesRollup. Rows then move in batches, each one
+    copied and deleted in its own transaction. Returns the number of sales moved.
+    """
+    before = before or archive_horizon()
+    batch_size = batch_size or archive_settings()['BATCH_SIZE']
+    candidates = archivable_sales(before)
+
+    first = candidates.aggregate(first=Min('sold_on'))['first']
+    if first is None:
+        return 0
+    rebuild_rollups(timezone.localtime(first).date(), before - timedelta(days=1))
+
+    moved = 0
+    while True:
+        with transaction.atomic(), rollups_unchanged():
+            rows = list(candidates.order_by('id').values('id', *COPIED_FIELDS)[:batch_size])
+            if not rows:
+                break
+            ids = [row.pop('id') for row in rows]
+            ArchivedSale.objects.bulk_create(
+                [ArchivedSale(sale_id=sale_id, **row) for sale_id, row in zip(ids, rows)]
+            )
+            Sales.objects.filter(id__in=ids).delete()
+        moved += len(ids)
+        if progress:
+            progress(moved)
+
+    return moved
+
+
+# ==================== READING ====================
+
+def archived_through():
+    """Local date of the newest archived sale, or None while the archive is empty."""
+    last = ArchivedSale.objects.aggregate(last=Max('sold_on'))['last']
+    return timezone.localtime(last).date() if last else None
+
+
+def reaches_archive(start_date):
+    """True when a range starting at `start_date` (None = unbounded) includes archived days."""
+    last = archived_through()
+    return last is not None and (start_date is None or start_date <= last)
+
+
+def archived_sales(start_date=None, end_date=None, params=None):
+    """
+    ArchivedSale rows in [start_date, end_date] (either side may be None) matching
+    the changelist filters and search in `params`, or None when the range doesn't
+    reach the archive or a filter has no archive equivalent, so callers skip the
+    table entirely rather than report rows the filters would have excluded.
+    """
+    if not reaches_archive(start_date):
+        return None
+    params = params if params is not None else QueryDict()
+    for name in params:
+        if name not in report_cache.NON_LOOKUP_PARAMS and name.split('__')[0] not in SHARED_FIELDS:
+            return None
+    queryset = report_cache.report_queryset(params, queryset=ArchivedSale.objects.all())
+    if start_date:
+        queryset = queryset.filter(sold_on__gte=local_day_bounds(start_date, start_date)[0])
+    if end_date:
+        queryset = queryset.filter(sold_on__lt=local_day_bounds(end_date, end_date)[1])
+    return queryset
+
+
+def requested_start(params):
+    """
+    First day asked for by changelist/report query params, or None when the
+    request has no lower date bound (date filters and date_hierarchy drill-down).
+    """
+    value = params.get('sold_on__date__gte') or params.get('sold_on__gte')
+    if value:
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    year = params.get('sold_on__year')
+    if year:
+        try:
+            return date(int(year), int(params.get('sold_on__month') or 1), int(params.get('sold_on__day') or 1))
+        except ValueError:
+            return None
+    return None
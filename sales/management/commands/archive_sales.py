@@ -0,0 +1,47 @@
+import time
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from sales.archive import archive_horizon, archivable_sales, archive_sales, archive_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Move verified sales older than the archive horizon (SALES_ARCHIVE['AFTER_DAYS']) "
+        "from the Sales table into the sales archive. Daily rollup totals are kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help="Archive sales sold before this day (YYYY-MM-DD).")
+        parser.add_argument('--days', type=int, help="Archive sales older than this many days.")
+        parser.add_argument('--batch-size', type=int, help="Rows moved per transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the sales that would move.")
+
+    def handle(self, *args, **options):
+        if options['before'] and options['days'] is not None:
+            raise CommandError("Use either --before or --days, not both.")
+        if options['before']:
+            try:
+                before = datetime.strptime(options['before'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError("Invalid date format. Please use YYYY-MM-DD.")
+        elif options['days'] is not None:
+            before = timezone.localdate() - timedelta(days=options['days'])
+        else:
+            before = archive_horizon()
+
+        if options['dry_run']:
+            count = archivable_sales(before).count()
+            self.stdout.write(f"{count:,} verified sales sold before {before} would be archived.")
+            return
+
+        batch_size = options['batch_size'] or archive_settings()['BATCH_SIZE']
+        started = time.monotonic()
+        moved = archive_sales(
+            before, batch_size,
+            progress=lambda moved: self.stderr.write(f"  {moved:,} sales archived"),
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Archived {moved:,} sales sold before {before} in {elapsed:.1f}s."
+        ))
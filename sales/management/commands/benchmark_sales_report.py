@@ -0,0 +1,166 @@
+import json
+import platform
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+import django
+import reportlab
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+from accounts.models import CustomUser
+from inventory.models import Category, Stock
+from sales.models import Sales
+from sales import reports
+
+ALIAS = 'report_benchmark'
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark generate_sales_report on synthetic data in a scratch SQLite database "
+        "and print the timings, peak memory and PDF size as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                            help="Number of sales rows per run (default: 1000 10000 100000)")
+        parser.add_argument('--stocks', type=int, default=200, help="Synthetic stock items")
+        parser.add_argument('--repeat', type=int, default=1, help="Timed runs per size; the fastest is kept")
+        parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc run")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help="Write the JSON here instead of stdout")
+
+    def handle(self, *args, **options):
+        folder = tempfile.mkdtemp(prefix='report_benchmark_')
+        self._open_scratch_db(Path(folder) / 'benchmark.sqlite3')
+        try:
+            results = [self._bench_size(size, options) for size in sorted(options['sizes'])]
+        finally:
+            connections[ALIAS].close()
+            del connections.settings[ALIAS]
+            shutil.rmtree(folder, ignore_errors=True)
+
+        payload = json.dumps({
+            'benchmark': 'sales.reports.generate_sales_report',
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'reportlab': reportlab.Version,
+            'fast_table_threshold': reports.FAST_TABLE_THRESHOLD,
+            'results': results,
+        }, indent=2)
+
+        if options['output']:
+            Path(options['output']).write_text(payload)
+            self.stderr.write(self.style.SUCCESS(f"✅ Results written to {options['output']}"))
+        else:
+            self.stdout.write(payload)
+
+    # ==================== SCRATCH DATABASE ====================
+
+    def _open_scratch_db(self, path):
+        config = connections.configure_settings({
+            'default': dict(settings.DATABASES['default']),
+            ALIAS: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(path)},
+        })
+        connections.settings[ALIAS] = config[ALIAS]
+        call_command('migrate', database=ALIAS, verbosity=0)
+
+    def _seed(self, size, options):
+        """Replace the scratch data with `size` sales spread over one month."""
+        rng = random.Random(options['seed'])
+        # Raw deletes: no cascade collection and no signals, whose handlers
+        # (rollups, dashboard version) must never fire for the scratch data
+        for model in (Sales, Stock, Category, CustomUser):
+            model.objects.using(ALIAS).all()._raw_delete(ALIAS)
+
+        user = CustomUser(username='benchmark', email='benchmark@example.com')
+        user.save(using=ALIAS)
+        categories = Category.objects.using(ALIAS).bulk_create(
+            [Category(name=f'Category {i}') for i in range(10)]
+        )
+        stocks = Stock.objects.using(ALIAS).bulk_create([
+            Stock(
+                user=user,
+                category=rng.choice(categories),
+                name=f'Product {i:05d}',
+                cost_price=rng.randint(50, 500),
+                quantity=rng.randint(0, 1000),
+            )
+            for i in range(options['stocks'])
+        ])
+
+        end = timezone.now()
+        batch = []
+        for _ in range(size):
+            stock = rng.choice(stocks)
+            quantity = rng.randint(1, 5)
+            price = stock.cost_price * rng.uniform(0.9, 1.6)
+            batch.append(Sales(
+                stock=stock,
+                quantity_sold=quantity,
+                selling_price=round(price, 2),
+                total_amount=round(price * quantity, 2),
+                gross_profit=round((price - stock.cost_price) * quantity, 2),
+                sold_on=end - timedelta(seconds=rng.randint(0, 30 * 24 * 3600)),
+                is_verified=rng.random() < 0.9,
+            ))
+            if len(batch) == 5000:
+                Sales.objects.using(ALIAS).bulk_create(batch)
+                batch = []
+        if batch:
+            Sales.objects.using(ALIAS).bulk_create(batch)
+        return (end - timedelta(days=30)).date(), timezone.localtime(end).date()
+
+    # ==================== MEASUREMENT ====================
+
+    def _run(self, start_date, end_date):
+        """One report build; returns the stage timings and the PDF size."""
+        marks = [('start', time.perf_counter())]
+        buffer = reports.generate_sales_report(
+            start_date, end_date, Sales.objects.using(ALIAS).all(),
+            progress=lambda percent, message: marks.append((percent, time.perf_counter())),
+        )
+        marks.append(('end', time.perf_counter()))
+        at = dict(marks)
+        return {
+            'summary_query_seconds': round(at[20] - at['start'], 4),  # KPI aggregate + top product
+            'rows_seconds': round(at[60] - at[20], 4),                # stream rows into flowables
+            'build_seconds': round(at['end'] - at[60], 4),            # ReportLab layout + PDF
+            'total_seconds': round(at['end'] - at['start'], 4),
+        }, len(buffer.getvalue())
+
+    def _bench_size(self, size, options):
+        self.stderr.write(f"Seeding {size:,} sales ...")
+        start_date, end_date = self._seed(size, options)
+
+        runs = []
+        for _ in range(options['repeat']):
+            timings, pdf_bytes = self._run(start_date, end_date)
+            runs.append(timings)
+        best = min(runs, key=lambda run: run['total_seconds'])
+        result = {
+            'rows': size,
+            'fast_mode': size > reports.FAST_TABLE_THRESHOLD,
+            **best,
+            'query_seconds': round(best['summary_query_seconds'] + best['rows_seconds'], 4),
+            'pdf_bytes': pdf_bytes,
+            'rows_per_second': round(size / best['total_seconds']),
+        }
+
+        if not options['no_memory']:
+            # Separate run: tracemalloc slows everything down, so it isn't timed
+            tracemalloc.start()
+            self._run(start_date, end_date)
+            result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        self.stderr.write(f"  {size:,} rows: {best['total_seconds']}s, {pdf_bytes:,} bytes")
+        return result
@@ -0,0 +1,118 @@
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from erp.imports import read_rows, pick, to_int, to_float, to_bool, to_datetime, RowError, ErrorReport
+from inventory.models import Stock
+from sales.models import Sales
+from sales.rollups import rebuild_rollups
+from dashboard.cache import mark_dashboard_stale
+
+# Accepted header names per field
+STOCK = ('stock', 'product', 'item', 'name', 'stock_name')
+QUANTITY = ('quantity', 'qty', 'quantity_sold')
+PRICE = ('price', 'selling_price', 'unit_price', 'rate')
+SOLD_ON = ('sold_on', 'date', 'sale_date', 'sold_at')
+COST = ('cost_price', 'cost', 'unit_cost')
+VERIFIED = ('verified', 'is_verified', 'status')
+
+
+class Command(BaseCommand):
+    help = (
+        "Import historical sales from a CSV/XLSX file "
+        "(columns: stock, quantity, price, sold_on [, cost_price, verified])."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help="Path to the .csv or .xlsx file")
+        parser.add_argument('--sheet', help="Worksheet name (XLSX only, default: the active sheet)")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help="Validate every row without saving anything")
+        parser.add_argument('--unverified', action='store_true',
+                            help="Import as pending sales (default: verified, as history is already out of stock)")
+        parser.add_argument('--errors', help="Where to write the rejected rows (default: <file>.errors.csv)")
+
+    def handle(self, *args, **options):
+        path = Path(options['file'])
+        if not path.exists():
+            raise CommandError(f"File not found: {path}")
+
+        # name -> (id, current cost price), loaded once
+        stocks = {name: (pk, cost) for pk, name, cost in Stock.objects.values_list('id', 'name', 'cost_price')}
+        stocks_by_lower = {name.lower(): value for name, value in stocks.items()}
+
+        errors = ErrorReport(options['errors'] or path.with_name(f"{path.name}.errors.csv"))
+        started = time.monotonic()
+        self.imported = 0
+        self.first_day = self.last_day = None
+        batch = []
+
+        try:
+            with transaction.atomic():
+                for line, row in read_rows(path, options['sheet']):
+                    try:
+                        batch.append(self.build_sale(row, stocks, stocks_by_lower, options))
+                    except RowError as e:
+                        errors.add(line, str(e), row)
+                        continue
+                    if len(batch) >= options['batch_size']:
+                        self.flush(batch, options, started)
+                        batch = []
+                self.flush(batch, options, started)
+
+                if self.imported and not options['dry_run']:
+                    # Rollups and the dashboard cache are refreshed once, for the imported days only
+                    if self.first_day:
+                        rebuild_rollups(self.first_day, self.last_day)
+                    mark_dashboard_stale()
+        finally:
+            errors.close()
+
+        elapsed = time.monotonic() - started
+        verb = "Validated" if options['dry_run'] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {verb} {self.imported:,} sales in {elapsed:.1f}s ({self.imported / max(elapsed, 0.001):,.0f} rows/s)"
+        ))
+        if errors.count:
+            self.stdout.write(self.style.WARNING(f"⚠️ {errors.count:,} rows rejected, see {errors.path}"))
+
+    def build_sale(self, row, stocks, stocks_by_lower, options):
+        name = str(pick(row, STOCK))
+        stock = stocks.get(name) or stocks_by_lower.get(name.lower())
+        if stock is None:
+            raise RowError(f"Unknown stock '{name}'")
+        stock_id, current_cost = stock
+
+        quantity = to_int(pick(row, QUANTITY), 'quantity')
+        price = to_float(pick(row, PRICE), 'price')
+        if quantity < 1 or price < 0:
+            raise RowError("Quantity must be at least 1 and price can't be negative")
+        cost = pick(row, COST, required=False)
+        cost = to_float(cost, 'cost_price') if cost is not None else current_cost
+        verified = pick(row, VERIFIED, required=False)
+
+        return Sales(
+            stock_id=stock_id,
+            quantity_sold=quantity,
+            selling_price=price,
+            total_amount=quantity * price,
+            gross_profit=(price - cost) * quantity,
+            sold_on=to_datetime(pick(row, SOLD_ON), 'sold_on'),
+            is_verified=not options['unverified'] if verified is None else to_bool(verified),
+        )
+
+    def flush(self, batch, options, started):
+        if not batch:
+            return
+        if not options['dry_run']:
+            Sales.objects.bulk_create(batch)
+
+        days = [timezone.localtime(sale.sold_on).date() for sale in batch if sale.is_verified]
+        if days:
+            self.first_day = min([self.first_day, *days] if self.first_day else days)
+            self.last_day = max([self.last_day, *days] if self.last_day else days)
+        self.imported += len(batch)
+
+        elapsed = time.monotonic() - started
+        self.stderr.write(f"  {self.imported:,} rows ({self.imported / max(elapsed, 0.001):,.0f} rows/s)")
@@ -0,0 +1,22 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from sales.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild (or backfill) the daily sales rollup table from verified and archived Sales."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="First day to rebuild (YYYY-MM-DD). Default: all history.")
+        parser.add_argument('--end', help="Last day to rebuild (YYYY-MM-DD). Default: today.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            start = datetime.strptime(options['start'], '%Y-%m-%d').date() if options['start'] else None
+            end = datetime.strptime(options['end'], '%Y-%m-%d').date() if options['end'] else None
+        except ValueError:
+            raise CommandError("Invalid date format. Please use YYYY-MM-DD.")
+
+        written = rebuild_rollups(start, end, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt {written} daily sales rollup rows."))
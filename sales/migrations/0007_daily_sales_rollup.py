@@ -0,0 +1,55 @@
+# Generated by Django 4.2.9 on 2026-10-17 00:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_alter_stock_selling_price'),
+        ('sales', '0006_alter_sales_selling_price_alter_sales_total_amount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('sales_count', models.PositiveIntegerField(default=0)),
+                ('quantity_sold', models.PositiveIntegerField(default=0)),
+                ('total_amount', models.FloatField(default=0)),
+                ('gross_profit', models.FloatField(default=0)),
+                ('margin_total', models.FloatField(default=0)),
+                ('margin_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily Sales Rollup',
+                'verbose_name_plural': 'Daily Sales Rollups',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='sales',
+            index=models.Index(fields=['is_verified', 'sold_on'], name='sales_verified_sold_on_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailysalesrollup',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='inventory.category'),
+        ),
+        migrations.AddField(
+            model_name='dailysalesrollup',
+            name='stock',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='inventory.stock'),
+        ),
+        migrations.AddIndex(
+            model_name='dailysalesrollup',
+            index=models.Index(fields=['category', 'date'], name='rollup_category_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailysalesrollup',
+            constraint=models.UniqueConstraint(fields=('date', 'stock'), name='unique_rollup_date_stock'),
+        ),
+    ]
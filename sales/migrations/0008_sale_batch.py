@@ -0,0 +1,36 @@
+# Generated by Django 4.2.9 on 2026-10-17 00:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('sales', '0007_daily_sales_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaleBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(max_length=100)),
+                ('request_hash', models.CharField(max_length=64)),
+                ('response', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sale_batches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Sale Batch',
+                'verbose_name_plural': 'Sale Batches',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='salebatch',
+            constraint=models.UniqueConstraint(fields=('user', 'idempotency_key'), name='unique_sale_batch_key'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.9 on 2026-10-17 00:51
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0008_sale_batch'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sales',
+            name='sold_on',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.9 on 2026-10-17 00:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_stock_low_quantity_indexes'),
+        ('sales', '0009_alter_sales_sold_on_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedSale',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sale_id', models.PositiveIntegerField(unique=True)),
+                ('quantity_sold', models.PositiveIntegerField()),
+                ('selling_price', models.FloatField()),
+                ('total_amount', models.FloatField()),
+                ('gross_profit', models.FloatField(default=0)),
+                ('sold_on', models.DateTimeField()),
+                ('is_verified', models.BooleanField(default=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_sales', to='inventory.stock')),
+            ],
+            options={
+                'verbose_name': 'Archived Sale',
+                'verbose_name_plural': 'Archived Sales',
+                'ordering': ['-sold_on'],
+                'indexes': [models.Index(fields=['sold_on'], name='archived_sale_sold_on_idx')],
+            },
+        ),
+    ]
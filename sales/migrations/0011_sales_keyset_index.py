@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-17 01:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0010_archived_sale'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sales',
+            index=models.Index(fields=['sold_on', 'id'], name='sales_sold_on_id_idx'),
+        ),
+    ]
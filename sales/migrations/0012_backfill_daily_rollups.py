@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def backfill_rollups(apps, schema_editor):
+    """Fill DailySalesRollup from the sales verified before it existed."""
+    from sales.rollups import fill_rollups
+    db_alias = schema_editor.connection.alias
+    fill_rollups(
+        apps.get_model('sales', 'Sales').objects.using(db_alias).filter(is_verified=True),
+        apps.get_model('sales', 'ArchivedSale').objects.using(db_alias).all(),
+        apps.get_model('sales', 'DailySalesRollup').objects.using(db_alias).all(),
+    )
+
+
+def clear_rollups(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    apps.get_model('sales', 'DailySalesRollup').objects.using(db_alias).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0011_sales_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, clear_rollups),
+    ]
@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.db import models
-from inventory.models import Stock
+from django.utils import timezone
+from inventory.models import Stock, Category
 
 class Sales(models.Model):
     stock = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name='sales')
@@ -7,7 +9,8 @@ class Sales(models.Model):
     selling_price = models.FloatField()
     total_amount = models.FloatField(editable=False)
     gross_profit = models.FloatField(editable=False, default=0)
-    sold_on = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add, so imported history keeps its dates; still set on creation
+    sold_on = models.DateTimeField(default=timezone.now, editable=False)
     is_verified = models.BooleanField(default=False)  # <-- VERY IMPORTANT
 
     def save(self, *args, **kwargs):
@@ -29,3 +32,90 @@ class Sales(models.Model):
         verbose_name = "Sale"
         verbose_name_plural = "Sales"
         ordering = ['-sold_on']
+        indexes = [
+            models.Index(fields=['is_verified', 'sold_on'], name='sales_verified_sold_on_idx'),
+            # Keyset pages of the sales list (ORDER BY sold_on, id)
+            models.Index(fields=['sold_on', 'id'], name='sales_sold_on_id_idx'),
+        ]
+
+
+class ArchivedSale(models.Model):
+    """
+    Verified sale moved out of the hot Sales table by `manage.py archive_sales`.
+    Same columns as Sales; its totals stay in DailySalesRollup (see sales/archive.py).
+    """
+    sale_id = models.PositiveIntegerField(unique=True)  # primary key it had in Sales
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name='archived_sales')
+    quantity_sold = models.PositiveIntegerField()
+    selling_price = models.FloatField()
+    total_amount = models.FloatField()
+    gross_profit = models.FloatField(default=0)
+    sold_on = models.DateTimeField()
+    is_verified = models.BooleanField(default=True)  # always True, kept so queries match Sales
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.stock.name} - {self.quantity_sold} pcs"
+
+    class Meta:
+        verbose_name = "Archived Sale"
+        verbose_name_plural = "Archived Sales"
+        ordering = ['-sold_on']
+        indexes = [
+            models.Index(fields=['sold_on'], name='archived_sale_sold_on_idx'),
+        ]
+
+
+class DailySalesRollup(models.Model):
+    """
+    Verified sales pre-aggregated per local (Asia/Kolkata) day and stock item.
+    Updated by the verify_sale action and by edits or deletes of verified sales
+    (sales/signals.py); rebuild with `manage.py rebuild_sales_rollups`.
+    """
+    date = models.DateField()
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name='daily_rollups')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='daily_rollups')
+    sales_count = models.PositiveIntegerField(default=0)
+    quantity_sold = models.PositiveIntegerField(default=0)
+    total_amount = models.FloatField(default=0)
+    gross_profit = models.FloatField(default=0)
+    # Sum / count of per-sale margin % (sales with total_amount > 0), for the average margin
+    margin_total = models.FloatField(default=0)
+    margin_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.date} - {self.stock_id}"
+
+    class Meta:
+        verbose_name = "Daily Sales Rollup"
+        verbose_name_plural = "Daily Sales Rollups"
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'stock'], name='unique_rollup_date_stock'),
+        ]
+        indexes = [
+            models.Index(fields=['category', 'date'], name='rollup_category_date_idx'),
+        ]
+
+
+class SaleBatch(models.Model):
+    """
+    One cart posted to the point-of-sale API (see sales/api.py).
+    The stored response is replayed when a client retries with the same idempotency key.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sale_batches')
+    idempotency_key = models.CharField(max_length=100)
+    request_hash = models.CharField(max_length=64)
+    response = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.idempotency_key} ({self.created_at:%d %b %Y})"
+
+    class Meta:
+        verbose_name = "Sale Batch"
+        verbose_name_plural = "Sale Batches"
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'idempotency_key'], name='unique_sale_batch_key'),
+        ]
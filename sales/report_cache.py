@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from django.conf import settings
+from django.contrib.admin.utils import prepare_lookup_value
+from django.core.exceptions import FieldError, ValidationError
+from django.db.models import Sum, Count, Max, Q
+from .models import Sales
+from .rollups import local_day_bounds
+
+# Bump when the report layout changes so old PDFs are never served again
+REPORT_VERSION = 1
+
+# Query params that don't change the report contents
+IGNORED_PARAMS = {'p', 'all', '_changelist_filters'}
+
+# Changelist params that aren't field lookups (the date range is applied separately)
+NON_LOOKUP_PARAMS = IGNORED_PARAMS | {'o', 'q', 'e', '_popup', '_to_field', 'sold_on__date__gte', 'sold_on__date__lte'}
+
+DEFAULTS = {
+    'DIR': Path(settings.BASE_DIR) / 'report_cache',
+    'MAX_BYTES': 200 * 1024 * 1024,   # total size kept on disk
+    'MAX_FILES': 500,                 # number of PDFs kept on disk
+}
+
+
+def cache_settings():
+    return {**DEFAULTS, **getattr(settings, 'SALES_REPORT_CACHE', {})}
+
+
+def report_queryset(params, start_date=None, end_date=None, queryset=None):
+    """
+    The live Sales rows a report covers: the changelist filters and search in
+    `params` (a QueryDict), within the local days [start_date, end_date].
+    Params that aren't valid lookups are skipped, as the changelist rejects them.
+    `queryset` replaces Sales.objects.all() (archive.archived_sales passes ArchivedSale).
+    """
+    queryset = Sales.objects.all() if queryset is None else queryset
+    if start_date and end_date:
+        start, end = local_day_bounds(start_date, end_date)
+        queryset = queryset.filter(sold_on__gte=start, sold_on__lt=end)
+    for name in params:
+        if name in NON_LOOKUP_PARAMS:
+            continue
+        try:
+            queryset = queryset.filter(**{name: prepare_lookup_value(name, params.get(name))})
+        except (FieldError, ValidationError, ValueError, TypeError):
+            continue
+    search = params.get('q', '').strip()
+    for word in search.split():
+        queryset = queryset.filter(stock__name__icontains=word)
+    return queryset
+
+
+def data_stamp(queryset):
+    """
+    Fingerprint of the Sales rows a report covers: one aggregate query plus the
+    names of their products. Any insert, delete, edit or verification of those
+    rows, or a rename of one of their products, changes it; changes elsewhere don't.
+    """
+    stamp = queryset.order_by().aggregate(
+        n=Count('id'),
+        max_id=Max('id'),
+        id_sum=Sum('id'),
+        qty=Sum('quantity_sold'),
+        total=Sum('total_amount'),
+        profit=Sum('gross_profit'),
+        verified=Count('id', filter=Q(is_verified=True)),
+    )
+    names = queryset.order_by('stock_id').values_list('stock_id', 'stock__name').distinct()
+    stamp['products'] = hashlib.sha256(json.dumps(list(names)).encode()).hexdigest()
+    return {key: str(value) for key, value in stamp.items()}
+
+
+def report_key(start_date, end_date, params, queryset):
+    """Content address of a report: date range + filter params + data stamp."""
+    filters = sorted(
+        (name, value)
+        for name in params if name not in IGNORED_PARAMS
+        for value in params.getlist(name)
+    )
+    payload = json.dumps({
+        'version': REPORT_VERSION,
+        'start': str(start_date),
+        'end': str(end_date),
+        'filters': filters,
+        'data': data_stamp(queryset),
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _path(key):
+    return Path(cache_settings()['DIR']) / key[:2] / f'{key}.pdf'
+
+
+def get(key):
+    """Path of the cached PDF for `key`, or None. A hit marks the file as recently used."""
+    path = _path(key)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def put(key, data):
+    """Store `data` under `key` (atomically) and evict the least recently used PDFs."""
+    path = _path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    evict()
+    return path
+
+
+def evict():
+    """Drop least recently used PDFs until the cache fits MAX_BYTES and MAX_FILES."""
+    config = cache_settings()
+    entries = []
+    for path in Path(config['DIR']).glob('*/*.pdf'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    count = len(entries)
+    for _, size, path in entries:
+        if total <= config['MAX_BYTES'] and count <= config['MAX_FILES']:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        count -= 1
+
+
+def clear():
+    for path in Path(cache_settings()['DIR']).glob('*/*.pdf'):
+        path.unlink(missing_ok=True)
+
+
+def cached_report(start_date, end_date, params, queryset, build):
+    """
+    Path of the report PDF, built with `build()` (returning a buffer) only when
+    no PDF for the same range, filters and data exists yet.
+    """
+    key = report_key(start_date, end_date, params, queryset)
+    path = get(key)
+    if path is None:
+        path = put(key, build().getvalue())
+    return path
@@ -1,21 +1,183 @@
 from django.http import HttpResponse
 from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Flowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.pdfgen import canvas
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT, TA_JUSTIFY
 from io import BytesIO
+from functools import lru_cache
+from itertools import chain
 from django.utils import timezone
+from django.db.models import Sum, Count
 from .models import Sales
+from .archive import archived_sales
+from .rollups import local_day_bounds
 from datetime import datetime
 import os
 
-def generate_sales_report(start_date, end_date, queryset=None):
+# Rows fetched per round trip while streaming the transaction table
+ROW_CHUNK_SIZE = 2000
+
+# ==================== FAST TABLE MODE ====================
+# Above this many transactions the table is rendered in fast mode: fixed-height
+# plain-string rows drawn straight onto the canvas, one chunk per page.
+
+FAST_TABLE_THRESHOLD = 1000
+FAST_ROW_HEIGHT = 16
+FAST_HEADER_HEIGHT = 22
+FAST_CELL_PADDING = 6
+FAST_TITLE_ROWS = 3  # rows given up to the section title on the first page
+
+TRANSACTION_COL_WIDTHS = [1.8*inch, 0.5*inch, 0.95*inch, 0.95*inch, 0.95*inch, 0.7*inch, 0.85*inch]
+TRANSACTION_HEADERS = ['PRODUCT', 'QTY', 'UNIT PRICE', 'AMOUNT', 'DATE', 'STATUS']
+
+FAST_COLUMNS = [
+    # (width, alignment) of the transaction columns
+    (1.8*inch, 'LEFT'),     # Product
+    (0.5*inch, 'CENTER'),   # Quantity
+    (0.95*inch, 'RIGHT'),   # Unit price
+    (0.95*inch, 'RIGHT'),   # Amount
+    (0.95*inch, 'CENTER'),  # Date
+    (0.7*inch, 'CENTER'),   # Status
+]
+
+
+@lru_cache(maxsize=4096)
+def _text_width(value, font):
+    # Amounts, dates and statuses repeat a lot across rows
+    return stringWidth(value, font, 8)
+
+
+def _fit(text, width, font='Helvetica', size=8):
+    """Cut `text` so it fits in `width` points on one line."""
+    if stringWidth(text, font, size) <= width:
+        return text
+    while text and stringWidth(text + '...', font, size) > width:
+        text = text[:-1]
+    return text + '...'
+
+
+class TransactionPage(Flowable):
+    """
+    One page of transaction rows (with its header) drawn straight onto the canvas:
+    one path for the grid and one text object for all cells, instead of a Table
+    that lays out and draws every cell separately.
+    """
+
+    def __init__(self, rows):
+        super().__init__()
+        self.rows = rows
+        self.width = sum(width for width, _ in FAST_COLUMNS)
+        self.height = FAST_HEADER_HEIGHT + FAST_ROW_HEIGHT * len(rows)
+        self.hAlign = 'CENTER'
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def _draw_row(self, text, font, cells, middle):
+        x = 0
+        for value, (width, align) in zip(cells, FAST_COLUMNS):
+            if align == 'LEFT':
+                left = x + FAST_CELL_PADDING
+            else:
+                value_width = _text_width(value, font)
+                if align == 'RIGHT':
+                    left = x + width - FAST_CELL_PADDING - value_width
+                else:
+                    left = x + (width - value_width) / 2
+            text.setTextOrigin(left, middle - 3)
+            text.textOut(value)
+            x += width
+
+    def draw(self):
+        canv = self.canv
+        width, height = self.width, self.height
+        body_top = height - FAST_HEADER_HEIGHT
+
+        # Header bar and alternating row colors
+        canv.setFillColor(colors.HexColor('#343a40'))
+        canv.rect(0, body_top, width, FAST_HEADER_HEIGHT, stroke=0, fill=1)
+        canv.setFillColor(colors.HexColor('#f8f9fa'))
+        for i in range(1, len(self.rows), 2):
+            canv.rect(0, body_top - (i + 1) * FAST_ROW_HEIGHT, width, FAST_ROW_HEIGHT, stroke=0, fill=1)
+
+        # Grid
+        grid = canv.beginPath()
+        for i in range(1, len(self.rows) + 1):
+            y = body_top - i * FAST_ROW_HEIGHT
+            grid.moveTo(0, y)
+            grid.lineTo(width, y)
+        grid.moveTo(0, body_top)
+        grid.lineTo(width, body_top)
+        x = 0
+        for column_width, _ in FAST_COLUMNS[:-1]:
+            x += column_width
+            grid.moveTo(x, 0)
+            grid.lineTo(x, height)
+        canv.setStrokeColor(colors.HexColor('#dee2e6'))
+        canv.setLineWidth(0.5)
+        canv.drawPath(grid, stroke=1, fill=0)
+        canv.setStrokeColor(colors.HexColor('#adb5bd'))
+        canv.setLineWidth(1)
+        canv.rect(0, 0, width, height, stroke=1, fill=0)
+
+        # Cells
+        text = canv.beginText()
+        text.setFont('Helvetica-Bold', 8)
+        text.setFillColor(colors.white)
+        self._draw_row(text, 'Helvetica-Bold', TRANSACTION_HEADERS, body_top + FAST_HEADER_HEIGHT / 2)
+        text.setFont('Helvetica', 8)
+        text.setFillColor(colors.HexColor('#212529'))
+        for i, row in enumerate(self.rows):
+            self._draw_row(text, 'Helvetica', row, body_top - (i + 0.5) * FAST_ROW_HEIGHT)
+        canv.drawText(text)
+
+
+def fast_transaction_pages(rows, frame_height, format_inr):
+    """
+    Transaction rows split into page-sized TransactionPage flowables, each with
+    its own header row. Rows have a fixed height, so every chunk fills exactly
+    one page and nothing ever has to be split.
+    """
+    per_page = int((frame_height - FAST_HEADER_HEIGHT) // FAST_ROW_HEIGHT)
+    name_width = FAST_COLUMNS[0][0] - 2 * FAST_CELL_PADDING
+    names = {}
+
+    flowables, chunk, limit = [], [], per_page - FAST_TITLE_ROWS
+    for stock_name, quantity_sold, selling_price, total_amount, sold_on, is_verified in rows:
+        name = names.get(stock_name)
+        if name is None:
+            name = names[stock_name] = _fit(stock_name, name_width)
+        chunk.append([
+            name,
+            str(quantity_sold),
+            format_inr(selling_price),
+            format_inr(total_amount),
+            timezone.localtime(sold_on).strftime('%d/%m/%y'),
+            "✓ Verified" if is_verified else "○ Pending",
+        ])
+        if len(chunk) == limit:
+            flowables += [TransactionPage(chunk), PageBreak()]
+            chunk, limit = [], per_page
+
+    if chunk:
+        flowables.append(TransactionPage(chunk))
+    elif flowables:
+        flowables.pop()  # trailing page break
+    return flowables
+
+def generate_sales_report(start_date, end_date, queryset=None, progress=None, archived=None):
     """
     Generate a premium professional sales report with Indian Rupee formatting
+
+    `progress(percent, message)` is called between the stages (used by background jobs).
+    `archived` adds ArchivedSale rows to the report; by default they are included
+    only when no queryset is given and the date range reaches the archive.
     """
+    progress = progress or (lambda percent, message: None)
     buffer = BytesIO()
     
     # Create PDF with professional margins
@@ -115,19 +277,31 @@ def generate_sales_report(start_date, end_date, queryset=None):
     
     # ==================== DATA PROCESSING ====================
     
-    if queryset is not None:
-        sales = queryset.select_related('stock')
-    else:
-        sales = Sales.objects.filter(
-            sold_on__date__gte=start_date,
-            sold_on__date__lte=end_date
-        ).select_related('stock')
-    
-    # Calculate metrics
-    total_sales = sales.count()
-    total_quantity = sum(sale.quantity_sold for sale in sales)
-    total_revenue = sum(sale.total_amount for sale in sales)
-    total_profit = sum(sale.gross_profit for sale in sales)
+    # Live rows are bounded to the same local days as the archived ones,
+    # so both halves of the report cover exactly the requested period
+    start, end = local_day_bounds(start_date, end_date)
+    if queryset is None:
+        queryset = Sales.objects.all()
+        if archived is None:
+            archived = archived_sales(start_date, end_date)
+    queryset = queryset.filter(sold_on__gte=start, sold_on__lt=end)
+    # Archived sales are older than every hot one, so they simply follow in the table
+    sources = [queryset] if archived is None else [queryset, archived]
+
+    # Calculate metrics in one aggregate query per table
+    totals = {'total_sales': 0, 'total_quantity': 0, 'total_revenue': 0, 'total_profit': 0}
+    for source in sources:
+        for name, value in source.order_by().aggregate(
+            total_sales=Count('id'),
+            total_quantity=Sum('quantity_sold'),
+            total_revenue=Sum('total_amount'),
+            total_profit=Sum('gross_profit'),
+        ).items():
+            totals[name] += value or 0
+    total_sales = totals['total_sales']
+    total_quantity = totals['total_quantity']
+    total_revenue = totals['total_revenue']
+    total_profit = totals['total_profit']
     total_cost = total_revenue - total_profit
     
     avg_sale_value = total_revenue / total_sales if total_sales > 0 else 0
@@ -135,12 +309,31 @@ def generate_sales_report(start_date, end_date, queryset=None):
     avg_profit_per_unit = total_profit / total_quantity if total_quantity > 0 else 0
     
     # Get top selling product
-    from django.db.models import Sum
-    top_product = sales.values('stock__name').annotate(
-        total_qty=Sum('quantity_sold')
-    ).order_by('-total_qty').first()
+    if archived is None:
+        top_product = queryset.order_by().values('stock__name').annotate(
+            total_qty=Sum('quantity_sold')
+        ).order_by('-total_qty').first()
+    else:
+        per_product = {}
+        for source in sources:
+            for row in source.order_by().values('stock__name').annotate(total_qty=Sum('quantity_sold')):
+                per_product[row['stock__name']] = per_product.get(row['stock__name'], 0) + row['total_qty']
+        top_product = max(
+            ({'stock__name': name, 'total_qty': qty} for name, qty in per_product.items()),
+            key=lambda row: row['total_qty'], default=None,
+        )
     top_product_name = top_product['stock__name'] if top_product else 'N/A'
     top_product_qty = top_product['total_qty'] if top_product else 0
+
+    progress(20, f"Listing {total_sales:,} transactions")
+
+    # Transaction rows are streamed once, with only the columns the table shows
+    rows = chain.from_iterable(
+        source.values_list(
+            'stock__name', 'quantity_sold', 'selling_price', 'total_amount', 'sold_on', 'is_verified'
+        ).iterator(chunk_size=ROW_CHUNK_SIZE)
+        for source in sources
+    )
     
     # Indian Rupee formatting function
     def format_inr(amount):
@@ -251,7 +444,12 @@ def generate_sales_report(start_date, end_date, queryset=None):
     
     # ==================== DETAILED TRANSACTIONS ====================
     
-    if sales.exists():
+    if total_sales > FAST_TABLE_THRESHOLD:
+        # Large reports: transactions start on a fresh page, one table per page
+        elements.append(PageBreak())
+        elements.append(Paragraph("TRANSACTION DETAILS", section_style))
+        elements.extend(fast_transaction_pages(rows, doc.height - 12, format_inr))  # 12 = frame padding
+    elif total_sales:
         elements.append(Paragraph("TRANSACTION DETAILS", section_style))
         
         # Transaction table header
@@ -265,16 +463,17 @@ def generate_sales_report(start_date, end_date, queryset=None):
         ]]
         
         # Add transaction rows
-        for sale in sales:
-            status_icon = "✓" if sale.is_verified else "○"
-            status_text = f"{status_icon} Verified" if sale.is_verified else f"{status_icon} Pending"
+        cell_style = ParagraphStyle('TD', fontSize=8, fontName='Helvetica', leading=10)
+        for stock_name, quantity_sold, selling_price, total_amount, sold_on, is_verified in rows:
+            status_icon = "✓" if is_verified else "○"
+            status_text = f"{status_icon} Verified" if is_verified else f"{status_icon} Pending"
             
             transaction_data.append([
-                Paragraph(sale.stock.name, ParagraphStyle('TD', fontSize=8, fontName='Helvetica', leading=10)),
-                str(sale.quantity_sold),
-                format_inr(sale.selling_price),
-                format_inr(sale.total_amount),
-                timezone.localtime(sale.sold_on).strftime('%d/%m/%y'),
+                Paragraph(stock_name, cell_style),
+                str(quantity_sold),
+                format_inr(selling_price),
+                format_inr(total_amount),
+                timezone.localtime(sold_on).strftime('%d/%m/%y'),
                 status_text
             ])
         
@@ -282,7 +481,7 @@ def generate_sales_report(start_date, end_date, queryset=None):
         transaction_table = Table(
             transaction_data, 
             repeatRows=1, 
-            colWidths=[1.8*inch, 0.5*inch, 0.95*inch, 0.95*inch, 0.95*inch, 0.7*inch, 0.85*inch]
+            colWidths=TRANSACTION_COL_WIDTHS
         )
         
         transaction_table.setStyle(TableStyle([
@@ -370,6 +569,7 @@ def generate_sales_report(start_date, end_date, queryset=None):
     
     # ==================== BUILD PDF ====================
     
+    progress(60, "Rendering PDF")
     doc.build(elements)
     buffer.seek(0)
     return buffer
\ No newline at end of file
@@ -0,0 +1,200 @@
+import threading
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Sum, Count, F, Q, Case, When, FloatField
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import Sales, ArchivedSale, DailySalesRollup
+
+
+def local_day_bounds(start_date, end_date):
+    """Aware datetimes covering [start_date, end_date] in the local timezone (index friendly)."""
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(start_date, time.min), tz)
+    end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+def _sale_margin(sale):
+    if sale.total_amount > 0:
+        return sale.gross_profit / sale.total_amount * 100
+    return None
+
+
+def apply_verified_sales(sales, sign=1, using=DEFAULT_DB_ALIAS):
+    """
+    Fold freshly verified sales into DailySalesRollup (`sign=-1` takes them out
+    again, for deleted or edited verified sales) on the `using` database.
+    Must run inside the verifying transaction, after the Stock rows are locked,
+    so concurrent verifications of the same stock cannot race on the insert.
+    `sales` need `stock` loaded (select_related) for the category.
+    Costs three statements however many sales and days are involved.
+    """
+    buckets = {}
+    for sale in sales:
+        key = (timezone.localtime(sale.sold_on).date(), sale.stock_id)
+        bucket = buckets.setdefault(key, {
+            'category_id': sale.stock.category_id if sign > 0 else None,
+            'sales_count': 0,
+            'quantity_sold': 0,
+            'total_amount': 0,
+            'gross_profit': 0,
+            'margin_total': 0,
+            'margin_count': 0,
+        })
+        bucket['sales_count'] += 1
+        bucket['quantity_sold'] += sale.quantity_sold
+        bucket['total_amount'] += sale.total_amount
+        bucket['gross_profit'] += sale.gross_profit
+        margin = _sale_margin(sale)
+        if margin is not None:
+            bucket['margin_total'] += margin
+            bucket['margin_count'] += 1
+
+    if not buckets:
+        return
+
+    # One locked read of the rows that already exist, then one bulk write each way
+    rollups = DailySalesRollup.objects.using(using)
+    existing = {
+        (row.date, row.stock_id): row
+        for row in rollups.select_for_update().filter(
+            date__in={day for day, _ in buckets},
+            stock_id__in={stock_id for _, stock_id in buckets},
+        )
+    }
+    counters = ['sales_count', 'quantity_sold', 'total_amount', 'gross_profit', 'margin_total', 'margin_count']
+    changed_rows, new_rows, emptied = [], [], []
+    for key, bucket in buckets.items():
+        row = existing.get(key)
+        if row is None:
+            if sign > 0:
+                new_rows.append(DailySalesRollup(date=key[0], stock_id=key[1], **bucket))
+            continue
+        if sign < 0 and row.sales_count <= bucket['sales_count']:
+            emptied.append(row.pk)  # the day's last sales of this stock went away
+            continue
+        for field in counters:
+            setattr(row, field, F(field) + sign * bucket[field])
+        changed_rows.append(row)
+
+    if changed_rows:
+        rollups.bulk_update(changed_rows, counters, batch_size=500)
+    if new_rows:
+        rollups.bulk_create(new_rows)
+    if emptied:
+        rollups.filter(pk__in=emptied).delete()
+
+
+# ==================== EDITS AND DELETES ====================
+
+_state = threading.local()
+
+
+@contextmanager
+def rollups_unchanged():
+    """Sales deleted inside this block stay in the rollups (the archive keeps their totals)."""
+    _state.frozen = True
+    try:
+        yield
+    finally:
+        _state.frozen = False
+
+
+def rollups_frozen():
+    return getattr(_state, 'frozen', False)
+
+
+def _grouped_by_day(sales):
+    """Per local day and stock totals of a Sales (or ArchivedSale) queryset."""
+    positive = Q(total_amount__gt=0)
+    return sales.order_by().annotate(
+        day=TruncDate('sold_on'),
+    ).values('day', 'stock_id', 'stock__category_id').annotate(
+        n=Count('id'),
+        qty=Sum('quantity_sold'),
+        total=Sum('total_amount'),
+        profit=Sum('gross_profit'),
+        m_total=Sum(Case(
+            When(positive, then=F('gross_profit') / F('total_amount') * 100),
+            output_field=FloatField(),
+        )),
+        m_count=Count('id', filter=positive),
+    )
+
+
+def _merge(row, other):
+    for field in ('n', 'qty', 'total', 'profit', 'm_total', 'm_count'):
+        row[field] = (row[field] or 0) + (other[field] or 0)
+    return row
+
+
+def fill_rollups(sales, archived, rollups, batch_size=1000):
+    """
+    Replace the `rollups` rows with the per-day totals of the verified `sales` and
+    the `archived` rows. Querysets only, so migrations can pass historical models
+    on their own database. Returns the number of rollup rows written.
+    """
+    # One row per archived day and stock, merged into the hot rows of the same day
+    # (an old sale verified after its day was archived stays in Sales)
+    archived_rows = {(row['day'], row['stock_id']): row for row in _grouped_by_day(archived)}
+
+    def grouped_rows():
+        for row in _grouped_by_day(sales).iterator(chunk_size=batch_size):
+            other = archived_rows.pop((row['day'], row['stock_id']), None)
+            yield _merge(row, other) if other else row
+        yield from archived_rows.values()
+
+    Rollup = rollups.model
+    written = 0
+    rollups.delete()
+    batch = []
+    for row in grouped_rows():
+        batch.append(Rollup(
+            date=row['day'],
+            stock_id=row['stock_id'],
+            category_id=row['stock__category_id'],
+            sales_count=row['n'],
+            quantity_sold=row['qty'] or 0,
+            total_amount=row['total'] or 0,
+            gross_profit=row['profit'] or 0,
+            margin_total=row['m_total'] or 0,
+            margin_count=row['m_count'],
+        ))
+        if len(batch) >= batch_size:
+            Rollup.objects.using(rollups.db).bulk_create(batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        Rollup.objects.using(rollups.db).bulk_create(batch)
+        written += len(batch)
+    return written
+
+
+def rebuild_rollups(start_date=None, end_date=None, batch_size=1000):
+    """
+    Recompute DailySalesRollup from raw verified Sales and the sales archive,
+    optionally for a date range only. Returns the number of rollup rows written.
+    """
+    sales = Sales.objects.filter(is_verified=True)
+    archived = ArchivedSale.objects.all()
+    rollups = DailySalesRollup.objects.all()
+    if start_date:
+        lower = local_day_bounds(start_date, start_date)[0]
+        sales = sales.filter(sold_on__gte=lower)
+        archived = archived.filter(sold_on__gte=lower)
+        rollups = rollups.filter(date__gte=start_date)
+    if end_date:
+        upper = local_day_bounds(end_date, end_date)[1]
+        sales = sales.filter(sold_on__lt=upper)
+        archived = archived.filter(sold_on__lt=upper)
+        rollups = rollups.filter(date__lte=end_date)
+
+    with transaction.atomic():
+        written = fill_rollups(sales, archived, rollups, batch_size)
+
+        # bulk_create/delete send no signals, so invalidate cached dashboards here
+        from dashboard.cache import mark_dashboard_stale
+        mark_dashboard_stale()
+    return written
@@ -0,0 +1,46 @@
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from inventory.posting import lock_stocks
+from .models import Sales
+from .rollups import apply_verified_sales, rollups_frozen
+
+# Columns a sale's rollup contribution is computed from
+ROLLUP_FIELDS = ('id', 'stock_id', 'quantity_sold', 'total_amount', 'gross_profit', 'sold_on')
+
+
+# The rollups of a sale live on the sale's own database (`using`), so scratch
+# databases such as benchmark_sales_report's never touch the real totals
+
+def remember_verified_sale(sender, instance, raw=False, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Keep the stored version of a verified sale that is about to change."""
+    instance._rollup_before = None
+    if instance.pk and not raw:
+        instance._rollup_before = Sales.objects.using(using).filter(
+            pk=instance.pk, is_verified=True,
+        ).only(*ROLLUP_FIELDS).first()
+
+
+def verified_sale_saved(sender, instance, raw=False, using=DEFAULT_DB_ALIAS, **kwargs):
+    # Verification itself is a queryset update (inventory/posting.py) and folds its own sales in
+    before = getattr(instance, '_rollup_before', None)
+    if raw or (before is None and not instance.is_verified):
+        return
+    with transaction.atomic(using=using):
+        # apply_verified_sales needs the Stock rows locked, as the postings do
+        lock_stocks({instance.stock_id} | ({before.stock_id} if before is not None else set()), using)
+        if before is not None:
+            apply_verified_sales([before], sign=-1, using=using)
+        if instance.is_verified:
+            apply_verified_sales([instance], using=using)
+
+
+def verified_sale_deleted(sender, instance, using=DEFAULT_DB_ALIAS, **kwargs):
+    if instance.is_verified and not rollups_frozen():
+        with transaction.atomic(using=using):
+            lock_stocks([instance.stock_id], using)
+            apply_verified_sales([instance], sign=-1, using=using)
+
+
+pre_save.connect(remember_verified_sale, sender=Sales, dispatch_uid='sales_rollup_before')
+post_save.connect(verified_sale_saved, sender=Sales, dispatch_uid='sales_rollup_saved')
+post_delete.connect(verified_sale_deleted, sender=Sales, dispatch_uid='sales_rollup_deleted')
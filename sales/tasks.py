@@ -0,0 +1,45 @@
+from datetime import date
+from django.db import transaction
+from django.http import QueryDict
+from jobs.runner import task
+from inventory.posting import post_sales_verification
+from dashboard.live import notify_sales_changed
+from .models import Sales
+from .reports import generate_sales_report
+from .archive import archived_sales
+from .report_cache import cached_report, report_queryset
+
+
+@task('sales_report')
+def sales_report(job, start_date, end_date, filters=''):
+    start_date = date.fromisoformat(start_date)
+    end_date = date.fromisoformat(end_date)
+    # The same rows the admin action stamped: its filters, within the period
+    # (the archived half below is bounded to the same days)
+    params = QueryDict(filters)
+    queryset = report_queryset(params, start_date, end_date)
+
+    job.set_progress(5, "Checking report cache")
+    path = cached_report(
+        start_date, end_date, params, queryset,
+        lambda: generate_sales_report(
+            start_date, end_date, queryset, progress=job.set_progress,
+            # Archived sales only when the period reaches back that far, with the same filters
+            archived=archived_sales(start_date, end_date, params),
+        ),
+    )
+    job.save_result(f"Sales_Report_{start_date}_to_{end_date}.pdf", path.read_bytes())
+    return f"📈 Sales report generated for {start_date} → {end_date}"
+
+
+@task('verify_sales')
+def verify_sales(job, ids):
+    job.set_progress(10, f"Verifying {len(ids)} sales")
+    with transaction.atomic():
+        verified_sales = post_sales_verification(Sales.objects.filter(pk__in=ids), user=job.user)
+        if verified_sales:
+            notify_sales_changed('verified')
+
+    if not verified_sales:
+        return "No sales were verified."
+    return f"Successfully verified {len(verified_sales)} of {len(ids)} sales."
@@ -1,3 +1,553 @@
-from django.test import TestCase
+import base64
+import io
+import os
+import json
+import re
+import tempfile
+import zlib
+from unittest import mock
+from datetime import date, timedelta
+from pathlib import Path
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.paginator import EmptyPage, InvalidPage
+from django.http import QueryDict
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+from accounts.models import CustomUser
+from dashboard.cache import get_data_version
+from erp.pagination import ApproximateCountPaginator, KeysetPaginator
+from erp.testing import QueryBudgetMixin
+from inventory.models import Category, Stock
+from inventory.posting import post_sales_verification
+from jobs.models import Job
+from . import report_cache
+from .archive import archive_sales, archived_sales
+from .models import Sales, SaleBatch, ArchivedSale, DailySalesRollup
+from .reports import FAST_TABLE_THRESHOLD, TransactionPage, fast_transaction_pages, generate_sales_report
+from .rollups import rebuild_rollups
 
-# Create your tests here.
+
+def create_stocks(user, count):
+    """`count` stocks of 50 at 100 in a new category."""
+    category = Category.objects.create(name=f'Category {Category.objects.count()}')
+    start = Stock.objects.count()
+    return Stock.objects.bulk_create([
+        Stock(user=user, category=category, name=f'Item {start + i}', cost_price=100, selling_price=120, quantity=50)
+        for i in range(count)
+    ])
+
+
+@override_settings(JOBS={'IN_PROCESS': False})
+class SalesAdminQueryTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(self.user)
+
+    def add_sales(self, count):
+        return Sales.objects.bulk_create([
+            Sales(stock=stock, quantity_sold=1, selling_price=150, total_amount=150, gross_profit=50)
+            for stock in create_stocks(self.user, count)
+        ])
+
+    def test_changelist(self):
+        url = reverse('admin:sales_sales_changelist')
+        for _ in range(2):
+            self.add_sales(30)
+            self.assertQueryBudget(url, 10)
+
+    def test_change_form(self):
+        url = reverse('admin:sales_sales_change', args=[self.add_sales(1)[0].pk])
+        for _ in range(2):
+            self.add_sales(30)
+            self.assertQueryBudget(url, 7)
+
+    def test_add_form(self):
+        url = reverse('admin:sales_sales_add')
+        for _ in range(2):
+            self.add_sales(30)
+            self.assertQueryBudget(url, 5)
+
+
+@override_settings(JOBS={'IN_PROCESS': False})
+class ArchivedSaleAdminQueryTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(self.user)
+
+    def add_archived(self, count):
+        start = ArchivedSale.objects.count()
+        return ArchivedSale.objects.bulk_create([
+            ArchivedSale(sale_id=start + i, stock=stock, quantity_sold=1, selling_price=150,
+                         total_amount=150, gross_profit=50, sold_on=timezone.now())
+            for i, stock in enumerate(create_stocks(self.user, count))
+        ])
+
+    def test_changelist(self):
+        url = reverse('admin:sales_archivedsale_changelist')
+        for _ in range(2):
+            self.add_archived(30)
+            self.assertQueryBudget(url, 9)
+
+    def test_change_form(self):
+        url = reverse('admin:sales_archivedsale_change', args=[self.add_archived(1)[0].pk])
+        for _ in range(2):
+            self.add_archived(30)
+            self.assertQueryBudget(url, 7)
+
+
+@override_settings(
+    ADMIN_COUNTS={'THRESHOLD': 5, 'CACHE_SECONDS': 60},
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class ApproximateCountPaginatorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.stocks = create_stocks(CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret'), 1)
+
+    def add_sales(self, count):
+        Sales.objects.bulk_create([
+            Sales(stock=self.stocks[0], quantity_sold=1, selling_price=150, total_amount=150) for _ in range(count)
+        ])
+
+    def paginator(self):
+        return ApproximateCountPaginator(Sales.objects.order_by('id'), 2)
+
+    def test_exact_up_to_the_threshold(self):
+        self.add_sales(5)
+        paginator = self.paginator()
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 5)
+        self.assertFalse(paginator.approximate)
+        self.add_sales(1)
+        self.assertEqual(self.paginator().count, 6)  # small counts are never cached
+        with self.assertRaises(EmptyPage):
+            self.paginator().page(5)
+
+    def test_cached_count_above_the_threshold(self):
+        self.add_sales(6)
+        self.assertEqual(self.paginator().count, 6)
+        self.add_sales(2)
+        paginator = self.paginator()
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.count, 6)
+        self.assertTrue(paginator.approximate)
+        # Page 4 is past the stale total but has rows, page 5 has none
+        self.assertEqual(len(paginator.page(4)), 2)
+        with self.assertRaises(EmptyPage):
+            paginator.page(5)
+        self.assertEqual(ApproximateCountPaginator(Sales.objects.filter(quantity_sold=1), 2).count, 8)  # keyed per query
+
+
+class KeysetPaginatorTests(TestCase):
+    def setUp(self):
+        stock = create_stocks(CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret'), 1)[0]
+        now = timezone.now()
+        # Three rows share a sold_on, so the id has to break the tie
+        Sales.objects.bulk_create([
+            Sales(stock=stock, quantity_sold=1, selling_price=150, total_amount=150, sold_on=sold_on)
+            for sold_on in [now, now - timedelta(hours=1), now - timedelta(hours=1), now - timedelta(hours=1),
+                            now - timedelta(hours=2), now - timedelta(hours=3), now - timedelta(hours=4)]
+        ])
+        self.expected = list(Sales.objects.order_by('-sold_on', '-id').values_list('id', flat=True))
+        self.paginator = KeysetPaginator(Sales.objects.order_by('-sold_on'), 2)
+
+    def ids(self, page):
+        return [sale.id for sale in page]
+
+    def test_walk_forward_and_back(self):
+        forward, page = [], self.paginator.get_page()
+        self.assertFalse(page.has_previous())
+        while True:
+            forward.append(self.ids(page))
+            if not page.has_next():
+                break
+            page = self.paginator.get_page(page.next_token)
+        self.assertEqual(sum(forward, []), self.expected)  # every row once, in order
+
+        backward = [self.ids(page)]
+        while page.has_previous():
+            page = self.paginator.get_page(page.previous_token)
+            backward.append(self.ids(page))
+        self.assertEqual(backward[::-1], forward)
+
+    def test_bad_token_falls_back_to_the_first_page(self):
+        token = self.paginator.get_page().next_token
+        other = KeysetPaginator(Sales.objects.order_by('sold_on'), 2)
+        for bad in ('not-a-token', token[:-2] + 'xx', other.get_page().next_token):
+            with self.subTest(token=bad):
+                with self.assertRaises(InvalidPage):
+                    self.paginator.page(bad)
+                page = self.paginator.get_page(bad)
+                self.assertEqual(self.ids(page), self.expected[:2])
+                self.assertFalse(page.has_previous())
+
+
+@override_settings(JOBS={'IN_PROCESS': False})
+class SalesExportTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(self.user)
+        shoes, bags = create_stocks(self.user, 2)
+        Sales.objects.create(stock=shoes, quantity_sold=2, selling_price=150, is_verified=True)
+        Sales.objects.create(stock=bags, quantity_sold=1, selling_price=90)
+
+    def test_csv_follows_the_changelist_filters(self):
+        url = reverse('admin:sales_sales_export', args=['csv'])
+        response = self.client.get(f'{url}?is_verified__exact=1')
+        self.assertTrue(response.streaming)
+        rows = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(rows[0], 'Product,Category,Quantity,Selling Price,Total Amount,Gross Profit,Sold On,Verified')
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(rows[1].startswith('Item 0,Category 0,2,150.0,300.0,100.0,'))
+
+    def test_xlsx(self):
+        response = self.client.get(reverse('admin:sales_sales_export', args=['xlsx']))
+        workbook = load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True)
+        self.assertEqual(len(list(workbook.active.rows)), 3)
+
+
+class RollupMaintenanceTests(TestCase):
+    """Edits and deletes of verified sales keep DailySalesRollup equal to a full rebuild."""
+
+    def setUp(self):
+        user = CustomUser.objects.create(username='owner', email='owner@example.com')
+        self.stock = create_stocks(user, 1)[0]
+        self.sales = [Sales.objects.create(stock=self.stock, quantity_sold=2, selling_price=150) for _ in range(3)]
+        post_sales_verification(Sales.objects.all())
+
+    def rollups(self):
+        return list(DailySalesRollup.objects.order_by('date', 'stock').values_list(
+            'date', 'stock', 'sales_count', 'quantity_sold', 'total_amount', 'gross_profit', 'margin_count',
+        ))
+
+    def assertMatchesRebuild(self):
+        maintained = self.rollups()
+        rebuild_rollups()
+        self.assertEqual(maintained, self.rollups())
+
+    def test_delete_verified_sale(self):
+        Sales.objects.filter(pk=self.sales[0].pk).delete()  # as the admin delete action does
+        self.assertEqual(self.rollups()[0][2], 2)
+        self.assertMatchesRebuild()
+
+    def test_edit_verified_sale(self):
+        sale = Sales.objects.get(pk=self.sales[0].pk)
+        sale.selling_price, sale.quantity_sold = 200, 5
+        sale.save()
+        self.assertMatchesRebuild()
+
+        sale.is_verified = False
+        sale.save()
+        self.assertEqual(self.rollups()[0][2], 2)
+        self.assertMatchesRebuild()
+
+    def test_stock_delete_and_archive(self):
+        Sales.objects.filter(pk=self.sales[0].pk).update(sold_on=timezone.now() - timedelta(days=400))
+        rebuild_rollups()
+        archive_sales()
+        self.assertMatchesRebuild()  # archived sales stay in the rollups
+
+        self.stock.delete()
+        self.assertEqual(self.rollups(), [])
+
+
+class RollupBackfillMigrationTests(TransactionTestCase):
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('sales', target)])
+
+    def test_existing_verified_sales_are_rolled_up(self):
+        self.migrate('0011_sales_keyset_index')
+        try:
+            user = CustomUser.objects.create(username='owner', email='owner@example.com')
+            stock = create_stocks(user, 1)[0]
+            Sales.objects.bulk_create([
+                Sales(stock=stock, quantity_sold=2, selling_price=150, total_amount=300, gross_profit=100,
+                      is_verified=verified)
+                for verified in (True, True, False)
+            ])
+            self.assertFalse(DailySalesRollup.objects.exists())
+        finally:
+            self.migrate('0012_backfill_daily_rollups')
+        self.assertEqual(list(DailySalesRollup.objects.values_list('sales_count', 'total_amount')), [(2, 600)])
+
+
+class ImportSalesTests(TestCase):
+    def setUp(self):
+        self.stock = create_stocks(CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret'), 1)[0]
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.path = Path(folder.name) / 'sales.csv'
+        name = self.stock.name
+        self.path.write_text(
+            "Product,Qty,Rate,Date,Cost,Status\n"
+            f"{name},2,150,2024-03-01,,\n"
+            f"{name.upper()},1,200,01/03/2024,90,yes\n"
+            f"{name},3,150,2024-03-02,,pending\n"
+            "Unknown Shoe,1,150,2024-03-02,,\n"
+            f"{name},0,150,2024-03-02,,\n"
+        )
+
+    def run_import(self, *args):
+        call_command('import_sales', str(self.path), *args, stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_import(self):
+        version = get_data_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.run_import('--batch-size', '2')
+
+        sales = list(Sales.objects.order_by('id').values_list('total_amount', 'gross_profit', 'is_verified'))
+        self.assertEqual(sales, [(300, 100, True), (200, 110, True), (450, 150, False)])
+        self.assertEqual(list(DailySalesRollup.objects.values_list('date', 'sales_count', 'total_amount')), [
+            (date(2024, 3, 1), 2, 500),  # pending sales aren't rolled up
+        ])
+        self.assertEqual(get_data_version(), version + 1)
+
+        errors = self.path.with_name('sales.csv.errors.csv').read_text().splitlines()
+        self.assertEqual([line.split(',')[0] for line in errors], ['line', '5', '6'])
+        self.assertIn("Unknown stock 'Unknown Shoe'", errors[1])
+
+    def test_dry_run_saves_nothing(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.run_import('--dry-run')
+        self.assertFalse(Sales.objects.exists())
+        self.assertFalse(DailySalesRollup.objects.exists())
+        self.assertEqual(callbacks, [])
+        self.assertTrue(self.path.with_name('sales.csv.errors.csv').exists())  # the report is still written
+
+
+class BenchmarkIsolationTests(TestCase):
+    def test_benchmark_leaves_the_real_data_alone(self):
+        user = CustomUser.objects.create(username='owner', email='owner@example.com')
+        stock = create_stocks(user, 1)[0]
+        Sales.objects.create(stock=stock, quantity_sold=2, selling_price=150)
+        post_sales_verification(Sales.objects.all())
+        rollups = list(DailySalesRollup.objects.values_list('sales_count', 'total_amount'))
+        version = get_data_version()
+
+        with tempfile.TemporaryDirectory() as folder:
+            output = Path(folder) / 'benchmark.json'
+            call_command('benchmark_sales_report', sizes=[30, 40], stocks=5, no_memory=True,
+                         output=str(output), stderr=open(Path(folder) / 'log', 'w'))
+            self.assertIn('"rows": 40', output.read_text())
+
+        self.assertEqual(list(DailySalesRollup.objects.values_list('sales_count', 'total_amount')), rollups)
+        self.assertEqual(Sales.objects.count(), 1)
+        self.assertEqual(get_data_version(), version)
+
+
+class ReportCacheTests(TestCase):
+    """Cached PDFs are reused until the rows of their own report change."""
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        config = self.settings(SALES_REPORT_CACHE={'DIR': Path(folder.name), 'MAX_FILES': 2})
+        config.enable()
+        self.addCleanup(config.disable)
+        user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.shoes, self.bags = create_stocks(user, 1)[0], create_stocks(user, 1)[0]
+        self.sale = Sales.objects.create(stock=self.shoes, quantity_sold=1, selling_price=150)
+        self.today = timezone.localdate()
+        self.filters = QueryDict(f'stock__category__id__exact={self.shoes.category_id}')
+
+    def key(self, params=None):
+        params = self.filters if params is None else params
+        queryset = report_cache.report_queryset(params, self.today, self.today)
+        return report_cache.report_key(self.today, self.today, params, queryset)
+
+    def test_hit_and_miss(self):
+        build = mock.Mock(return_value=io.BytesIO(b'%PDF-1'))
+        args = (self.today, self.today, self.filters, report_cache.report_queryset(self.filters, self.today, self.today))
+        path = report_cache.cached_report(*args, build)
+        self.assertEqual(report_cache.cached_report(*args, build), path)
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual(path.read_bytes(), b'%PDF-1')
+
+    def test_key(self):
+        key = self.key()
+        self.assertEqual(self.key(QueryDict(f'{self.filters.urlencode()}&p=2')), key)  # paging doesn't matter
+        Sales.objects.create(stock=self.bags, quantity_sold=1, selling_price=150)
+        self.assertEqual(self.key(), key)  # another category's sale
+        self.assertNotEqual(self.key(QueryDict('')), key)
+
+        self.sale.is_verified = True
+        self.sale.save()
+        self.assertNotEqual(self.key(), key)
+        key = self.key()
+        Stock.objects.filter(pk=self.shoes.pk).update(name='Renamed')
+        self.assertNotEqual(self.key(), key)
+
+    def test_least_recently_used_pdf_is_evicted(self):
+        first, second = report_cache.put('a' * 64, b'1'), report_cache.put('b' * 64, b'2')
+        os.utime(first, (1, 1))
+        os.utime(second, (2, 2))
+        self.assertEqual(report_cache.get('a' * 64), first)  # a hit makes it the newest
+        third = report_cache.put('c' * 64, b'3')
+        self.assertTrue(first.exists())
+        self.assertFalse(second.exists())
+        self.assertTrue(third.exists())
+
+
+class ReportKpiTests(TestCase):
+    """The report's figures come from a fixed number of queries, whatever the row count."""
+
+    def setUp(self):
+        self.shoes, self.bags = create_stocks(CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret'), 2)
+        for stock, quantity, price in [(self.shoes, 2, 150), (self.shoes, 2, 150), (self.bags, 1, 200)]:
+            Sales.objects.create(stock=stock, quantity_sold=quantity, selling_price=price)
+
+    def report_text(self, queryset):
+        today = timezone.localdate()
+        pdf = generate_sales_report(today, today, queryset).getvalue()
+        streams = re.findall(rb'/ASCII85Decode /FlateDecode \].*?stream\r?\n(.*?~>)', pdf, re.S)
+        return b''.join(zlib.decompress(base64.a85decode(stream, adobe=True)) for stream in streams)
+
+    def test_kpis(self):
+        with self.assertNumQueries(3):  # totals, top product, rows
+            text = self.report_text(Sales.objects.all())
+        # 3 sales, 5 units, revenue 800, profit 300, cost 500, shoes on top
+        for value in [b'(3) Tj', b'(5) Tj', b'(Rs. 800.00) Tj', b'(Rs. 300.00) Tj', b'(Rs. 500.00) Tj',
+                      f'({self.shoes.name}) Tj'.encode()]:
+            with self.subTest(value=value):
+                self.assertIn(value, text)
+
+        # More rows, same queries; filtered querysets only count their own rows
+        Sales.objects.bulk_create([
+            Sales(stock=self.bags, quantity_sold=1, selling_price=200, total_amount=200, gross_profit=100)
+            for _ in range(20)
+        ])
+        with self.assertNumQueries(3):
+            text = self.report_text(Sales.objects.filter(stock=self.shoes))
+        self.assertIn(b'(4) Tj', text)
+        self.assertIn(b'(Rs. 600.00) Tj', text)
+
+
+class FastReportTests(TestCase):
+    """Above FAST_TABLE_THRESHOLD the transaction table is drawn page by page."""
+
+    def test_large_report(self):
+        stocks = create_stocks(CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret'), 3)
+        count = FAST_TABLE_THRESHOLD + 200
+        Sales.objects.bulk_create([
+            Sales(stock=stocks[i % 3], quantity_sold=1, selling_price=150, total_amount=150) for i in range(count)
+        ])
+        pages = []
+
+        def spy(*args):
+            flowables = fast_transaction_pages(*args)
+            pages.extend(flowable for flowable in flowables if isinstance(flowable, TransactionPage))
+            return flowables
+
+        today = timezone.localdate()
+        with mock.patch('sales.reports.fast_transaction_pages', spy):
+            pdf = generate_sales_report(today, today, Sales.objects.all()).getvalue()
+
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertTrue(pdf.rstrip().endswith(b'%%EOF'))
+        self.assertEqual(sum(len(page.rows) for page in pages), count)
+        self.assertEqual(len({len(page.rows) for page in pages[1:-1]}), 1)  # full pages between title and tail
+        with mock.patch('sales.reports.fast_transaction_pages', return_value=[]):
+            summary = generate_sales_report(today, today, Sales.objects.all()).getvalue()
+        pdf_pages, summary_pages = (len(re.findall(rb'/Type /Page\b', document)) for document in (pdf, summary))
+        self.assertEqual(pdf_pages, summary_pages + len(pages))  # one PDF page per table page
+
+
+@override_settings(JOBS={'IN_PROCESS': False})
+class ArchivedReportTests(TestCase):
+    """Reports read the archive with the same filters as the live rows."""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.shoes, self.bags = create_stocks(self.user, 1)[0], create_stocks(self.user, 1)[0]
+        for stock in (self.shoes, self.bags):
+            Sales.objects.create(stock=stock, quantity_sold=1, selling_price=150)
+        self.old_day = timezone.now() - timedelta(days=400)
+        Sales.objects.update(sold_on=self.old_day)
+        post_sales_verification(Sales.objects.all())
+        archive_sales()
+        self.live = Sales.objects.create(stock=self.shoes, quantity_sold=1, selling_price=150)
+        self.filters = f'stock__category__id__exact={self.shoes.category_id}'
+
+    def test_archive_follows_the_filters(self):
+        archived = archived_sales(None, None, QueryDict(self.filters))
+        self.assertEqual(list(archived.values_list('stock', flat=True)), [self.shoes.pk])
+        self.assertIsNone(archived_sales(None, None, QueryDict('id__exact=1')))  # no archive equivalent
+
+    def test_default_period_includes_archived_days(self):
+        self.client.force_login(self.user)
+        self.client.post(f"{reverse('admin:sales_sales_changelist')}?{self.filters}", {
+            'action': 'download_sales_report', '_selected_action': [self.live.pk],
+        })
+        job = Job.objects.get(kind='sales_report')
+        self.assertEqual(job.params['start_date'], timezone.localtime(self.old_day).date().isoformat())
+        self.assertEqual(job.params['end_date'], timezone.localdate().isoformat())
+
+
+@override_settings(JOBS={'IN_PROCESS': False})
+class PointOfSaleApiTests(TestCase):
+    def setUp(self):
+        self.partner = CustomUser.objects.create_user('partner', 'partner@example.com', 'secret', is_staff=True)
+        self.partner.user_permissions.add(Permission.objects.get(codename='add_sales'))
+        self.stock = create_stocks(self.partner, 1)[0]  # 50 on hand
+        self.client.force_login(self.partner)
+        self.url = reverse('admin:pos_sales')
+
+    def post(self, key, quantity, stock=None, client=None, **headers):
+        return (client or self.client).post(self.url, json.dumps({
+            'idempotency_key': key, 'items': [{'stock': (stock or self.stock).pk, 'quantity': quantity, 'price': 150}],
+        }), content_type='application/json', **headers)
+
+    def test_replay_and_conflict(self):
+        created = self.post('till-1', 2)
+        self.assertEqual(created.status_code, 201)
+
+        replayed = self.post('till-1', 2)
+        self.assertEqual(replayed.status_code, 200)
+        self.assertEqual(replayed['Idempotent-Replayed'], 'true')
+        self.assertEqual(replayed.json(), created.json())
+
+        self.assertEqual(self.post('till-1', 3).status_code, 409)
+        self.assertEqual(Sales.objects.count(), 1)
+
+    def test_oversold_cart_writes_nothing(self):
+        response = self.post('till-1', 51)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Insufficient stock', response.json()['errors'][0])
+        self.assertFalse(Sales.objects.exists())
+        self.assertFalse(SaleBatch.objects.exists())
+
+    def test_concurrent_duplicate_key_is_replayed(self):
+        self.post('till-1', 2)
+        # The other request's row appears between the lookup and the insert
+        real_filter = SaleBatch.objects.filter
+        lookups = iter([lambda **kw: SaleBatch.objects.none()])
+        with mock.patch.object(SaleBatch.objects, 'filter',
+                               side_effect=lambda **kw: next(lookups, real_filter)(**kw)):
+            response = self.post('till-1', 2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertEqual(Sales.objects.count(), 1)
+
+    def test_permission_and_stock_ownership(self):
+        other = create_stocks(CustomUser.objects.create(username='other', email='other@example.com'), 1)[0]
+        response = self.post('till-1', 1, stock=other)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], [f"Stock {other.pk} does not exist."])
+
+        self.partner.user_permissions.clear()
+        self.assertEqual(self.post('till-2', 1).status_code, 403)
+        self.assertFalse(Sales.objects.exists())
+
+    def test_csrf_token_flow(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.partner)
+        self.assertEqual(self.post('till-1', 1, client=client).status_code, 403)
+        token = client.get(self.url).json()['csrf_token']
+        self.assertEqual(self.post('till-1', 1, client=client, HTTP_X_CSRFTOKEN=token).status_code, 201)
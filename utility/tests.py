@@ -1,3 +1,27 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from accounts.models import CustomUser
+from erp.testing import QueryBudgetMixin
+from .models import Bills
 
-# Create your tests here.
+
+@override_settings(JOBS={'IN_PROCESS': False})
+class BillsAdminQueryTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(CustomUser.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+
+    def add_bills(self, count):
+        start = Bills.objects.count()
+        Bills.objects.bulk_create([Bills(file=f'bills/bill-{start + i}.pdf') for i in range(count)])
+
+    def test_changelist(self):
+        url = reverse('admin:utility_bills_changelist')
+        for _ in range(2):
+            self.add_bills(30)
+            self.assertQueryBudget(url, 5)
+
+    def test_add_form(self):
+        url = reverse('admin:utility_bills_add')
+        for _ in range(2):
+            self.add_bills(30)
+            self.assertQueryBudget(url, 4)